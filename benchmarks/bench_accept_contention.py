@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Multi-process contention benchmark for Ride.accept_ride
+
+Every worker process plays one driver and tries to accept every pending
+ride, in its own random order, against the same database file. Rides are
+spaced out so overlap checks never reject, which means each ride must end
+up accepted exactly once and every other attempt must be told it lost.
+
+Usage:
+    python benchmarks/bench_accept_contention.py --rides 2000 --workers 4 [--wal]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# 2030-01-01 00:00; rides are one hour apart and last half an hour
+FIRST_PICKUP = 1893456000
+
+
+def _worker(args):
+    driver_email, ride_ids, seed = args
+    # Spawned workers import the models fresh; RIDE_CHECKER_DB points them at the bench file
+    from models.ride import Ride
+
+    order = list(ride_ids)
+    random.Random(seed).shuffle(order)
+
+    won = lost = 0
+    for ride_id in order:
+        success, message = Ride.accept_ride(ride_id, driver_email)
+        if success:
+            won += 1
+        elif "no longer available" in message:
+            lost += 1
+        else:
+            raise RuntimeError(f"unexpected result for ride {ride_id}: {message}")
+    return won, lost
+
+
+def run(rides=2000, workers=4, wal=False):
+    """Run the benchmark and return its measurements as a dict."""
+    temp_dir = tempfile.mkdtemp()
+    db_path = os.path.join(temp_dir, "bench_accept.db")
+    saved_env = {key: os.environ.get(key) for key in ("RIDE_CHECKER_DB", "RIDE_CHECKER_WAL")}
+    os.environ["RIDE_CHECKER_DB"] = db_path
+    os.environ["RIDE_CHECKER_WAL"] = "1" if wal else ""
+
+    try:
+        from database.db import Database
+
+        setup = Database(path=db_path, wal=wal)
+        drivers = [f"driver{i}@bench.com" for i in range(workers)]
+        setup.execute_many(
+            "INSERT INTO users (email, username, password, role) VALUES (?, ?, ?, ?)",
+            [("customer@bench.com", "customer", "x", "customer")]
+            + [(email, email.split("@")[0], "x", "driver") for email in drivers]
+        )
+        setup.execute_many("""
+            INSERT INTO rides (customer_email, pickup_location, destination, pickup_datetime,
+                               duration_hours, distance_km, base_cost, tip_amount, total_cost, status)
+            VALUES ('customer@bench.com', 'A', 'B', ?, 0.5, 5.0, 275.0, 0.0, 475.0, 'pending')
+        """, [(time.strftime("%Y-%m-%d %H:%M", time.gmtime(FIRST_PICKUP + i * 3600)),)
+              for i in range(rides)])
+        ride_ids = [row["id"] for row in setup.fetch("SELECT id FROM rides ORDER BY id")]
+        setup.close()
+
+        context = multiprocessing.get_context("spawn")
+        started = time.perf_counter()
+        with context.Pool(workers) as pool:
+            results = pool.map(_worker, [(email, ride_ids, i) for i, email in enumerate(drivers)])
+        elapsed = time.perf_counter() - started
+
+        check = Database(path=db_path, wal=False)
+        accepted = check.fetch("SELECT COUNT(*) AS n FROM rides WHERE status = 'accepted'")[0]["n"]
+        per_driver = {
+            row["driver_email"]: row["n"]
+            for row in check.fetch("SELECT driver_email, COUNT(*) AS n FROM rides GROUP BY driver_email")
+        }
+        check.close()
+
+        won = sum(w for w, _ in results)
+        lost = sum(l for _, l in results)
+        return {
+            "rides": rides,
+            "workers": workers,
+            "wal": wal,
+            "seconds": elapsed,
+            "attempts": won + lost,
+            "accepted": won,
+            "lost_races": lost,
+            "accepted_in_db": accepted,
+            "per_driver": [per_driver.get(email, 0) for email in drivers],
+            "attempts_per_second": (won + lost) / elapsed,
+            "accepts_per_second": won / elapsed,
+        }
+    finally:
+        for key, value in saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rides", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--wal", action="store_true", help="run the database in WAL mode")
+    args = parser.parse_args()
+
+    result = run(args.rides, args.workers, args.wal)
+
+    print(f"Rides: {result['rides']}  Workers: {result['workers']}  WAL: {result['wal']}")
+    print(f"Attempts: {result['attempts']} in {result['seconds']:.2f}s "
+          f"({result['attempts_per_second']:.0f}/s)")
+    print(f"Accepted: {result['accepted']} ({result['accepts_per_second']:.0f}/s), "
+          f"lost races reported: {result['lost_races']}")
+    print(f"Accepted per driver: {result['per_driver']}")
+
+    if result["accepted"] != result["rides"] or result["accepted_in_db"] != result["rides"]:
+        print("FAILED: some rides were double-accepted or never accepted")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
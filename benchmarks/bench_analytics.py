@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Analytics benchmark: four dashboard queries vs Admin.analytics_snapshot
+
+Fills a throwaway database with `--rides` rides spread over a year of
+pickup times and statuses, then times the old dashboard path
+(total_rides, total_revenue, average_duration, busiest_hour) against the
+snapshot read from the ride_stats_hourly rollup, checking that both report
+the same figures. Fill time includes the rollup triggers. Also times
+Admin.timeseries over the whole year for each bucket size.
+
+Usage:
+    python benchmarks/bench_analytics.py --rides 1000000 [--repeat 5] [--wal]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# 2030-01-01 00:00
+FIRST_PICKUP = 1893456000
+STATUSES = ("pending", "accepted", "completed", "completed", "cancelled")
+BATCH = 50000
+
+
+def fill(database, rides, seed=0):
+    """Insert `rides` random rides (and their customer) into `database`."""
+    rng = random.Random(seed)
+    database.execute(
+        "INSERT INTO users (email, username, password, role) VALUES ('customer@bench.com', 'customer', 'x', 'customer')"
+    )
+    for start in range(0, rides, BATCH):
+        batch = []
+        for _ in range(start, min(start + BATCH, rides)):
+            pickup = FIRST_PICKUP + rng.randrange(365 * 24) * 3600 + rng.randrange(4) * 900
+            duration = rng.choice((0.5, 1.0, 1.5, 2.0))
+            cost = round(rng.uniform(150, 1500), 2)
+            batch.append((time.strftime("%Y-%m-%d %H:%M", time.gmtime(pickup)), duration, cost, rng.choice(STATUSES)))
+        database.execute_many("""
+            INSERT INTO rides (customer_email, pickup_location, destination, pickup_datetime,
+                               duration_hours, distance_km, base_cost, tip_amount, total_cost, status)
+            VALUES ('customer@bench.com', 'A', 'B', ?, ?, 5.0, 275.0, 0.0, ?, ?)
+        """, batch)
+
+
+def best_of(repeat, fn):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - started)
+    return min(times), result
+
+
+def run(rides=1_000_000, repeat=5, wal=False):
+    """Run the benchmark and return its measurements as a dict."""
+    from database.db import Database
+    import models.admin as admin_module
+    from models.admin import Admin, AnalyticsSnapshot
+
+    temp_dir = tempfile.mkdtemp()
+    bench_db = Database(path=os.path.join(temp_dir, "bench_analytics.db"), wal=wal)
+    saved_db = admin_module.db
+    try:
+        started = time.perf_counter()
+        fill(bench_db, rides)
+        fill_seconds = time.perf_counter() - started
+        admin_module.db = bench_db
+
+        def four_queries():
+            return AnalyticsSnapshot(Admin.total_rides(), Admin.total_revenue(),
+                                     Admin.average_duration(), Admin.busiest_hour())
+
+        # One untimed pass each so both start with a warm page cache
+        four_queries()
+        Admin.analytics_snapshot()
+        old_seconds, old = best_of(repeat, four_queries)
+        new_seconds, new = best_of(repeat, Admin.analytics_snapshot)
+
+        year = (time.strftime("%Y-%m-%d", time.gmtime(FIRST_PICKUP)),
+                time.strftime("%Y-%m-%d", time.gmtime(FIRST_PICKUP + 365 * 86400)))
+        timeseries_seconds = {
+            bucket: best_of(repeat, lambda: Admin.timeseries("revenue", *year, bucket))[0]
+            for bucket in ("hour", "day", "week")
+        }
+
+        return {
+            "rides": rides,
+            "wal": wal,
+            "fill_seconds": fill_seconds,
+            "four_queries_seconds": old_seconds,
+            "snapshot_seconds": new_seconds,
+            "speedup": old_seconds / new_seconds if new_seconds else float("inf"),
+            "timeseries_seconds": timeseries_seconds,
+            "four_queries": old,
+            "snapshot": new,
+            "matches": (old.total_rides == new.total_rides
+                        and abs(old.total_revenue - new.total_revenue) < 0.01
+                        and abs(old.average_duration - new.average_duration) < 1e-9
+                        and old.busiest_hour == new.busiest_hour),
+        }
+    finally:
+        admin_module.db = saved_db
+        bench_db.close()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rides", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per variant (best is kept)")
+    parser.add_argument("--wal", action="store_true", help="run the database in WAL mode")
+    args = parser.parse_args()
+
+    result = run(args.rides, args.repeat, args.wal)
+
+    print(f"Rides: {result['rides']}  WAL: {result['wal']}  (filled in {result['fill_seconds']:.1f}s)")
+    print(f"Four queries: {result['four_queries_seconds'] * 1000:.1f} ms")
+    print(f"Snapshot:     {result['snapshot_seconds'] * 1000:.1f} ms  ({result['speedup']:.1f}x)")
+    print(f"Snapshot: {result['snapshot']}")
+    for bucket, seconds in result["timeseries_seconds"].items():
+        print(f"Time series, one year by {bucket}: {seconds * 1000:.1f} ms")
+
+    if not result["matches"]:
+        print(f"FAILED: figures differ from the four queries: {result['four_queries']}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
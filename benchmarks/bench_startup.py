@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark: import cost and time to the login window's first paint
+
+Both halves follow main.py's own startup path. The import half runs
+`import main; main.prepare()` (everything main() loads before the
+application object exists) under `python -X importtime` in a fresh
+interpreter, or `import <module>` with --module, and reports the total, the
+slowest modules and which heavy dependencies (QtWebEngineWidgets, geopy,
+requests, numpy, ...) got pulled in. Startup should load none of them; they
+belong to the dashboards. PyQt5.QtWebEngineCore is listed separately: the
+ridemap:// registration in main.prepare() needs it and Qt only accepts that
+before the application exists, so every launch pays for it.
+
+The paint half runs main.prepare() and main.RideHailingApp in a child
+process and times from launch until the login window first paints, then
+closes it. It needs PyQt5 and a display (QT_QPA_PLATFORM=offscreen works
+headless).
+
+Usage:
+    python benchmarks/bench_startup.py [--module ui.login_window] [--top 15] [--no-paint]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# Modules startup should never need
+HEAVY_MODULES = ("PyQt5.QtWebEngineWidgets", "folium", "geopy",
+                 "requests", "numpy", "models.routing", "models.road_network")
+
+# Loaded at startup on purpose (ridemap:// registration), reported but allowed
+STARTUP_COST_MODULES = ("PyQt5.QtWebEngineCore",)
+
+# What main.main() runs before the application object exists, and the
+# top-level imports it makes (their cumulative times add up to the total)
+STARTUP_CODE = "import main; main.prepare()"
+STARTUP_MODULES = ("main", "ui.map_scheme")
+
+PAINT_SCRIPT = """
+import sys
+from PyQt5.QtCore import QEvent, QObject
+
+import main
+
+class FirstPaint(QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint:
+            print("PAINTED", flush=True)
+            app.quit()
+        return False
+
+main.prepare()
+app = main.RideHailingApp(sys.argv)
+painted = FirstPaint()
+app.window.installEventFilter(painted)
+app.exec_()
+"""
+
+
+def _child_env(db_path):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    env["RIDE_CHECKER_DB"] = db_path
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    return env
+
+
+def parse_importtime(stderr):
+    """[(module, self_us, cumulative_us)] from -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3:
+            continue
+        try:
+            self_us, cumulative_us = int(fields[0]), int(fields[1])
+        except ValueError:
+            continue
+        rows.append((fields[2].strip(), self_us, cumulative_us))
+    return rows
+
+
+def measure_imports(module=None, db_path=None):
+    """Run the startup path (or import `module`) in a fresh interpreter; the -X importtime rows."""
+    code = f"import {module}" if module else STARTUP_CODE
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, env=_child_env(db_path), capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        last_line = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "no output"
+        raise RuntimeError(f"{code!r} failed: {last_line}")
+    return parse_importtime(proc.stderr)
+
+
+def measure_first_paint(db_path=None, timeout=60):
+    """Seconds from launching the app the way main() does until the login window first paints."""
+    started = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-c", PAINT_SCRIPT], cwd=ROOT, env=_child_env(db_path),
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    try:
+        for line in proc.stdout:
+            if line.strip() == "PAINTED":
+                return time.perf_counter() - started
+        raise RuntimeError(f"login window never painted: {proc.stderr.read().strip()}")
+    finally:
+        try:
+            proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def run(module=None, top=15, paint=True):
+    """Run the benchmark and return its measurements as a dict."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # A throwaway database so the run never touches the real one
+        db_path = os.path.join(temp_dir, "bench_startup.db")
+        rows = measure_imports(module, db_path)
+        first_paint = measure_first_paint(db_path) if paint else None
+
+    by_name = {name: cumulative for name, _, cumulative in rows}
+    targets = (module,) if module else STARTUP_MODULES
+    return {
+        "module": module or STARTUP_CODE,
+        "modules_imported": len(rows),
+        "import_seconds": sum(by_name.get(name, 0) for name in targets) / 1e6,
+        "slowest": sorted(rows, key=lambda row: row[1], reverse=True)[:top],
+        "heavy_loaded": [name for name in HEAVY_MODULES if name in by_name],
+        "startup_cost": [(name, by_name[name] / 1e6) for name in STARTUP_COST_MODULES if name in by_name],
+        "first_paint_seconds": first_paint,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", help="import this module instead of running main.prepare()")
+    parser.add_argument("--top", type=int, default=15, help="how many of the slowest modules to list")
+    parser.add_argument("--no-paint", action="store_true", help="skip the first-paint measurement")
+    args = parser.parse_args()
+
+    result = run(args.module, args.top, not args.no_paint)
+
+    print(f"{result['module']}: {result['import_seconds'] * 1000:.1f} ms "
+          f"({result['modules_imported']} modules)")
+    for name, seconds in result["startup_cost"]:
+        print(f"  of which {name} (ridemap:// registration): {seconds * 1000:.1f} ms")
+    print("Slowest modules (self time):")
+    for name, self_us, cumulative_us in result["slowest"]:
+        print(f"  {self_us / 1000:8.1f} ms  (cumulative {cumulative_us / 1000:8.1f} ms)  {name}")
+    if result["first_paint_seconds"] is not None:
+        print(f"Time to first paint: {result['first_paint_seconds'] * 1000:.0f} ms")
+
+    if result["heavy_loaded"]:
+        print(f"FAILED: heavy modules loaded at startup: {', '.join(result['heavy_loaded'])}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Cheap "has anything changed?" checks for the shared database.
+
+PRAGMA data_version on a connection changes whenever another connection
+commits to the file, including other processes, and reading it does no
+query work. DataVersionWatcher keeps one dedicated connection for this, so
+the windows can poll it often and re-query only after a real change
+(ui/change_watcher.py puts it on a Qt timer).
+"""
+import sqlite3
+
+
+class DataVersionWatcher:
+    def __init__(self, path=None):
+        if path is None:
+            from database.db import db
+            path = db.path
+        self.path = path
+        # timeout=0: a locked file is reported as "no news yet", never waited on
+        self.conn = sqlite3.connect(path, timeout=0, check_same_thread=False)
+        self.last_version = self.version()
+
+    def version(self):
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def poll(self):
+        """True if another connection has committed since the last poll."""
+        try:
+            version = self.version()
+        except sqlite3.OperationalError:
+            return False
+        if version == self.last_version:
+            return False
+        self.last_version = version
+        return True
+
+    def close(self):
+        self.conn.close()
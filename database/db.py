@@ -1,139 +1,291 @@
 import sqlite3
 import os
+import queue
+import re
+import threading
+import weakref
+from contextlib import contextmanager
+
+from database.migrations import migrate
+
+# RIDE_CHECKER_DB points the app (and benchmark worker processes) at another file
+DB_PATH = os.environ.get("RIDE_CHECKER_DB") or os.path.join(os.path.dirname(__file__), "ride_hailing.db")
+
+# Set RIDE_CHECKER_WAL=1 to run the shared instance in WAL mode with a read pool
+USE_WAL = os.environ.get("RIDE_CHECKER_WAL", "").lower() in ("1", "true", "yes")
+READ_POOL_SIZE = 4
 
-DB_PATH = os.path.join(os.path.dirname(__file__), "ride_hailing.db")
 
 class Database:
-    def __init__(self):
-        self.conn = sqlite3.connect(DB_PATH)
-        self.conn.row_factory = sqlite3.Row  # Allows dict-like row access
+    def __init__(self, path=None, wal=None, read_pool_size=READ_POOL_SIZE):
+        self.path = path or DB_PATH
+        self.wal = USE_WAL if wal is None else wal
+
+        # Single write connection; shared across threads behind a lock
+        self._write_lock = threading.RLock()
+        self._tx_depth = 0
+        self._tx_thread = None
+        self._owner_thread = threading.get_ident()
+        self.conn = self._connect()
+        if self.wal:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
         self.create_tables()
 
+        # Bounded pool of read-only connections (WAL mode only). In WAL mode
+        # readers work off a snapshot and never wait on the writer.
+        self._readers = None
+        if self.wal:
+            self._readers = queue.LifoQueue(maxsize=read_pool_size)
+            for _ in range(read_pool_size):
+                reader = self._connect()
+                reader.execute("PRAGMA query_only=ON")
+                self._readers.put(reader)
+
+        # Without a pool, other threads (background loaders) read on a
+        # connection of their own instead of queueing on the write lock
+        self._local = threading.local()
+        self._thread_readers = []
+        self._thread_readers_lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row  # Allows dict-like row access
+        return conn
+
+    def _thread_reader(self):
+        handle = getattr(self._local, "reader", None)
+        if handle is None:
+            conn = self._connect()
+            conn.execute("PRAGMA query_only=ON")
+            handle = _ReaderHandle(conn)
+            self._local.reader = handle
+            with self._thread_readers_lock:
+                self._thread_readers.append(conn)
+            # The thread-local handle goes away with its thread (pool threads
+            # retire when idle); close the connection then, not at close()
+            weakref.finalize(handle, _retire_reader, conn, self._thread_readers, self._thread_readers_lock)
+        return handle.conn
+
+    def _uses_shared_conn(self):
+        thread = threading.get_ident()
+        if self._tx_thread == thread:
+            return True
+        return self._readers is None and thread == self._owner_thread
+
+    # -----------------------------
+    # Borrow a connection for reading
+    # -----------------------------
+    @contextmanager
+    def _reader(self):
+        # Reads inside our own transaction must see its uncommitted writes
+        if self._uses_shared_conn():
+            with self._write_lock:
+                yield self.conn
+            return
+        if self._readers is None:
+            yield self._thread_reader()
+            return
+
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
     # -----------------------------
     # Execute SELECT queries
     # -----------------------------
     def fetch(self, query, params=()):
-        cur = self.conn.cursor()
-        cur.execute(query, params)
-        return cur.fetchall()
+        with self._reader() as conn:
+            cur = conn.cursor()
+            cur.execute(query, params)
+            return cur.fetchall()
+
+    # -----------------------------
+    # Stream SELECT results in chunks
+    # -----------------------------
+    def iter_fetch(self, query, params=(), chunk_size=1000):
+        """
+        Yield rows one at a time, pulling chunk_size rows per fetchmany call,
+        so large result sets are processed in constant memory. Exhaust or
+        close() the generator to release its connection.
+        """
+        if self._uses_shared_conn():
+            # Shared connection: only hold the lock while pulling a chunk
+            with self._write_lock:
+                cur = self.conn.cursor()
+                cur.execute(query, params)
+            while True:
+                with self._write_lock:
+                    rows = cur.fetchmany(chunk_size)
+                if not rows:
+                    return
+                yield from rows
+        else:
+            # Pooled or per-thread reader: keep it (and its snapshot) until the stream ends
+            with self._reader() as conn:
+                cur = conn.cursor()
+                cur.execute(query, params)
+                while True:
+                    rows = cur.fetchmany(chunk_size)
+                    if not rows:
+                        return
+                    yield from rows
 
     # -----------------------------
     # Execute INSERT / UPDATE / DELETE
     # -----------------------------
     def execute(self, query, params=()):
-        cur = self.conn.cursor()
-        cur.execute(query, params)
-        self.conn.commit()
-        return cur.lastrowid
+        with self._write_lock:
+            cur = self.conn.cursor()
+            cur.execute(query, params)
+            if not self._tx_depth:
+                self.conn.commit()
+            return cur.lastrowid
 
     # -----------------------------
-    # Create DB tables
+    # Execute UPDATE / DELETE and report affected rows
     # -----------------------------
-    def create_tables(self):
-        users_table = """
-        CREATE TABLE IF NOT EXISTS users (
-            email TEXT PRIMARY KEY,
-            username TEXT NOT NULL,
-            password TEXT NOT NULL,
-            role TEXT NOT NULL CHECK(role IN ('customer', 'driver', 'admin')),
-            name TEXT,
-            address TEXT,
-            phone_number TEXT
-        );
+    def execute_rowcount(self, query, params=()):
+        with self._write_lock:
+            cur = self.conn.cursor()
+            cur.execute(query, params)
+            if not self._tx_depth:
+                self.conn.commit()
+            return cur.rowcount
+
+    # -----------------------------
+    # Execute one statement for many parameter sets
+    # -----------------------------
+    def execute_many(self, query, seq_of_params):
+        """Run a statement once per parameter tuple under a single commit."""
+        with self.transaction():
+            cur = self.conn.cursor()
+            cur.executemany(query, seq_of_params)
+            return cur.rowcount
+
+    # -----------------------------
+    # Group writes into one transaction
+    # -----------------------------
+    @contextmanager
+    def transaction(self):
         """
-        
-        rides_table = """
-        CREATE TABLE IF NOT EXISTS rides (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            customer_email TEXT,
-            driver_email TEXT,
-            pickup_location TEXT,
-            destination TEXT,
-            pickup_datetime TEXT,
-            duration_hours REAL,
-            distance_km REAL,
-            base_cost REAL,
-            tip_amount REAL,
-            total_cost REAL,
-            status TEXT CHECK(status IN ('pending', 'accepted', 'completed', 'cancelled')),
-            FOREIGN KEY(customer_email) REFERENCES users(email),
-            FOREIGN KEY(driver_email) REFERENCES users(email)
-        );
+        Commit everything executed inside the block at once, or roll it all
+        back on error. Nested blocks join the outermost transaction.
+
+            with db.transaction():
+                db.execute(...)
+                db.execute(...)
         """
+        with self._write_lock:
+            if self._tx_depth:
+                self._tx_depth += 1
+                try:
+                    yield self
+                finally:
+                    self._tx_depth -= 1
+                return
 
-        self.conn.execute(users_table)
-        self.conn.execute(rides_table)
-        
-        # Add new columns if they don't exist (for existing databases)
-        try:
-            self.conn.execute("ALTER TABLE users ADD COLUMN name TEXT")
-        except sqlite3.OperationalError:
-            pass  # Column already exists
-        
-        try:
-            self.conn.execute("ALTER TABLE users ADD COLUMN address TEXT")
-        except sqlite3.OperationalError:
-            pass  # Column already exists
-        
-        try:
-            self.conn.execute("ALTER TABLE users ADD COLUMN phone_number TEXT")
-        except sqlite3.OperationalError:
-            pass  # Column already exists
-        
-        # Ensure rides.status supports 'cancelled'. If not, rebuild table preserving data.
-        try:
-            schema_row = self.conn.execute(
-                "SELECT sql FROM sqlite_master WHERE type='table' AND name='rides'"
-            ).fetchone()
-            schema_sql = schema_row["sql"] if schema_row else ""
-            if "cancelled" not in (schema_sql or "").lower():
-                self._rebuild_rides_with_cancelled()
-        except Exception:
-            # If anything goes wrong, fail silently to keep app running.
-            pass
-
-        self.conn.commit()
-
-    def _rebuild_rides_with_cancelled(self):
-        """Rebuild rides table to include 'cancelled' status in CHECK constraint."""
-        cur = self.conn.cursor()
-        cur.execute("PRAGMA foreign_keys=off;")
-        cur.execute("ALTER TABLE rides RENAME TO rides_old;")
-        cur.execute("""
-            CREATE TABLE rides (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                customer_email TEXT,
-                driver_email TEXT,
-                pickup_location TEXT,
-                destination TEXT,
-                pickup_datetime TEXT,
-                duration_hours REAL,
-                distance_km REAL,
-                base_cost REAL,
-                tip_amount REAL,
-                total_cost REAL,
-                status TEXT CHECK(status IN ('pending', 'accepted', 'completed', 'cancelled')),
-                FOREIGN KEY(customer_email) REFERENCES users(email),
-                FOREIGN KEY(driver_email) REFERENCES users(email)
-            );
-        """)
-        # Copy data; any rows with invalid status will be coerced to 'pending'
-        cur.execute("""
-            INSERT INTO rides (id, customer_email, driver_email, pickup_location, destination,
-                               pickup_datetime, duration_hours, distance_km, base_cost,
-                               tip_amount, total_cost, status)
-            SELECT id, customer_email, driver_email, pickup_location, destination,
-                   pickup_datetime, duration_hours, distance_km, base_cost,
-                   tip_amount, total_cost,
-                   CASE WHEN status IN ('pending','accepted','completed','cancelled')
-                        THEN status ELSE 'pending' END
-            FROM rides_old;
-        """)
-        cur.execute("DROP TABLE rides_old;")
-        cur.execute("PRAGMA foreign_keys=on;")
-        self.conn.commit()
-
-
-# Singleton DB instance shared across project
-db = Database()
+            # IMMEDIATE takes the write lock up front instead of upgrading later
+            self.conn.execute("BEGIN IMMEDIATE")
+            self._tx_depth = 1
+            self._tx_thread = threading.get_ident()
+            try:
+                yield self
+            except BaseException:
+                self.conn.rollback()
+                raise
+            else:
+                self.conn.commit()
+            finally:
+                self._tx_depth = 0
+                self._tx_thread = None
+
+    # -----------------------------
+    # Close all connections
+    # -----------------------------
+    def close(self):
+        if self._readers is not None:
+            while not self._readers.empty():
+                self._readers.get_nowait().close()
+        with self._thread_readers_lock:
+            for reader in self._thread_readers:
+                reader.close()
+            self._thread_readers = []
+        self.conn.close()
+
+    # -----------------------------
+    # Create / migrate DB tables
+    # -----------------------------
+    def create_tables(self):
+        with self._write_lock:
+            migrate(self.conn)
+
+
+class _ReaderHandle:
+    """Holds a thread's reader in threading.local so its lifetime can be tracked."""
+    __slots__ = ("conn", "__weakref__")
+
+    def __init__(self, conn):
+        self.conn = conn
+
+
+def _retire_reader(conn, readers, lock):
+    with lock:
+        if conn in readers:
+            readers.remove(conn)
+    conn.close()
+
+
+def keyset_page(query, params=(), key="id", after=None, limit=None):
+    """
+    Adds keyset paging to `query`: rows with `key` past `after`, in `key`
+    order, at most `limit` of them. `key` may be a tuple of columns, with
+    `after` the matching tuple of values. Any WHERE clause must end the query.
+    """
+    columns = (key,) if isinstance(key, str) else tuple(key)
+    params = list(params)
+    if after is not None:
+        after = (after,) if len(columns) == 1 else tuple(after)
+        joiner = " AND " if re.search(r"\bWHERE\b", query, re.IGNORECASE) else " WHERE "
+        if len(columns) == 1:
+            query = f"{query}{joiner}{columns[0]} > ?"
+        else:
+            query = f"{query}{joiner}({', '.join(columns)}) > ({', '.join('?' * len(columns))})"
+        params.extend(after)
+    query = f"{query} ORDER BY {', '.join(columns)}"
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
+    return query, tuple(params)
+
+
+class LazyDatabase:
+    """
+    Stands in for the shared Database and opens it on first use, so
+    importing the models never touches the disk.
+    """
+
+    def __init__(self):
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = Database()
+        return self._instance
+
+    @property
+    def is_open(self):
+        return self._instance is not None
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+
+# Singleton DB instance shared across project (opened lazily)
+db = LazyDatabase()
 
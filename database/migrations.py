@@ -0,0 +1,494 @@
+"""
+Versioned schema migrations for the ride hailing database.
+
+Migrations are applied once, in order, and the schema version is stored in
+PRAGMA user_version. A database that is already current costs one pragma
+read at startup and nothing else.
+"""
+
+# Rows copied per transaction when a migration has to rebuild a table
+BATCH_SIZE = 5000
+
+
+# -----------------------------
+# Schema helpers
+# -----------------------------
+def _rides_table_sql(name):
+    return f"""
+        CREATE TABLE IF NOT EXISTS {name} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            customer_email TEXT,
+            driver_email TEXT,
+            pickup_location TEXT,
+            destination TEXT,
+            pickup_datetime TEXT,
+            duration_hours REAL,
+            distance_km REAL,
+            base_cost REAL,
+            tip_amount REAL,
+            total_cost REAL,
+            status TEXT CHECK(status IN ('pending', 'accepted', 'completed', 'cancelled')),
+            FOREIGN KEY(customer_email) REFERENCES users(email),
+            FOREIGN KEY(driver_email) REFERENCES users(email)
+        );
+    """
+
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _table_sql(conn, table):
+    row = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type='table' AND name=?", (table,)
+    ).fetchone()
+    return (row[0] or "") if row else ""
+
+
+# -----------------------------
+# v1: base tables
+# -----------------------------
+def _create_base_tables(conn, batch_size):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            email TEXT PRIMARY KEY,
+            username TEXT NOT NULL,
+            password TEXT NOT NULL,
+            role TEXT NOT NULL CHECK(role IN ('customer', 'driver', 'admin')),
+            name TEXT,
+            address TEXT,
+            phone_number TEXT
+        );
+    """)
+    conn.execute(_rides_table_sql("rides"))
+
+
+# -----------------------------
+# v2: user profile columns
+# -----------------------------
+def _add_user_profile_columns(conn, batch_size):
+    existing = _columns(conn, "users")
+    for column in ("name", "address", "phone_number"):
+        if column not in existing:
+            conn.execute(f"ALTER TABLE users ADD COLUMN {column} TEXT")
+
+
+# -----------------------------
+# v3: allow the 'cancelled' ride status
+# -----------------------------
+def _copy_status_sql(column):
+    return f"CASE WHEN {column} IN ('pending','accepted','completed','cancelled') THEN {column} ELSE 'pending' END"
+
+
+def _allow_cancelled_status(conn, batch_size):
+    """
+    Rebuild rides with the new CHECK constraint, copying rows in id order
+    one batch per transaction so other connections can get in between.
+    Their edits to copied rows are mirrored by triggers until the swap.
+    An interrupted copy resumes from the last id in rides_new.
+    """
+    if "cancelled" in _table_sql(conn, "rides").lower():
+        return
+
+    conn.execute(_rides_table_sql("rides_new"))
+    # Other connections may write between batches. New rows are picked up by
+    # id below; these mirror edits and deletes of rows already copied. They
+    # are real (not TEMP) triggers so they see every connection's writes, and
+    # they go away with the old table at the swap.
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS rides_copy_update AFTER UPDATE ON rides
+        BEGIN
+            UPDATE rides_new SET
+                id = NEW.id, customer_email = NEW.customer_email, driver_email = NEW.driver_email,
+                pickup_location = NEW.pickup_location, destination = NEW.destination,
+                pickup_datetime = NEW.pickup_datetime, duration_hours = NEW.duration_hours,
+                distance_km = NEW.distance_km, base_cost = NEW.base_cost,
+                tip_amount = NEW.tip_amount, total_cost = NEW.total_cost,
+                status = {_copy_status_sql("NEW.status")}
+            WHERE id = OLD.id;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS rides_copy_delete AFTER DELETE ON rides
+        BEGIN
+            DELETE FROM rides_new WHERE id = OLD.id;
+        END
+    """)
+    conn.commit()
+
+    copy_sql = f"""
+        INSERT INTO rides_new (id, customer_email, driver_email, pickup_location, destination,
+                               pickup_datetime, duration_hours, distance_km, base_cost,
+                               tip_amount, total_cost, status)
+        SELECT id, customer_email, driver_email, pickup_location, destination,
+               pickup_datetime, duration_hours, distance_km, base_cost,
+               tip_amount, total_cost, {_copy_status_sql("status")}
+        FROM rides
+        WHERE id > ?
+        ORDER BY id
+    """
+
+    while True:
+        last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM rides_new").fetchone()[0]
+        conn.execute("BEGIN IMMEDIATE")
+        copied = conn.execute(copy_sql + " LIMIT ?", (last_id, batch_size)).rowcount
+        conn.commit()
+        if copied < batch_size:
+            break
+
+    # Final swap: pick up rows inserted while batching, then replace the table
+    conn.execute("BEGIN IMMEDIATE")
+    last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM rides_new").fetchone()[0]
+    conn.execute(copy_sql, (last_id,))
+    conn.execute("DROP TABLE rides")
+    conn.execute("ALTER TABLE rides_new RENAME TO rides")
+
+
+# -----------------------------
+# v4: indexes for the ride query paths
+# -----------------------------
+RIDE_INDEXES_V4 = {
+    # Driver feed: WHERE status = 'pending'. Partial, so it only holds open requests
+    "idx_rides_pending": "ON rides(pickup_datetime) WHERE status = 'pending'",
+    # get_driver_rides and check_overlap: driver_email (+ status)
+    "idx_rides_driver_status": "ON rides(driver_email, status)",
+    # get_customer_rides, cancel/update ownership checks
+    "idx_rides_customer": "ON rides(customer_email)",
+    # busiest_hour groups on the hour part of pickup_datetime
+    "idx_rides_pickup_hour": "ON rides(SUBSTR(pickup_datetime, 12, 2))",
+}
+
+
+def _create_ride_indexes(conn, batch_size):
+    for name, definition in RIDE_INDEXES_V4.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} {definition}")
+
+
+# -----------------------------
+# v5: typed time and coordinate columns
+# -----------------------------
+# pickup_start / pickup_end are the pickup_datetime wall-clock time as seconds
+# since 1970-01-01 (no timezone conversion), so they sort and subtract like the
+# text they come from. Coordinates are parsed from "(lat, lng)" text; anything
+# else (e.g. a place name) leaves them NULL. Triggers keep the columns in sync
+# with the text columns on every write, whoever does the writing.
+TYPED_COLUMNS_V5 = {
+    "pickup_start": "INTEGER",
+    "pickup_end": "INTEGER",
+    "pickup_lat": "REAL",
+    "pickup_lng": "REAL",
+    "dest_lat": "REAL",
+    "dest_lng": "REAL",
+}
+
+
+def _coordinate_sql(column, part):
+    text = f"TRIM({column}, '() ')"
+    lat = f"TRIM(SUBSTR({text}, 1, INSTR({text}, ',') - 1))"
+    lng = f"TRIM(SUBSTR({text}, INSTR({text}, ',') + 1))"
+    numeric = "NOT GLOB '*[^0-9.eE+-]*'"
+    value = lat if part == "lat" else lng
+    return (
+        f"CASE WHEN INSTR({text}, ',') > 0 AND {lat} <> '' AND {lng} <> '' "
+        f"AND {lat} {numeric} AND {lng} {numeric} THEN CAST({value} AS REAL) END"
+    )
+
+
+def _typed_columns_set_sql(prefix):
+    start = f"CAST(strftime('%s', {prefix}pickup_datetime) AS INTEGER)"
+    duration = f"CAST(ROUND(COALESCE({prefix}duration_hours, 0) * 3600) AS INTEGER)"
+    return f"""
+        pickup_start = {start},
+        pickup_end = {start} + {duration},
+        pickup_lat = {_coordinate_sql(prefix + "pickup_location", "lat")},
+        pickup_lng = {_coordinate_sql(prefix + "pickup_location", "lng")},
+        dest_lat = {_coordinate_sql(prefix + "destination", "lat")},
+        dest_lng = {_coordinate_sql(prefix + "destination", "lng")}
+    """
+
+
+def _add_typed_columns(conn, batch_size):
+    existing = _columns(conn, "rides")
+    for column, column_type in TYPED_COLUMNS_V5.items():
+        if column not in existing:
+            conn.execute(f"ALTER TABLE rides ADD COLUMN {column} {column_type}")
+
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS rides_typed_insert AFTER INSERT ON rides
+        BEGIN
+            UPDATE rides SET {_typed_columns_set_sql("NEW.")} WHERE id = NEW.id;
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS rides_typed_update
+        AFTER UPDATE OF pickup_datetime, duration_hours, pickup_location, destination ON rides
+        BEGIN
+            UPDATE rides SET {_typed_columns_set_sql("NEW.")} WHERE id = NEW.id;
+        END
+    """)
+
+    # busiest_hour now groups on pickup_start instead of SUBSTR(pickup_datetime)
+    conn.execute("DROP INDEX IF EXISTS idx_rides_pickup_hour")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_rides_pickup_start ON rides(pickup_start)")
+    conn.commit()
+
+    # Backfill existing rows one id range per transaction
+    last_id = 0
+    while True:
+        conn.execute("BEGIN IMMEDIATE")
+        batch_end = conn.execute(
+            "SELECT MAX(id) FROM (SELECT id FROM rides WHERE id > ? ORDER BY id LIMIT ?)",
+            (last_id, batch_size)
+        ).fetchone()[0]
+        if batch_end is None:
+            break
+        conn.execute(
+            f"UPDATE rides SET {_typed_columns_set_sql('')} WHERE id > ? AND id <= ?",
+            (last_id, batch_end)
+        )
+        conn.commit()
+        last_id = batch_end
+
+
+# -----------------------------
+# v6: driver schedule window index for check_overlap
+# -----------------------------
+def _index_driver_schedule(conn, batch_size):
+    # (driver_email, status, pickup_end) serves the overlap range test and
+    # still covers the driver_email / status lookups of the old index
+    conn.execute("DROP INDEX IF EXISTS idx_rides_driver_status")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_rides_driver_window ON rides(driver_email, status, pickup_end)"
+    )
+
+
+# -----------------------------
+# v7: change tracking for incremental view refreshes
+# -----------------------------
+CHANGE_TRACKED_COLUMNS = (
+    "customer_email", "driver_email", "pickup_location", "destination", "pickup_datetime",
+    "duration_hours", "distance_km", "base_cost", "tip_amount", "total_cost", "status",
+)
+
+
+def _track_ride_changes(conn, batch_size):
+    # One counter row; every ride insert, update or delete takes the next
+    # value, so "what changed since N" is a range scan on change_seq. Rows
+    # older than the migration keep NULL: they predate every marker.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS change_counter (
+            id INTEGER PRIMARY KEY CHECK(id = 1),
+            seq INTEGER NOT NULL
+        )
+    """)
+    conn.execute("INSERT OR IGNORE INTO change_counter (id, seq) VALUES (1, 0)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS ride_tombstones (
+            ride_id INTEGER PRIMARY KEY,
+            change_seq INTEGER NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_ride_tombstones_seq ON ride_tombstones(change_seq)")
+
+    if "change_seq" not in _columns(conn, "rides"):
+        conn.execute("ALTER TABLE rides ADD COLUMN change_seq INTEGER")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_rides_change_seq ON rides(change_seq)")
+
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS rides_change_insert AFTER INSERT ON rides
+        BEGIN
+            UPDATE change_counter SET seq = seq + 1 WHERE id = 1;
+            UPDATE rides SET change_seq = (SELECT seq FROM change_counter WHERE id = 1) WHERE id = NEW.id;
+        END
+    """)
+    # Only stored columns count; the typed columns are derived by triggers
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS rides_change_update
+        AFTER UPDATE OF {", ".join(CHANGE_TRACKED_COLUMNS)} ON rides
+        BEGIN
+            UPDATE change_counter SET seq = seq + 1 WHERE id = 1;
+            UPDATE rides SET change_seq = (SELECT seq FROM change_counter WHERE id = 1) WHERE id = NEW.id;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS rides_change_delete AFTER DELETE ON rides
+        BEGIN
+            UPDATE change_counter SET seq = seq + 1 WHERE id = 1;
+            INSERT OR REPLACE INTO ride_tombstones (ride_id, change_seq)
+            VALUES (OLD.id, (SELECT seq FROM change_counter WHERE id = 1));
+        END
+    """)
+
+
+# -----------------------------
+# v8: covering index for the analytics snapshot
+# -----------------------------
+def _index_ride_analytics(conn, batch_size):
+    # Admin.analytics_snapshot groups on pickup_start and reads status,
+    # total_cost and duration_hours; with all four in one index the scan never
+    # touches the table and arrives already grouped. pickup_start leads, so it
+    # also serves every lookup the old single-column index did.
+    conn.execute("DROP INDEX IF EXISTS idx_rides_pickup_start")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_rides_analytics "
+        "ON rides(pickup_start, status, total_cost, duration_hours)"
+    )
+
+
+# -----------------------------
+# v9: hourly and daily ride rollups
+# -----------------------------
+# Table name -> bucket width in seconds. A bucket is keyed by the pickup_start
+# it begins at. Rides without a pickup_start are left out; callers add them
+# from rides directly (the v8 index finds them). Revenue leaves out cancelled
+# rides, as Admin.total_revenue does.
+RIDE_ROLLUPS_V9 = {
+    "ride_stats_hourly": 3600,
+    "ride_stats_daily": 86400,
+}
+
+RIDE_STATUSES = ("pending", "accepted", "completed", "cancelled")
+ROLLUP_COLUMNS = ("rides", "revenue", "duration_sum", "duration_count") + RIDE_STATUSES
+
+
+def _rollup_values_sql(prefix):
+    """One ride's contribution to each of ROLLUP_COLUMNS."""
+    return [
+        "1",
+        f"CASE WHEN {prefix}status != 'cancelled' THEN COALESCE({prefix}total_cost, 0) ELSE 0 END",
+        f"COALESCE({prefix}duration_hours, 0)",
+        f"{prefix}duration_hours IS NOT NULL",
+    ] + [f"{prefix}status = '{status}'" for status in RIDE_STATUSES]
+
+
+def _rollup_add_sql(table, width):
+    values = ", ".join(_rollup_values_sql("NEW."))
+    updates = ", ".join(f"{column} = {column} + excluded.{column}" for column in ROLLUP_COLUMNS)
+    return f"""
+        INSERT INTO {table} (bucket_start, {", ".join(ROLLUP_COLUMNS)})
+        SELECT NEW.pickup_start - NEW.pickup_start % {width}, {values}
+        WHERE NEW.pickup_start IS NOT NULL
+        ON CONFLICT(bucket_start) DO UPDATE SET {updates};
+    """
+
+
+def _rollup_remove_sql(table, width):
+    updates = ", ".join(
+        f"{column} = {column} - ({value})"
+        for column, value in zip(ROLLUP_COLUMNS, _rollup_values_sql("OLD."))
+    )
+    bucket = f"OLD.pickup_start - OLD.pickup_start % {width}"
+    return f"""
+        UPDATE {table} SET {updates} WHERE bucket_start = {bucket};
+        DELETE FROM {table} WHERE bucket_start = {bucket} AND rides = 0;
+    """
+
+
+def rollup_select_sql(width):
+    """SELECT of every rollup row for one bucket width, computed from rides."""
+    aggregates = ", ".join(
+        f"SUM({value}) AS {column}" for column, value in zip(ROLLUP_COLUMNS, _rollup_values_sql(""))
+    )
+    return f"""
+        SELECT pickup_start - pickup_start % {width} AS bucket_start, {aggregates}
+        FROM rides
+        WHERE pickup_start IS NOT NULL
+        GROUP BY bucket_start
+    """
+
+
+def rebuild_ride_rollups(conn):
+    """
+    Recompute every rollup row from rides. Runs in the caller's transaction;
+    the triggers keep the tables current from then on.
+    """
+    for table, width in RIDE_ROLLUPS_V9.items():
+        conn.execute(f"DELETE FROM {table}")
+        conn.execute(
+            f"INSERT INTO {table} (bucket_start, {', '.join(ROLLUP_COLUMNS)}) {rollup_select_sql(width)}"
+        )
+
+
+def _create_ride_rollups(conn, batch_size):
+    for table in RIDE_ROLLUPS_V9:
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                bucket_start INTEGER PRIMARY KEY,
+                rides INTEGER NOT NULL,
+                revenue REAL NOT NULL,
+                duration_sum REAL NOT NULL,
+                duration_count INTEGER NOT NULL,
+                {", ".join(f"{status} INTEGER NOT NULL" for status in RIDE_STATUSES)}
+            )
+        """)
+
+    # Every write is applied as "take OLD out, put NEW in", so the order these
+    # fire in relative to rides_typed_* does not matter: an insert arrives with
+    # no pickup_start and is counted when the typed trigger fills it in.
+    add = "".join(_rollup_add_sql(table, width) for table, width in RIDE_ROLLUPS_V9.items())
+    remove = "".join(_rollup_remove_sql(table, width) for table, width in RIDE_ROLLUPS_V9.items())
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS rides_rollup_insert AFTER INSERT ON rides BEGIN {add} END")
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS rides_rollup_update
+        AFTER UPDATE OF pickup_start, status, total_cost, duration_hours ON rides
+        BEGIN {remove} {add} END
+    """)
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS rides_rollup_delete AFTER DELETE ON rides BEGIN {remove} END")
+
+    # One pass in this transaction, so no write can land between the
+    # backfill and the triggers taking over
+    rebuild_ride_rollups(conn)
+
+
+# -----------------------------
+# v10: ride length index for check_overlap's upper bound
+# -----------------------------
+def _index_ride_lengths(conn, batch_size):
+    # check_overlap bounds pickup_end from above by the longest stored ride;
+    # with the length indexed, MAX(pickup_end - pickup_start) is one seek
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_rides_length ON rides(pickup_end - pickup_start)"
+    )
+
+
+# Ordered (version, step) pairs. Steps must be idempotent: they may run
+# against databases created before versioning existed.
+MIGRATIONS = [
+    (1, _create_base_tables),
+    (2, _add_user_profile_columns),
+    (3, _allow_cancelled_status),
+    (4, _create_ride_indexes),
+    (5, _add_typed_columns),
+    (6, _index_driver_schedule),
+    (7, _track_ride_changes),
+    (8, _index_ride_analytics),
+    (9, _create_ride_rollups),
+    (10, _index_ride_lengths),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn, batch_size=BATCH_SIZE):
+    """Bring the database up to LATEST_VERSION. Returns the final version."""
+    version = schema_version(conn)
+    if version >= LATEST_VERSION:
+        return version
+
+    for target, step in MIGRATIONS:
+        if target <= version:
+            continue
+        if not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE")
+        step(conn, batch_size)
+        if not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE")
+        conn.execute(f"PRAGMA user_version = {target}")
+        conn.commit()
+        version = target
+
+    return version
@@ -0,0 +1,83 @@
+"""
+Maintenance for the ride_stats_hourly / ride_stats_daily rollup tables.
+
+Triggers (database/migrations.py, v9) keep the rollups current on every
+ride write, so this is only needed after something bypassed them, such as
+a restore of the rides table alone or edits with triggers disabled.
+
+    python -m database.rollups check      # exit 1 if a rollup is stale
+    python -m database.rollups rebuild    # recompute both tables from rides
+"""
+import argparse
+import sys
+
+from database.migrations import RIDE_ROLLUPS_V9, ROLLUP_COLUMNS, rebuild_ride_rollups, rollup_select_sql
+
+
+def _database(database):
+    if database is None:
+        from database.db import db
+        database = db
+    return database
+
+
+def rebuild(database=None):
+    """Recompute the rollups from rides in one transaction."""
+    database = _database(database)
+    with database.transaction():
+        rebuild_ride_rollups(database.conn)
+
+
+def stale_buckets(database=None):
+    """
+    {table: [bucket_start, ...]} for rollup rows that differ from a fresh
+    aggregate of rides. Empty when every table is current.
+    """
+    database = _database(database)
+    stale = {}
+    for table, width in RIDE_ROLLUPS_V9.items():
+        # Revenue and duration are float sums; compare them to the cent
+        columns = ", ".join(
+            f"ROUND({column}, 2)" if column in ("revenue", "duration_sum") else column
+            for column in ROLLUP_COLUMNS
+        )
+        expected = rollup_select_sql(width)
+        rows = database.fetch(f"""
+            SELECT bucket_start FROM (
+                SELECT bucket_start, {columns} FROM ({expected})
+                EXCEPT SELECT bucket_start, {columns} FROM {table}
+            )
+            UNION
+            SELECT bucket_start FROM (
+                SELECT bucket_start, {columns} FROM {table}
+                EXCEPT SELECT bucket_start, {columns} FROM ({expected})
+            )
+            ORDER BY bucket_start
+        """)
+        if rows:
+            stale[table] = [row["bucket_start"] for row in rows]
+    return stale
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ride statistics rollup maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("check", help="compare the rollups with the rides table")
+    commands.add_parser("rebuild", help="recompute the rollups from the rides table")
+
+    args = parser.parse_args(argv)
+    if args.command == "rebuild":
+        rebuild()
+        print("Rebuilt " + ", ".join(RIDE_ROLLUPS_V9))
+        return 0
+
+    stale = stale_buckets()
+    for table, buckets in stale.items():
+        print(f"{table}: {len(buckets)} stale buckets")
+    if not stale:
+        print("Rollups are current")
+    return 1 if stale else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+"""
+Persistent cache of driving distances between coordinate pairs.
+
+Entries live in their own SQLite file so cache traffic never contends with
+ride writes. Keys are the pickup and destination rounded to `precision`
+decimal places (4 places is roughly 11 m). Entries expire `ttl_seconds`
+after they were fetched, and the least recently used ones are evicted
+once the cache holds more than `max_entries`. Recently used entries are
+also kept in memory so repeat lookups skip SQLite entirely; their use is
+written back to last_used in one batch before anything is evicted.
+"""
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+ROUTE_CACHE_PATH = os.environ.get("RIDE_CHECKER_ROUTE_CACHE") or os.path.join(
+    os.path.dirname(__file__), "route_cache.db"
+)
+
+# Keys per IN (...) in get_many, under SQLite's oldest bound-variable limit (999)
+LOOKUP_CHUNK = 900
+
+
+class RouteCache:
+    def __init__(self, path=None, precision=4, max_entries=10000,
+                 ttl_seconds=7 * 24 * 3600, memory_entries=1024):
+        self.path = path or ROUTE_CACHE_PATH
+        self.precision = precision
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.memory_entries = memory_entries
+
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # key -> (distance_km, created_at)
+        self._touched = {}  # key -> last memory hit not yet written to last_used
+
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS route_cache (
+                key TEXT PRIMARY KEY,
+                distance_km REAL NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_route_cache_last_used ON route_cache(last_used)")
+        self.conn.commit()
+
+    # -----------------------------
+    # Cache key for a (pickup, destination) pair
+    # -----------------------------
+    def make_key(self, pickup, destination):
+        return self.point_key(pickup) + ";" + self.point_key(destination)
+
+    def point_key(self, point):
+        """One side of a key; batches format each point once and join them."""
+        p = self.precision
+        return f"{point[0]:.{p}f},{point[1]:.{p}f}"
+
+    # -----------------------------
+    # Lookup: distance in km, or None on a miss
+    # -----------------------------
+    def get(self, pickup, destination):
+        key = self.make_key(pickup, destination)
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and now - entry[1] < self.ttl_seconds:
+                self._memory.move_to_end(key)
+                self._touched[key] = now
+                self.hits += 1
+                return entry[0]
+            self._memory.pop(key, None)
+
+            row = self.conn.execute(
+                "SELECT distance_km, created_at FROM route_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and now - row[1] < self.ttl_seconds:
+                self.conn.execute("UPDATE route_cache SET last_used = ? WHERE key = ?", (now, key))
+                self.conn.commit()
+                self._remember(key, row[0], row[1])
+                self.hits += 1
+                return row[0]
+
+            if row is not None:
+                self.conn.execute("DELETE FROM route_cache WHERE key = ?", (key,))
+                self.conn.commit()
+            self.misses += 1
+            return None
+
+    # -----------------------------
+    # Bulk lookup: distances (or None) aligned with keys
+    # -----------------------------
+    def get_many(self, keys):
+        """
+        keys: make_key() strings for a whole batch, e.g. the gaps of a
+        distance matrix. One IN (...) query per LOOKUP_CHUNK keys; leaves the
+        hit / miss counters, last_used and expired rows alone, so it costs
+        no writes.
+        """
+        now = time.time()
+        found = {}
+
+        with self._lock:
+            for key in keys:
+                entry = self._memory.get(key)
+                if entry is not None and now - entry[1] < self.ttl_seconds:
+                    found[key] = entry[0]
+
+            pending = list({key for key in keys if key not in found})
+            for start in range(0, len(pending), LOOKUP_CHUNK):
+                chunk = pending[start:start + LOOKUP_CHUNK]
+                rows = self.conn.execute(
+                    f"SELECT key, distance_km FROM route_cache WHERE key IN ({', '.join('?' * len(chunk))})"
+                    " AND created_at > ?",
+                    (*chunk, now - self.ttl_seconds)
+                ).fetchall()
+                found.update(rows)
+
+        return [found.get(key) for key in keys]
+
+    # -----------------------------
+    # Store a freshly fetched distance
+    # -----------------------------
+    def put(self, pickup, destination, distance_km):
+        key = self.make_key(pickup, destination)
+        now = time.time()
+
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO route_cache (key, distance_km, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, distance_km, now, now)
+            )
+            excess = self.conn.execute("SELECT COUNT(*) FROM route_cache").fetchone()[0] - self.max_entries
+            if excess > 0:
+                self._flush_touched()
+                evicted = self.conn.execute(
+                    "SELECT key FROM route_cache ORDER BY last_used LIMIT ?", (excess,)
+                ).fetchall()
+                self.conn.executemany("DELETE FROM route_cache WHERE key = ?", evicted)
+                for (evicted_key,) in evicted:
+                    self._memory.pop(evicted_key, None)
+            self.conn.commit()
+            self._remember(key, distance_km, now)
+
+    def _flush_touched(self):
+        """Write memory-hit times to last_used so eviction sees them."""
+        if self._touched:
+            self.conn.executemany(
+                "UPDATE route_cache SET last_used = MAX(last_used, ?) WHERE key = ?",
+                [(used, key) for key, used in self._touched.items()]
+            )
+            self._touched.clear()
+
+    def _remember(self, key, distance_km, created_at):
+        self._memory[key] = (distance_km, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    # -----------------------------
+    # Hit / miss counters
+    # -----------------------------
+    def stats(self):
+        with self._lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM route_cache").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": entries,
+            }
+
+    def clear(self):
+        with self._lock:
+            self.conn.execute("DELETE FROM route_cache")
+            self.conn.commit()
+            self._memory.clear()
+            self._touched.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def close(self):
+        with self._lock:
+            self._flush_touched()
+            self.conn.commit()
+        self.conn.close()
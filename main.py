@@ -44,7 +44,7 @@ class RideHailingApp(QApplication):
                 padding: 6px;
                 border-radius: 6px;
             }
-            QTableWidget {
+            QTableView {
                 background-color: #2a2a2a;
                 gridline-color: #444444;
             }
@@ -62,7 +62,22 @@ class RideHailingApp(QApplication):
         self.window.show()
 
 
+def prepare():
+    """
+    Process-wide setup that must happen before the application object
+    exists: the shared GL contexts let QtWebEngineWidgets be imported later,
+    when the map first opens, and ridemap:// can only be registered now.
+    Registering it loads PyQt5.QtWebEngineCore, the one QtWebEngine module
+    startup pays for; Qt offers no way to declare the scheme later.
+    """
+    from ui.map_scheme import register_scheme
+
+    QApplication.setAttribute(Qt.AA_ShareOpenGLContexts)
+    register_scheme()
+
+
 def main():
+    prepare()
     app = RideHailingApp(sys.argv)
     sys.exit(app.exec_())
 
@@ -1,6 +1,53 @@
-from database.db import db
+import calendar
+from datetime import date, datetime, timedelta
+from typing import NamedTuple, Optional
+
+from database.db import db, keyset_page
 from models.user import User
 
+TIMESERIES_METRICS = ("rides", "revenue", "cancellations", "average_fare")
+
+# Bucket -> (rollup table, width in seconds)
+TIMESERIES_BUCKETS = {
+    "hour": ("ride_stats_hourly", 3600),
+    "day": ("ride_stats_daily", 86400),
+    "week": ("ride_stats_daily", 7 * 86400),
+}
+
+# Weeks start on Monday; 1970-01-05 is the first Monday after the epoch
+FIRST_MONDAY = 4 * 86400
+EPOCH = datetime(1970, 1, 1)
+
+
+class AnalyticsSnapshot(NamedTuple):
+    """Every dashboard figure, read together"""
+    total_rides: int
+    total_revenue: float
+    average_duration: float
+    # "HH" with the most pickups, or None
+    busiest_hour: Optional[str]
+
+
+class TimeSeriesPoint(NamedTuple):
+    """One bucket of Admin.timeseries"""
+    start: datetime
+    value: float
+
+
+def _epoch(moment):
+    """datetime, date or "YYYY-MM-DD[ HH:MM]" -> wall-clock seconds, as in rides.pickup_start"""
+    if isinstance(moment, str):
+        moment = datetime.fromisoformat(moment)
+    elif not isinstance(moment, datetime) and isinstance(moment, date):
+        moment = datetime.combine(moment, datetime.min.time())
+    return calendar.timegm(moment.timetuple())
+
+
+def _bucket_floor(seconds, bucket):
+    width = TIMESERIES_BUCKETS[bucket][1]
+    offset = FIRST_MONDAY if bucket == "week" else 0
+    return seconds - (seconds - offset) % width
+
 
 class Admin:
 
@@ -8,16 +55,26 @@ class Admin:
     # Get all users
     # ---------------------------------------------------
     @staticmethod
-    def get_users():
-        return User.get_all_users()
+    def get_users(limit=None, after_email=None):
+        return User.get_all_users(limit, after_email)
 
     # ---------------------------------------------------
-    # Get all rides
+    # Get all rides (one page with limit/after_id)
     # ---------------------------------------------------
     @staticmethod
-    def get_rides():
-        rows = db.fetch("SELECT * FROM rides")
-        return [dict(row) for row in rows]
+    def get_rides(limit=None, after_id=None):
+        if limit is None and after_id is None:
+            return list(Admin.iter_rides())
+        query, params = keyset_page("SELECT * FROM rides", after=after_id, limit=limit)
+        return [dict(row) for row in db.fetch(query, params)]
+
+    # ---------------------------------------------------
+    # Stream all rides (exports / analytics over large tables)
+    # ---------------------------------------------------
+    @staticmethod
+    def iter_rides(chunk_size=1000):
+        for row in db.iter_fetch("SELECT * FROM rides", chunk_size=chunk_size):
+            yield dict(row)
 
     # ---------------------------------------------------
     # Total number of rides
@@ -49,11 +106,12 @@ class Admin:
     @staticmethod
     def busiest_hour():
         """
-        Extracts HOUR from pickup_datetime (format: yyyy-mm-dd HH:MM)
+        Hour of day (as "HH") with the most pickups, from the pickup_start epoch
         """
         rows = db.fetch("""
             SELECT 
-                SUBSTR(pickup_datetime, 12, 2) AS hour, 
+                CASE WHEN pickup_start IS NOT NULL
+                     THEN printf('%02d', (pickup_start % 86400) / 3600) END AS hour, 
                 COUNT(*) AS count 
             FROM rides 
             GROUP BY hour 
@@ -66,6 +124,116 @@ class Admin:
 
         return rows[0]["hour"]
 
+    # ---------------------------------------------------
+    # All dashboard metrics from the hourly rollup
+    # ---------------------------------------------------
+    @staticmethod
+    def analytics_snapshot():
+        """
+        total_rides, total_revenue, average_duration and busiest_hour in
+        one query over the ride_stats_hourly rollup (kept current by
+        triggers), folded into one row per hour of the day. Rides with no
+        pickup_start are not in the rollup; they are read from rides through
+        idx_rides_analytics as one extra "undated" row. The totals are summed
+        from those rows.
+        """
+        rows = db.fetch("""
+            SELECT
+                (bucket_start % 86400) / 3600 AS hour,
+                SUM(rides) AS rides,
+                SUM(revenue) AS revenue,
+                SUM(duration_sum) AS duration_sum,
+                SUM(duration_count) AS duration_count
+            FROM ride_stats_hourly
+            GROUP BY hour
+            UNION ALL
+            SELECT
+                NULL,
+                COUNT(*),
+                SUM(CASE WHEN status != 'cancelled' THEN total_cost END),
+                SUM(duration_hours),
+                COUNT(duration_hours)
+            FROM rides
+            WHERE pickup_start IS NULL
+            HAVING COUNT(*) > 0
+        """)
+
+        total_rides = sum(row["rides"] for row in rows)
+        total_revenue = sum(row["revenue"] or 0 for row in rows)
+        duration_count = sum(row["duration_count"] for row in rows)
+        average_duration = (
+            sum(row["duration_sum"] or 0 for row in rows) / duration_count if duration_count else 0
+        )
+
+        busiest_hour = None
+        if rows:
+            # Ties go to the earliest hour, undated rides first (as busiest_hour groups them)
+            busiest = max(rows, key=lambda row: (row["rides"], -(row["hour"] if row["hour"] is not None else -1)))
+            if busiest["hour"] is not None:
+                busiest_hour = f"{busiest['hour']:02d}"
+
+        return AnalyticsSnapshot(total_rides, total_revenue or 0, average_duration or 0, busiest_hour)
+
+    # ---------------------------------------------------
+    # Metric per hour / day / week over a date range
+    # ---------------------------------------------------
+    @staticmethod
+    def timeseries(metric, start, end, bucket="day"):
+        """
+        TimeSeriesPoint per bucket, zero-filled, from the rollup tables. Both
+        edges widen to whole buckets: points run from the bucket holding
+        start to the one holding the last moment before end, and each counts
+        every pickup in its bucket, so edge buckets can include pickups just
+        outside [start, end). metric is one of TIMESERIES_METRICS; bucket is
+        "hour", "day" or "week" (Monday-based, summed from the daily rollup).
+        start / end are datetimes, dates or "YYYY-MM-DD[ HH:MM]" text.
+        Revenue and average_fare leave out cancelled rides.
+        """
+        if metric not in TIMESERIES_METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        if bucket not in TIMESERIES_BUCKETS:
+            raise ValueError(f"Unknown bucket: {bucket}")
+
+        table, width = TIMESERIES_BUCKETS[bucket]
+        first = _bucket_floor(_epoch(start), bucket)
+        stop = max(first, _bucket_floor(_epoch(end) - 1, bucket) + width)
+        # Hour and day rows are one per bucket already; weeks sum seven days
+        if bucket == "week":
+            rows = db.fetch(f"""
+                SELECT bucket_start - (bucket_start - {FIRST_MONDAY}) % {width} AS bucket,
+                       SUM(rides) AS rides, SUM(revenue) AS revenue, SUM(cancelled) AS cancelled
+                FROM {table}
+                WHERE bucket_start >= ? AND bucket_start < ?
+                GROUP BY bucket
+            """, (first, stop))
+        else:
+            rows = db.fetch(f"""
+                SELECT bucket_start AS bucket, rides, revenue, cancelled
+                FROM {table}
+                WHERE bucket_start >= ? AND bucket_start < ?
+            """, (first, stop))
+        by_bucket = {row["bucket"]: row for row in rows}
+
+        points = []
+        moment = EPOCH + timedelta(seconds=first)
+        step = timedelta(seconds=width)
+        for bucket_start in range(first, stop, width):
+            row = by_bucket.get(bucket_start)
+            value = 0
+            if row is None:
+                pass
+            elif metric == "rides":
+                value = row["rides"]
+            elif metric == "revenue":
+                value = row["revenue"]
+            elif metric == "cancellations":
+                value = row["cancelled"]
+            elif row["rides"] > row["cancelled"]:
+                value = row["revenue"] / (row["rides"] - row["cancelled"])
+            points.append(TimeSeriesPoint(moment, value))
+            moment += step
+        return points
+
     # ---------------------------------------------------
     # Delete user (customer or driver)
     # ---------------------------------------------------
@@ -1,5 +1,17 @@
-from database.db import db
+import calendar
+import math
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from database.db import db, keyset_page
 from geopy.distance import geodesic
+from models import geo
+from models.tariff import get_tariff
+
+# Longest ride the booking form offers. check_overlap does not rely on it:
+# rides booked elsewhere can be longer, so it reads the longest stored ride.
+MAX_RIDE_HOURS = 24
 
 
 class Ride:
@@ -16,26 +28,60 @@ class Ride:
         """
         return geodesic(pickup_coords, destination_coords).km
 
+    # ---------------------------------------------------
+    # Helper: Driving distance along roads (models/routing.py)
+    # ---------------------------------------------------
+    @staticmethod
+    def calculate_driving_distance(pickup_coords, destination_coords):
+        """
+        Road distance in kilometers from the offline road graph, route cache
+        or OSRM, falling back to calculate_distance.
+        """
+        from models import routing
+        return routing.driving_distance(pickup_coords, destination_coords)
+
+    # ---------------------------------------------------
+    # Helper: Many distances at once (repricing / analytics)
+    # ---------------------------------------------------
+    @staticmethod
+    def calculate_distances(pickups, destinations, method="ellipsoidal"):
+        """
+        pickups, destinations: NumPy arrays (or sequences) of (lat, lng)
+        pairs, shape (N, 2); a single (lat, lng) broadcasts against the other.
+        method: "ellipsoidal" (WGS-84, within 1 m of calculate_distance) or
+                "haversine" (spherical, faster, ~0.5% error).
+        Returns a NumPy array of distances in kilometers.
+        """
+        if method == "haversine":
+            return geo.haversine_km(pickups, destinations)
+        if method != "ellipsoidal":
+            raise ValueError(f"Unknown distance method: {method}")
+
+        distances, converged = geo.vincenty_km(pickups, destinations)
+        if not converged.all():
+            # Nearly antipodal pairs: fall back to geopy one by one
+            pickups, destinations = np.broadcast_arrays(
+                np.asarray(pickups, dtype=float), np.asarray(destinations, dtype=float)
+            )
+            for index in zip(*np.nonzero(~converged)):
+                distances[index] = geodesic(tuple(pickups[index]), tuple(destinations[index])).km
+        return distances
+
     # ---------------------------------------------------
     # Helper: Cost Calculation (Local Vehicle rates - Nepal)
     # ---------------------------------------------------
     @staticmethod
     def calculate_cost(distance_km, duration_hours, tip_amount):
-        # Local vehicle rates (Tempo/Microbus style - Nepal)
-        base_fare = 25.0           # NPR 25 base fare
-        rate_per_meter = 0.05      # NPR 0.10 per meter (Rs 50 per km)
-        waiting_cost_per_hour = 200.0  # NPR 200 per hour for waiting/staying
+        """Rates come from the active tariff (models/tariff.py)."""
+        return get_tariff().calculate_cost(distance_km, duration_hours, tip_amount)
 
-        # Convert distance from km to meters
-        distance_meters = distance_km * 1000.0
-        
-        # Calculate costs
-        distance_cost = distance_meters * rate_per_meter
-        waiting_cost = duration_hours * waiting_cost_per_hour
-        base_cost = base_fare + distance_cost
-        total_cost = base_fare + distance_cost + waiting_cost + tip_amount
-
-        return base_cost, total_cost
+    # ---------------------------------------------------
+    # Helper: Cost Calculation for many rides (re-quotes / audits)
+    # ---------------------------------------------------
+    @staticmethod
+    def calculate_costs(distances_km, durations_hours, tips=0.0):
+        """NumPy arrays in, (base_costs, total_costs) arrays out."""
+        return get_tariff().calculate_costs(distances_km, durations_hours, tips)
 
     # ---------------------------------------------------
     # Create a new ride request
@@ -64,46 +110,79 @@ class Ride:
 
         return True
 
+    # ---------------------------------------------------
+    # Create many ride requests at once (bulk booking / imports)
+    # ---------------------------------------------------
+    @staticmethod
+    def create_rides(rides):
+        """
+        rides: iterable of tuples in create_ride argument order
+        (customer_email, pickup_location, destination, pickup_datetime,
+         duration_hours, distance_km, base_cost, tip_amount, total_cost)
+        Returns the number of rides inserted, all under a single commit.
+        """
+        return db.execute_many("""
+            INSERT INTO rides (
+                customer_email, pickup_location, destination, pickup_datetime,
+                duration_hours, distance_km, base_cost, tip_amount, total_cost, status
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'pending')
+        """, rides)
+
     # ---------------------------------------------------
     # Get all pending rides (for drivers)
     # ---------------------------------------------------
     @staticmethod
-    def get_pending_rides():
-        rows = db.fetch("""
+    def get_pending_rides(limit=None, after=None):
+        """
+        Pending rides, soonest pickup first. For one page pass `limit` and
+        `after` = (pickup_datetime, id) of the last ride already shown.
+        """
+        query, params = keyset_page("""
             SELECT rides.*, users.phone_number AS customer_phone
             FROM rides
             LEFT JOIN users ON users.email = rides.customer_email
             WHERE rides.status = 'pending'
-        """)
-        return [dict(row) for row in rows]
+        """, key=("rides.pickup_datetime", "rides.id"), after=after, limit=limit)
+        return [dict(row) for row in db.fetch(query, params)]
 
     # ---------------------------------------------------
     # Accept a ride (driver)
     # ---------------------------------------------------
     @staticmethod
     def accept_ride(ride_id, driver_email):
-        """Driver accepts a ride with overlap checking"""
-        # Get ride details first
-        ride = db.fetch("SELECT pickup_datetime, duration_hours, status FROM rides WHERE id = ?", (ride_id,))
-        if not ride:
-            return False, "Ride not found"
-        
-        ride_data = dict(ride[0])
-        
-        if ride_data["status"] != "pending":
-            return False, "Ride is no longer available"
-        
-        # Check for overlaps before accepting
-        if Ride.check_overlap(driver_email, ride_data["pickup_datetime"], 
-                              ride_data["duration_hours"], exclude_ride_id=ride_id):
-            return False, "You have overlapping bookings. Cannot accept this ride."
-        
-        # Accept ride
-        db.execute("""
-            UPDATE rides 
-            SET status = 'accepted', driver_email = ? 
-            WHERE id = ? AND status = 'pending'
-        """, (driver_email, ride_id))
+        """
+        Driver accepts a ride with overlap checking.
+
+        The status check, overlap check and update run in one BEGIN IMMEDIATE
+        transaction, and the update is guarded on status = 'pending', so when
+        two drivers race only one of them is told the ride is theirs.
+        """
+        with db.transaction():
+            # Get ride details first
+            ride = db.fetch("SELECT pickup_datetime, duration_hours, status FROM rides WHERE id = ?", (ride_id,))
+            if not ride:
+                return False, "Ride not found"
+            
+            ride_data = dict(ride[0])
+            
+            if ride_data["status"] != "pending":
+                return False, "Ride is no longer available"
+            
+            # Check for overlaps before accepting
+            if Ride.check_overlap(driver_email, ride_data["pickup_datetime"], 
+                                  ride_data["duration_hours"], exclude_ride_id=ride_id):
+                return False, "You have overlapping bookings. Cannot accept this ride."
+            
+            # Accept ride
+            accepted = db.execute_rowcount("""
+                UPDATE rides 
+                SET status = 'accepted', driver_email = ? 
+                WHERE id = ? AND status = 'pending'
+            """, (driver_email, ride_id))
+            if not accepted:
+                return False, "Ride is no longer available"
+
         return True, "Ride accepted successfully"
 
     # ---------------------------------------------------
@@ -122,30 +201,71 @@ class Ride:
     # Get rides by customer
     # ---------------------------------------------------
     @staticmethod
-    def get_customer_rides(customer_email):
-        rows = db.fetch("SELECT * FROM rides WHERE customer_email = ?", (customer_email,))
-        return [dict(row) for row in rows]
+    def get_customer_rides(customer_email, limit=None, after_id=None):
+        query, params = keyset_page("SELECT * FROM rides WHERE customer_email = ?", (customer_email,),
+                                    after=after_id, limit=limit)
+        return [dict(row) for row in db.fetch(query, params)]
 
     # ---------------------------------------------------
     # Get rides by driver
     # ---------------------------------------------------
     @staticmethod
-    def get_driver_rides(driver_email):
-        rows = db.fetch("""
+    def get_driver_rides(driver_email, limit=None, after_id=None):
+        query, params = keyset_page("""
             SELECT rides.*, users.phone_number AS customer_phone
             FROM rides
             LEFT JOIN users ON users.email = rides.customer_email
             WHERE rides.driver_email = ?
-        """, (driver_email,))
-        return [dict(row) for row in rows]
+        """, (driver_email,), key="rides.id", after=after_id, limit=limit)
+        return [dict(row) for row in db.fetch(query, params)]
 
     # ---------------------------------------------------
     # Get all rides (for Admin)
     # ---------------------------------------------------
     @staticmethod
     def get_all_rides():
-        rows = db.fetch("SELECT * FROM rides")
-        return [dict(row) for row in rows]
+        return list(Ride.iter_all_rides())
+
+    # ---------------------------------------------------
+    # Stream all rides without loading the table into memory
+    # ---------------------------------------------------
+    @staticmethod
+    def iter_all_rides(chunk_size=1000):
+        for row in db.iter_fetch("SELECT * FROM rides", chunk_size=chunk_size):
+            yield dict(row)
+
+    # ---------------------------------------------------
+    # Change tracking (incremental table refreshes)
+    # ---------------------------------------------------
+    @staticmethod
+    def change_marker():
+        """Current change sequence number; pass it to get_changes later."""
+        return db.fetch("SELECT seq FROM change_counter WHERE id = 1")[0]["seq"]
+
+    @staticmethod
+    def get_changes(since_seq):
+        """
+        Rides written after `since_seq`, as (marker, rides, removed_ids).
+
+        `rides` are inserted or updated rides (with customer_phone) and
+        `removed_ids` the ids of deleted ones. Pass `marker` to the next
+        call; anything changed after the marker was read comes back then.
+        """
+        marker = Ride.change_marker()
+        if marker <= since_seq:
+            return marker, [], []
+        rows = db.fetch("""
+            SELECT rides.*, users.phone_number AS customer_phone
+            FROM rides
+            LEFT JOIN users ON users.email = rides.customer_email
+            WHERE rides.change_seq > ? AND rides.change_seq <= ?
+            ORDER BY rides.change_seq
+        """, (since_seq, marker))
+        removed = db.fetch(
+            "SELECT ride_id FROM ride_tombstones WHERE change_seq > ? AND change_seq <= ?",
+            (since_seq, marker)
+        )
+        return marker, [dict(row) for row in rows], [row["ride_id"] for row in removed]
 
     # ---------------------------------------------------
     # Cancel a ride (customer)
@@ -205,6 +325,22 @@ class Ride:
         db.execute(query, tuple(params))
         return True, "Ride updated successfully"
 
+    # ---------------------------------------------------
+    # Helper: pickup time as stored in rides.pickup_start
+    # ---------------------------------------------------
+    @staticmethod
+    def to_epoch(pickup_datetime):
+        """
+        "YYYY-MM-DD HH:MM" wall-clock text -> seconds since 1970-01-01,
+        with no timezone conversion (same as the database triggers)
+        """
+        return calendar.timegm(datetime.strptime(pickup_datetime, "%Y-%m-%d %H:%M").timetuple())
+
+    @staticmethod
+    def duration_seconds(duration_hours):
+        # Same rounding as SQLite's ROUND() in the pickup_end trigger
+        return int(math.floor((duration_hours or 0) * 3600 + 0.5))
+
     # ---------------------------------------------------
     # Check for overlapping bookings (for admin)
     # ---------------------------------------------------
@@ -213,9 +349,45 @@ class Ride:
         """
         Check if driver has overlapping bookings
         Returns True if overlap exists, False otherwise
+
+        One indexed range query on (driver_email, status, pickup_end). A ride
+        overlapping [start, end) ends after start and, being no longer than
+        the longest stored ride (one seek on idx_rides_length), before
+        end + that length, so the range is closed on both sides and the cost
+        does not grow with the driver's history or future schedule.
+        """
+        try:
+            start = Ride.to_epoch(pickup_datetime)
+            end = start + Ride.duration_seconds(duration_hours)
+        except (TypeError, ValueError):
+            return False  # If parsing fails, allow assignment
+
+        query = """
+            SELECT 1
+            FROM rides 
+            WHERE driver_email = ? 
+            AND status IN ('pending', 'accepted')
+            AND pickup_end > ?
+            AND pickup_end < ? + (SELECT COALESCE(MAX(pickup_end - pickup_start), 0) FROM rides)
+            AND pickup_start < ?
+        """
+        params = [driver_email, start, end, end]
+
+        if exclude_ride_id:
+            query += " AND id != ?"
+            params.append(exclude_ride_id)
+
+        return bool(db.fetch(query + " LIMIT 1", tuple(params)))
+
+    # ---------------------------------------------------
+    # Reference overlap check (kept for equivalence tests)
+    # ---------------------------------------------------
+    @staticmethod
+    def check_overlap_reference(driver_email, pickup_datetime, duration_hours, exclude_ride_id=None):
+        """
+        Original implementation: load the driver's open rides and compare
+        the intervals in Python. Slow on long schedules; do not use in app code.
         """
-        from datetime import datetime, timedelta
-        
         try:
             # Parse the pickup datetime
             pickup_dt = datetime.strptime(pickup_datetime, "%Y-%m-%d %H:%M")
@@ -254,23 +426,43 @@ class Ride:
     # ---------------------------------------------------
     @staticmethod
     def assign_driver(ride_id, driver_email):
-        """Admin assigns driver to a ride with overlap checking"""
-        # Get ride details
-        ride = db.fetch("SELECT pickup_datetime, duration_hours, status FROM rides WHERE id = ?", (ride_id,))
-        if not ride:
-            return False, "Ride not found"
-        
-        ride_data = dict(ride[0])
-        
-        if ride_data["status"] != "pending":
-            return False, "Can only assign driver to pending rides"
-        
-        # Check for overlaps
-        if Ride.check_overlap(driver_email, ride_data["pickup_datetime"], 
-                              ride_data["duration_hours"], exclude_ride_id=ride_id):
-            return False, "Driver has overlapping bookings. Cannot assign."
-        
-        # Assign driver
-        db.execute("UPDATE rides SET driver_email = ?, status = 'accepted' WHERE id = ?", 
-                  (driver_email, ride_id))
+        """Admin assigns driver to a ride with overlap checking, atomically"""
+        with db.transaction():
+            # Get ride details
+            ride = db.fetch("SELECT pickup_datetime, duration_hours, status FROM rides WHERE id = ?", (ride_id,))
+            if not ride:
+                return False, "Ride not found"
+            
+            ride_data = dict(ride[0])
+            
+            if ride_data["status"] != "pending":
+                return False, "Can only assign driver to pending rides"
+            
+            # Check for overlaps
+            if Ride.check_overlap(driver_email, ride_data["pickup_datetime"], 
+                                  ride_data["duration_hours"], exclude_ride_id=ride_id):
+                return False, "Driver has overlapping bookings. Cannot assign."
+            
+            # Assign driver
+            assigned = db.execute_rowcount("""
+                UPDATE rides SET driver_email = ?, status = 'accepted'
+                WHERE id = ? AND status = 'pending'
+            """, (driver_email, ride_id))
+            if not assigned:
+                return False, "Can only assign driver to pending rides"
+
         return True, "Driver assigned successfully"
+
+    # ---------------------------------------------------
+    # Assign drivers to many rides at once (admin)
+    # ---------------------------------------------------
+    @staticmethod
+    def assign_drivers(assignments):
+        """
+        assignments: iterable of (ride_id, driver_email) pairs
+        Returns a list of (success, message) in input order. Overlap checks
+        see earlier assignments from the same batch; everything commits once.
+        """
+        with db.transaction():
+            return [Ride.assign_driver(ride_id, driver_email)
+                    for ride_id, driver_email in assignments]
@@ -0,0 +1,274 @@
+"""
+Offline driving distances over a road graph of the service area.
+
+The graph is a JSON file at ROAD_GRAPH_PATH:
+
+    {"nodes": [[lat, lng], ...],
+     "edges": [[from_index, to_index, length_km, oneway], ...]}
+
+`oneway` is optional and defaults to false. Edge lengths must be at least
+the straight-line distance between their ends (true for real roads), which
+keeps the A* heuristic exact. Build the file from an OpenStreetMap extract
+with:
+
+    python -m models.road_network export.osm maps/road_network.json
+"""
+import heapq
+import json
+import math
+import os
+import sys
+import xml.etree.ElementTree as ET
+from collections import defaultdict
+
+import numpy as np
+
+from models.geo import EARTH_RADIUS_KM
+
+ROAD_GRAPH_PATH = os.environ.get("RIDE_CHECKER_ROAD_GRAPH") or os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "maps", "road_network.json"
+)
+
+# OSM highway types a car can drive on
+DRIVABLE_HIGHWAYS = {
+    "motorway", "motorway_link", "trunk", "trunk_link", "primary", "primary_link",
+    "secondary", "secondary_link", "tertiary", "tertiary_link", "unclassified",
+    "residential", "living_street", "service", "road",
+}
+
+# Snapping grid cell size in degrees (~1 km at Kathmandu's latitude)
+GRID_CELL_DEG = 0.01
+
+
+def haversine(lat1, lng1, lat2, lng2):
+    """Great-circle distance in km between two points (scalar version of geo.haversine_km)."""
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+
+
+class RoadNetwork:
+    def __init__(self, nodes, edges, max_snap_km=0.5):
+        """
+        nodes: list of (lat, lng)
+        edges: iterable of (from_index, to_index, length_km[, oneway])
+        max_snap_km: points further than this from any road are outside
+                     the service area and get no distance.
+        """
+        self.lats = [float(lat) for lat, _ in nodes]
+        self.lngs = [float(lng) for _, lng in nodes]
+        self.max_snap_km = max_snap_km
+
+        self.edges = []
+        self.adjacency = [[] for _ in nodes]
+        for edge in edges:
+            u, v, length = int(edge[0]), int(edge[1]), float(edge[2])
+            oneway = len(edge) > 3 and bool(edge[3])
+            self.edges.append((u, v, length, oneway))
+            self.adjacency[u].append((v, length))
+            if not oneway:
+                self.adjacency[v].append((u, length))
+
+        self.grid = defaultdict(list)
+        for index, (lat, lng) in enumerate(zip(self.lats, self.lngs)):
+            if self.adjacency[index]:
+                self.grid[self._cell(lat, lng)].append(index)
+
+    def __len__(self):
+        return len(self.lats)
+
+    # -----------------------------
+    # Loading and saving
+    # -----------------------------
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["nodes"], data["edges"], **kwargs)
+
+    @classmethod
+    def from_osm(cls, path, **kwargs):
+        """Build the graph from an OpenStreetMap XML extract."""
+        coords = {}
+        ways = []
+        for _, element in ET.iterparse(path):
+            if element.tag == "node":
+                coords[element.get("id")] = (float(element.get("lat")), float(element.get("lon")))
+                element.clear()
+            elif element.tag == "way":
+                tags = {tag.get("k"): tag.get("v") for tag in element.iter("tag")}
+                if tags.get("highway") in DRIVABLE_HIGHWAYS:
+                    refs = [nd.get("ref") for nd in element.iter("nd")]
+                    oneway = tags.get("oneway") in ("yes", "1", "true") or tags.get("junction") == "roundabout"
+                    if tags.get("oneway") == "-1":
+                        refs, oneway = refs[::-1], True
+                    ways.append((refs, oneway))
+                element.clear()
+
+        index_of = {}
+        nodes = []
+        edges = []
+        for refs, oneway in ways:
+            refs = [ref for ref in refs if ref in coords]
+            for ref in refs:
+                if ref not in index_of:
+                    index_of[ref] = len(nodes)
+                    nodes.append(coords[ref])
+            for a, b in zip(refs, refs[1:]):
+                u, v = index_of[a], index_of[b]
+                edges.append((u, v, haversine(*nodes[u], *nodes[v]), oneway))
+        return cls(nodes, edges, **kwargs)
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"nodes": [[lat, lng] for lat, lng in zip(self.lats, self.lngs)],
+                       "edges": [[u, v, round(length, 6), oneway] for u, v, length, oneway in self.edges]}, f)
+
+    # -----------------------------
+    # Snap a point to the nearest road node
+    # -----------------------------
+    def _cell(self, lat, lng):
+        return int(math.floor(lat / GRID_CELL_DEG)), int(math.floor(lng / GRID_CELL_DEG))
+
+    def nearest_node(self, lat, lng):
+        """Returns (node_index, distance_km), or (None, None) if no road is within max_snap_km."""
+        row, col = self._cell(lat, lng)
+        # Smallest width of a cell in km (the east-west side, shrunk by latitude)
+        cell_km = GRID_CELL_DEG * 110.0 * max(math.cos(math.radians(lat)), 0.01)
+
+        best, best_km = None, None
+        ring = 0
+        while True:
+            for r in range(row - ring, row + ring + 1):
+                for c in range(col - ring, col + ring + 1):
+                    if max(abs(r - row), abs(c - col)) != ring:
+                        continue
+                    for index in self.grid.get((r, c), ()):
+                        km = haversine(lat, lng, self.lats[index], self.lngs[index])
+                        if best_km is None or km < best_km:
+                            best, best_km = index, km
+            # Nodes beyond this ring are at least ring * cell_km away
+            reach = ring * cell_km
+            if (best_km is not None and best_km <= reach) or reach > self.max_snap_km:
+                break
+            ring += 1
+
+        if best is None or best_km > self.max_snap_km:
+            return None, None
+        return best, best_km
+
+    # -----------------------------
+    # A* shortest path between two nodes
+    # -----------------------------
+    def shortest_path_km(self, source, target):
+        """Length of the shortest drivable path in km, or None if unreachable."""
+        if source == target:
+            return 0.0
+
+        target_lat, target_lng = self.lats[target], self.lngs[target]
+        best = {source: 0.0}
+        heap = [(haversine(self.lats[source], self.lngs[source], target_lat, target_lng), 0.0, source)]
+        while heap:
+            _, dist, node = heapq.heappop(heap)
+            if node == target:
+                return dist
+            if dist > best[node]:
+                continue
+            for neighbour, length in self.adjacency[node]:
+                candidate = dist + length
+                if candidate < best.get(neighbour, math.inf):
+                    best[neighbour] = candidate
+                    estimate = candidate + haversine(self.lats[neighbour], self.lngs[neighbour], target_lat, target_lng)
+                    heapq.heappush(heap, (estimate, candidate, neighbour))
+        return None
+
+    # -----------------------------
+    # Dijkstra from one node to many
+    # -----------------------------
+    def distances_from(self, source, targets):
+        """{target: km} for every reachable node in `targets`; stops once all are settled."""
+        remaining = set(targets)
+        settled = {}
+        best = {source: 0.0}
+        heap = [(0.0, source)]
+        while heap and remaining:
+            dist, node = heapq.heappop(heap)
+            if node in settled:
+                continue
+            settled[node] = dist
+            remaining.discard(node)
+            for neighbour, length in self.adjacency[node]:
+                candidate = dist + length
+                if candidate < best.get(neighbour, math.inf):
+                    best[neighbour] = candidate
+                    heapq.heappush(heap, (candidate, neighbour))
+        return {target: settled[target] for target in targets if target in settled}
+
+    # -----------------------------
+    # Driving distance between two (lat, lng) points
+    # -----------------------------
+    def driving_distance(self, pickup_coords, dest_coords):
+        """Road distance in km including the walk to and from the road, or None."""
+        source, source_km = self.nearest_node(*pickup_coords)
+        target, target_km = self.nearest_node(*dest_coords)
+        if source is None or target is None:
+            return None
+
+        path_km = self.shortest_path_km(source, target)
+        if path_km is None:
+            return None
+        return source_km + path_km + target_km
+
+    # -----------------------------
+    # Many-to-many driving distances
+    # -----------------------------
+    def distance_matrix(self, origins, destinations):
+        """
+        origins: (N, 2), destinations: (M, 2) arrays of (lat, lng).
+        Returns an (N, M) array in km; NaN where a point is off the graph
+        or no route exists. One Dijkstra search per origin.
+        """
+        matrix = np.full((len(origins), len(destinations)), np.nan)
+        snapped = [self.nearest_node(lat, lng) for lat, lng in destinations]
+        targets = {node for node, _ in snapped if node is not None}
+
+        for i, (lat, lng) in enumerate(origins):
+            source, source_km = self.nearest_node(lat, lng)
+            if source is None:
+                continue
+            reached = self.distances_from(source, targets)
+            for j, (target, target_km) in enumerate(snapped):
+                if target in reached:
+                    matrix[i, j] = source_km + reached[target] + target_km
+        return matrix
+
+
+_road_network = None
+_road_network_loaded = False
+
+
+def get_road_network():
+    """The service-area road graph, loaded on first use; None if no graph file exists."""
+    global _road_network, _road_network_loaded
+    if not _road_network_loaded:
+        _road_network_loaded = True
+        if os.path.exists(ROAD_GRAPH_PATH):
+            _road_network = RoadNetwork.from_file(ROAD_GRAPH_PATH)
+    return _road_network
+
+
+def set_road_network(network):
+    """Swap the road graph; pass None to reload from ROAD_GRAPH_PATH on next use."""
+    global _road_network, _road_network_loaded
+    _road_network = network
+    _road_network_loaded = network is not None
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python -m models.road_network <export.osm> <road_network.json>")
+        sys.exit(1)
+    network = RoadNetwork.from_osm(sys.argv[1])
+    network.save(sys.argv[2])
+    print(f"Saved {len(network)} nodes to {sys.argv[2]}")
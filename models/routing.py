@@ -0,0 +1,268 @@
+"""
+Driving distance between two (lat, lng) points.
+
+Lookups go to the offline road graph first (models/road_network.py), then
+to the route cache, then to the OSRM routing service. If none can answer,
+the straight-line geodesic distance is used; that fallback is not cached,
+so the next quote tries the road route again. Until a road graph is
+installed that fallback is common, so driving_route() and background
+quotes return a RouteDistance that says whether the distance is
+approximate; driving_distance() returns the km alone.
+
+OSRM calls go through one RoutingClient: a pooled keep-alive session, a
+bounded worker pool for background quotes and a circuit breaker that
+stops calling a backend that keeps failing.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from database.route_cache import RouteCache
+from models.ride import Ride
+from models.road_network import get_road_network
+
+# OSRM routing service (free, no API key required). Coordinates are lng,lat!
+OSRM_BASE_URL = os.environ.get("RIDE_CHECKER_OSRM_URL") or "http://router.project-osrm.org"
+OSRM_ROUTE_PATH = (
+    "/route/v1/driving/{pickup_lng},{pickup_lat};{dest_lng},{dest_lat}"
+    "?overview=false&alternatives=false"
+)
+
+# (connect, read) seconds; a dead backend fails fast instead of stalling quotes
+DEFAULT_TIMEOUT = (3.05, 5.0)
+
+
+class RouteDistance(NamedTuple):
+    """A driving distance and whether it is the straight-line fallback"""
+    km: float
+    approximate: bool
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures; while open, calls
+    are refused until `reset_timeout` seconds pass, then one trial call is
+    let through (half-open) and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_timeout or self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+
+
+class RouteRequest:
+    """
+    Handle for a background quote; cancel() drops its result. A quote still
+    waiting in the pool never runs, but one already talking to OSRM keeps its
+    worker until the response or the read timeout, as requests cannot abort
+    a call in flight. RoutingClient sizes its pool for that.
+    """
+
+    def __init__(self):
+        self.future = None
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def result(self, timeout=None):
+        return self.future.result(timeout)
+
+
+class RoutingClient:
+    # Workers for background quotes. A superseded quote can hold a worker for
+    # up to the read timeout (see RouteRequest), so there is room for a few of
+    # those plus the current one; after failure_threshold failures the
+    # breaker makes further calls return at once anyway.
+    def __init__(self, base_url=None, timeout=DEFAULT_TIMEOUT, max_workers=4,
+                 pool_size=4, breaker=None):
+        self.base_url = (base_url or OSRM_BASE_URL).rstrip("/")
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="routing")
+
+    # -----------------------------
+    # OSRM road distance (None if the service can't answer)
+    # -----------------------------
+    def fetch_distance(self, pickup_coords, dest_coords, timeout=None):
+        if not self.breaker.allow():
+            return None
+
+        url = self.base_url + OSRM_ROUTE_PATH.format(
+            pickup_lng=pickup_coords[1], pickup_lat=pickup_coords[0],
+            dest_lng=dest_coords[1], dest_lat=dest_coords[0],
+        )
+        try:
+            response = self.session.get(url, timeout=timeout or self.timeout)
+            if response.status_code == 200:
+                data = response.json()
+                if data.get('code') == 'Ok' and len(data.get('routes', [])) > 0:
+                    # Distance is in meters, convert to kilometers
+                    distance = float(data['routes'][0]['distance']) / 1000.0
+                else:
+                    # The backend is up, it just has no route for this pair
+                    distance = None
+                self.breaker.record_success()
+                return distance
+        # A 200 with an unexpected body (no distance, not a JSON object, ...)
+        # counts as a failure too, so quotes still fall back to the straight line
+        except (requests.RequestException, ValueError, KeyError, IndexError, TypeError, AttributeError):
+            pass
+        self.breaker.record_failure()
+        return None
+
+    # -----------------------------
+    # Quote in the worker pool
+    # -----------------------------
+    def submit(self, pickup_coords, dest_coords, callback=None):
+        """
+        Runs route() through this client in the background and returns a
+        RouteRequest. callback(distance) gets the RouteDistance from a
+        worker thread unless the request was cancelled first.
+        """
+        request = RouteRequest()
+
+        def run():
+            if request.cancelled:
+                return None
+            distance = route(pickup_coords, dest_coords, fetch=self.fetch_distance)
+            if callback is not None and not request.cancelled:
+                callback(distance)
+            return distance
+
+        request.future = self.executor.submit(run)
+        return request
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+
+
+_route_cache = None
+_route_cache_lock = threading.Lock()
+_routing_client = None
+_routing_client_lock = threading.Lock()
+
+
+def get_route_cache():
+    """The shared route cache, opened on first use."""
+    global _route_cache
+    with _route_cache_lock:
+        if _route_cache is None:
+            _route_cache = RouteCache()
+        return _route_cache
+
+
+def get_routing_client():
+    """The shared routing client, created on first use."""
+    global _routing_client
+    with _routing_client_lock:
+        if _routing_client is None:
+            _routing_client = RoutingClient()
+        return _routing_client
+
+
+def set_routing_client(client):
+    """Swap the routing client (e.g. a different backend); None recreates the default."""
+    global _routing_client
+    with _routing_client_lock:
+        _routing_client = client
+
+
+# ---------------------------------------------------
+# OSRM road distance (None if the service can't answer)
+# ---------------------------------------------------
+def fetch_osrm_distance(pickup_coords, dest_coords, timeout=None):
+    return get_routing_client().fetch_distance(pickup_coords, dest_coords, timeout)
+
+
+# ---------------------------------------------------
+# Road graph, then cache (never touches the network)
+# ---------------------------------------------------
+def offline_distance(pickup_coords, dest_coords):
+    network = get_road_network()
+    if network is not None:
+        distance = network.driving_distance(pickup_coords, dest_coords)
+        if distance is not None:
+            return distance
+    return get_route_cache().get(pickup_coords, dest_coords)
+
+
+# ---------------------------------------------------
+# Route a pair and cache the answer
+# ---------------------------------------------------
+def route(pickup_coords, dest_coords, timeout=None, fetch=None):
+    """RouteDistance from OSRM; fetch: OSRM lookup to use, by default the shared client's."""
+    distance = (fetch or fetch_osrm_distance)(pickup_coords, dest_coords, timeout)
+    if distance is None:
+        # Fallback to straight-line distance if routing fails
+        return RouteDistance(Ride.calculate_distance(pickup_coords, dest_coords), True)
+    get_route_cache().put(pickup_coords, dest_coords, distance)
+    return RouteDistance(distance, False)
+
+
+# ---------------------------------------------------
+# Driving distance: offline, then OSRM, then straight line
+# ---------------------------------------------------
+def driving_route(pickup_coords, dest_coords, timeout=None):
+    distance = offline_distance(pickup_coords, dest_coords)
+    if distance is not None:
+        return RouteDistance(distance, False)
+    return route(pickup_coords, dest_coords, timeout)
+
+
+def driving_distance(pickup_coords, dest_coords, timeout=None):
+    """Driving distance in km, without saying whether it is the fallback"""
+    return driving_route(pickup_coords, dest_coords, timeout).km
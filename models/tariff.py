@@ -0,0 +1,86 @@
+"""
+Fare tariff: the single source of the rates every price is computed from.
+
+The active tariff is loaded once and cached. Rates come from the JSON file
+at TARIFF_PATH when it exists, e.g.
+
+    {"base_fare": 25.0, "rate_per_meter": 0.05, "waiting_cost_per_hour": 200.0}
+
+and from the defaults below otherwise.
+"""
+import json
+import os
+
+import numpy as np
+
+TARIFF_PATH = os.environ.get("RIDE_CHECKER_TARIFF") or os.path.join(os.path.dirname(__file__), "tariff.json")
+
+
+class Tariff:
+    # Local vehicle rates (Tempo/Microbus style - Nepal)
+    def __init__(self, base_fare=25.0, rate_per_meter=0.05, waiting_cost_per_hour=200.0):
+        self.base_fare = float(base_fare)                          # NPR 25 base fare
+        self.rate_per_meter = float(rate_per_meter)                # NPR 0.05 per meter (Rs 50 per km)
+        self.waiting_cost_per_hour = float(waiting_cost_per_hour)  # NPR 200 per hour waiting/staying
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(**json.load(f))
+
+    # ---------------------------------------------------
+    # Itemized fare for one ride (used by the UI)
+    # ---------------------------------------------------
+    def breakdown(self, distance_km, duration_hours, tip_amount=0.0):
+        distance_cost = distance_km * 1000.0 * self.rate_per_meter
+        waiting_cost = duration_hours * self.waiting_cost_per_hour
+        return {
+            "base_fare": self.base_fare,
+            "distance_cost": distance_cost,
+            "waiting_cost": waiting_cost,
+            "tip_amount": tip_amount,
+            "base_cost": self.base_fare + distance_cost,
+            "total_cost": self.base_fare + distance_cost + waiting_cost + tip_amount,
+        }
+
+    # ---------------------------------------------------
+    # (base_cost, total_cost) for one ride
+    # ---------------------------------------------------
+    def calculate_cost(self, distance_km, duration_hours, tip_amount):
+        fare = self.breakdown(distance_km, duration_hours, tip_amount)
+        return fare["base_cost"], fare["total_cost"]
+
+    # ---------------------------------------------------
+    # (base_costs, total_costs) for many rides in one pass
+    # ---------------------------------------------------
+    def calculate_costs(self, distances_km, durations_hours, tips=0.0):
+        """Inputs are NumPy arrays (or scalars) that broadcast together."""
+        distances_km = np.asarray(distances_km, dtype=float)
+        durations_hours = np.asarray(durations_hours, dtype=float)
+        tips = np.asarray(tips, dtype=float)
+
+        distance_cost = distances_km * 1000.0 * self.rate_per_meter
+        waiting_cost = durations_hours * self.waiting_cost_per_hour
+        base_costs = self.base_fare + distance_cost
+        total_costs = self.base_fare + distance_cost + waiting_cost + tips
+        return np.broadcast_arrays(base_costs, total_costs)
+
+
+_active_tariff = None
+
+
+def get_tariff():
+    """The active tariff, loaded on first use and cached."""
+    global _active_tariff
+    if _active_tariff is None:
+        if os.path.exists(TARIFF_PATH):
+            _active_tariff = Tariff.from_file(TARIFF_PATH)
+        else:
+            _active_tariff = Tariff()
+    return _active_tariff
+
+
+def set_tariff(tariff):
+    """Swap the active tariff; pass None to reload from TARIFF_PATH on next use."""
+    global _active_tariff
+    _active_tariff = tariff
@@ -1,5 +1,5 @@
 import hashlib
-from database.db import db
+from database.db import db, keyset_page
 
 
 class User:
@@ -66,9 +66,10 @@ class User:
     # Get All Users (Admin)
     # -----------------------------
     @staticmethod
-    def get_all_users():
-        rows = db.fetch("SELECT email, username, role, name, address, phone_number FROM users")
-        return [dict(row) for row in rows]
+    def get_all_users(limit=None, after_email=None):
+        query, params = keyset_page("SELECT email, username, role, name, address, phone_number FROM users",
+                                    key="email", after=after_email, limit=limit)
+        return [dict(row) for row in db.fetch(query, params)]
 
     # -----------------------------
     # Delete User (Admin)
@@ -41,7 +41,7 @@ def temp_db():
     yield test_db
     
     # Cleanup
-    test_db.conn.close()
+    test_db.close()
     if os.path.exists(temp_db_path):
         os.remove(temp_db_path)
     if os.path.exists(temp_dir):
@@ -2,6 +2,7 @@
 Tests for Admin model functionality
 """
 import pytest
+from datetime import date, datetime
 from models.admin import Admin
 
 
@@ -222,3 +223,129 @@ class TestAdmin:
         # Calculate expected new average: (2.0 + 1.5 + 3.0 + 4.0) / 4 = 2.625
         expected_new_avg = (2.0 + 1.5 + 3.0 + 4.0) / 4
         assert abs(new_avg_duration - expected_new_avg) < 0.001
+
+    def test_analytics_snapshot(self, temp_db, sample_users, sample_rides):
+        """Test that the snapshot reports the same figures as the single metrics"""
+        snapshot = Admin.analytics_snapshot()
+
+        assert snapshot.total_rides == Admin.total_rides()
+        assert abs(snapshot.total_revenue - Admin.total_revenue()) < 0.01
+        assert abs(snapshot.average_duration - Admin.average_duration()) < 0.001
+        # The three sample rides tie at one pickup each; the earliest hour wins
+        hours = [ride["pickup_datetime"][11:13] for ride in Admin.get_rides()]
+        assert snapshot.busiest_hour == min(hours)
+
+    def test_analytics_snapshot_empty(self, temp_db, sample_users):
+        """Test the snapshot with no rides"""
+        snapshot = Admin.analytics_snapshot()
+
+        assert snapshot == (0, 0, 0, None)
+
+    def test_analytics_snapshot_excludes_cancelled_revenue(self, temp_db, sample_users, sample_rides):
+        """Test that cancelled rides count as rides but not as revenue"""
+        from models.ride import Ride
+
+        before = Admin.analytics_snapshot()
+        Ride.cancel_ride(sample_rides[0], "customer@test.com")
+        after = Admin.analytics_snapshot()
+
+        assert after.total_rides == before.total_rides
+        assert after.total_revenue < before.total_revenue
+        assert abs(after.total_revenue - Admin.total_revenue()) < 0.01
+
+    def test_analytics_snapshot_busiest_hour(self, temp_db, sample_users):
+        """Test that pickups are folded into hours of the day across dates"""
+        from models.ride import Ride
+
+        for pickup in ("2024-01-01 09:00", "2024-01-02 14:00", "2024-01-03 14:30", "2024-01-04 09:45",
+                       "2024-01-05 14:05"):
+            Ride.create_ride("customer@test.com", "A", "B", pickup, 1.0, 5.0, 275.0, 0.0, 475.0)
+
+        assert Admin.analytics_snapshot().busiest_hour == "14"
+
+    def create_rides(self, pickups, total_cost=475.0):
+        """Create one pending ride per pickup time and return their ids"""
+        from models.ride import Ride
+
+        for pickup in pickups:
+            Ride.create_ride("customer@test.com", "A", "B", pickup, 1.0, 5.0, 275.0, 0.0, total_cost)
+        rows = Admin.get_rides()
+        return [ride["id"] for ride in rows[-len(pickups):]]
+
+    def test_timeseries_by_day(self, temp_db, sample_users):
+        """Test daily ride counts with empty days filled in"""
+        self.create_rides(["2024-01-01 09:00", "2024-01-01 17:30", "2024-01-03 08:00", "2024-01-05 10:00"])
+
+        points = Admin.timeseries("rides", "2024-01-01", "2024-01-05")
+
+        assert [point.start for point in points] == [datetime(2024, 1, day) for day in range(1, 5)]
+        assert [point.value for point in points] == [2, 0, 1, 0]
+
+    def test_timeseries_by_hour(self, temp_db, sample_users):
+        """Test hourly revenue over a partial range"""
+        self.create_rides(["2024-01-01 09:00", "2024-01-01 09:45", "2024-01-01 11:10"])
+
+        points = Admin.timeseries("revenue", datetime(2024, 1, 1, 9, 30), datetime(2024, 1, 1, 12, 0), "hour")
+
+        # The start is floored to its bucket
+        assert [point.start.hour for point in points] == [9, 10, 11]
+        assert [point.value for point in points] == [950.0, 0, 475.0]
+
+    def test_timeseries_by_week(self, temp_db, sample_users):
+        """Test that weeks start on Monday and sum their days"""
+        # 2024-01-01 is a Monday
+        self.create_rides(["2024-01-01 09:00", "2024-01-07 23:00", "2024-01-08 00:30"])
+
+        points = Admin.timeseries("rides", date(2024, 1, 3), date(2024, 1, 15), "week")
+
+        assert [point.start for point in points] == [datetime(2024, 1, 1), datetime(2024, 1, 8)]
+        assert [point.value for point in points] == [2, 1]
+
+    def test_timeseries_edges_are_whole_buckets(self, temp_db, sample_users):
+        """Test that the first and last buckets count all their pickups"""
+        self.create_rides(["2024-01-01 09:10", "2024-01-01 11:40", "2024-01-04 12:00", "2024-01-07 20:00"])
+
+        hours = Admin.timeseries("rides", "2024-01-01 09:30", "2024-01-01 11:15", "hour")
+        weeks = Admin.timeseries("rides", "2024-01-01", "2024-01-03", "week")
+
+        assert [(point.start.hour, point.value) for point in hours] == [(9, 1), (10, 0), (11, 1)]
+        assert [(point.start, point.value) for point in weeks] == [(datetime(2024, 1, 1), 4)]
+        assert Admin.timeseries("rides", "2024-01-02", "2024-01-02") == []
+
+    def test_timeseries_cancellations_and_average_fare(self, temp_db, sample_users):
+        """Test that cancelled rides count as cancellations, not fares"""
+        from models.ride import Ride
+
+        self.create_rides(["2024-01-01 09:00"], total_cost=475.0)
+        self.create_rides(["2024-01-01 10:00"], total_cost=875.0)
+        ride_ids = self.create_rides(["2024-01-01 11:00"], total_cost=1000.0)
+        Ride.cancel_ride(ride_ids[0], "customer@test.com")
+
+        cancellations = Admin.timeseries("cancellations", "2024-01-01", "2024-01-02")
+        average_fare = Admin.timeseries("average_fare", "2024-01-01", "2024-01-03")
+
+        assert [point.value for point in cancellations] == [1]
+        assert [point.value for point in average_fare] == [675.0, 0]
+
+    def test_timeseries_rejects_unknown_names(self, temp_db):
+        """Test that unknown metrics and buckets are errors"""
+        with pytest.raises(ValueError):
+            Admin.timeseries("tips", "2024-01-01", "2024-01-02")
+        with pytest.raises(ValueError):
+            Admin.timeseries("rides", "2024-01-01", "2024-01-02", "month")
+
+    def test_iter_rides(self, temp_db, sample_users, sample_rides):
+        """Test streaming all rides as dictionaries"""
+        rides = list(Admin.iter_rides(chunk_size=2))
+
+        assert [ride["id"] for ride in rides] == sample_rides
+        assert all(isinstance(ride, dict) for ride in rides)
+
+    def test_get_rides_paged(self, temp_db, sample_users, sample_rides):
+        """Test reading rides one page at a time"""
+        first = Admin.get_rides(limit=2)
+        rest = Admin.get_rides(limit=2, after_id=first[-1]["id"])
+
+        assert [ride["id"] for ride in first] == sample_rides[:2]
+        assert [ride["id"] for ride in rest] == sample_rides[2:]
+        assert Admin.get_rides(limit=2, after_id=sample_rides[-1]) == []
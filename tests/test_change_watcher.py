@@ -0,0 +1,63 @@
+"""
+Tests for the data_version change watcher
+"""
+import sqlite3
+from database.change_watcher import DataVersionWatcher
+from database.db import Database
+from models.ride import Ride
+
+
+class TestDataVersionWatcher:
+    """Test cases for DataVersionWatcher"""
+
+    def test_reports_commits_once(self, tmp_path):
+        """Test that a commit elsewhere is reported on the next poll only"""
+        database_obj = Database(path=str(tmp_path / "watched.db"))
+        watcher = DataVersionWatcher(database_obj.path)
+        try:
+            assert not watcher.poll()
+
+            database_obj.execute(
+                "INSERT INTO users (email, username, password, role) VALUES ('a@test.com', 'a', 'x', 'customer')"
+            )
+
+            assert watcher.poll()
+            assert not watcher.poll()
+        finally:
+            watcher.close()
+            database_obj.close()
+
+    def test_reads_do_not_count(self, tmp_path):
+        """Test that queries alone never look like changes"""
+        database_obj = Database(path=str(tmp_path / "watched.db"))
+        watcher = DataVersionWatcher(database_obj.path)
+        try:
+            database_obj.fetch("SELECT * FROM rides")
+            assert not watcher.poll()
+        finally:
+            watcher.close()
+            database_obj.close()
+
+    def test_locked_database_is_no_news(self, tmp_path):
+        """Test that polling never waits on a writer"""
+        database_obj = Database(path=str(tmp_path / "watched.db"))
+        watcher = DataVersionWatcher(database_obj.path)
+        locker = sqlite3.connect(database_obj.path)
+        try:
+            locker.execute("BEGIN EXCLUSIVE")
+            assert not watcher.poll()
+        finally:
+            locker.rollback()
+            locker.close()
+            watcher.close()
+            database_obj.close()
+
+    def test_defaults_to_shared_database(self, temp_db, sample_users):
+        """Test watching the app database and picking up ride writes"""
+        watcher = DataVersionWatcher()
+        try:
+            assert watcher.path == temp_db.path
+            Ride.create_ride("customer@test.com", "A", "B", "2030-01-01 10:00", 1.0, 5.0, 275.0, 0.0, 475.0)
+            assert watcher.poll()
+        finally:
+            watcher.close()
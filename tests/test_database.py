@@ -7,7 +7,10 @@ import tempfile
 import os
 import shutil
 import importlib
-from database.db import Database
+import subprocess
+import threading
+import sys
+from database.db import Database, LazyDatabase
 
 
 class TestDatabase:
@@ -283,3 +286,306 @@ class TestDatabase:
         all_rides = temp_db.fetch("SELECT id FROM rides ORDER BY id")
         db_ids = [ride["id"] for ride in all_rides]
         assert db_ids == [1, 2, 3]
+
+
+class TestDatabaseWAL:
+    """Test cases for the opt-in WAL mode and read connection pool"""
+
+    @pytest.fixture
+    def wal_db(self, tmp_path):
+        database_obj = Database(path=str(tmp_path / "wal.db"), wal=True, read_pool_size=2)
+        yield database_obj
+        database_obj.close()
+
+    def test_default_mode_has_no_read_pool(self, temp_db):
+        """Test that WAL mode is opt-in"""
+        assert temp_db.wal is False
+        mode = temp_db.conn.execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode.lower() != "wal"
+
+    def test_wal_mode_enabled(self, wal_db):
+        """Test that WAL mode switches the journal and builds the pool"""
+        mode = wal_db.conn.execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode.lower() == "wal"
+        assert wal_db._readers.qsize() == 2
+
+    def test_readers_are_read_only(self, wal_db):
+        """Test that pooled connections refuse writes"""
+        with wal_db._reader() as conn:
+            with pytest.raises(sqlite3.OperationalError):
+                conn.execute(
+                    "INSERT INTO users (email, username, password, role) VALUES (?, ?, ?, ?)",
+                    ("ro@test.com", "ro", "hashedpassword", "customer")
+                )
+
+    def test_fetch_sees_committed_writes(self, wal_db):
+        """Test that readers see rows committed through execute"""
+        wal_db.execute(
+            "INSERT INTO users (email, username, password, role) VALUES (?, ?, ?, ?)",
+            ("wal@test.com", "wal", "hashedpassword", "customer")
+        )
+
+        results = wal_db.fetch("SELECT * FROM users WHERE email = ?", ("wal@test.com",))
+        assert len(results) == 1
+
+    def test_readers_do_not_wait_on_writer(self, wal_db):
+        """Test that a fetch succeeds while another connection holds the write lock"""
+        wal_db.execute(
+            "INSERT INTO users (email, username, password, role) VALUES (?, ?, ?, ?)",
+            ("first@test.com", "first", "hashedpassword", "customer")
+        )
+
+        writer = sqlite3.connect(wal_db.path, timeout=0)
+        try:
+            writer.execute("BEGIN IMMEDIATE")
+            writer.execute(
+                "INSERT INTO users (email, username, password, role) VALUES (?, ?, ?, ?)",
+                ("second@test.com", "second", "hashedpassword", "customer")
+            )
+
+            # The uncommitted row is invisible, and the read does not block
+            results = wal_db.fetch("SELECT email FROM users")
+            assert [row["email"] for row in results] == ["first@test.com"]
+        finally:
+            writer.rollback()
+            writer.close()
+
+    def test_pool_connections_are_returned(self, wal_db):
+        """Test that fetch hands its connection back to the pool"""
+        for _ in range(5):
+            wal_db.fetch("SELECT 1")
+
+        assert wal_db._readers.qsize() == 2
+
+
+class TestDatabaseTransactions:
+    """Test cases for transaction() and execute_many()"""
+
+    def insert_user(self, database_obj, email):
+        database_obj.execute(
+            "INSERT INTO users (email, username, password, role) VALUES (?, ?, ?, ?)",
+            (email, email.split("@")[0], "hashedpassword", "customer")
+        )
+
+    def test_transaction_commits_once(self, temp_db):
+        """Test that writes inside a transaction are committed together"""
+        with temp_db.transaction():
+            self.insert_user(temp_db, "a@test.com")
+            self.insert_user(temp_db, "b@test.com")
+            # Visible inside the transaction
+            assert len(temp_db.fetch("SELECT * FROM users")) == 2
+            assert temp_db.conn.in_transaction
+
+        assert not temp_db.conn.in_transaction
+        assert len(temp_db.fetch("SELECT * FROM users")) == 2
+
+    def test_transaction_rolls_back_on_error(self, temp_db):
+        """Test that an exception discards every write in the block"""
+        with pytest.raises(sqlite3.IntegrityError):
+            with temp_db.transaction():
+                self.insert_user(temp_db, "a@test.com")
+                self.insert_user(temp_db, "a@test.com")
+
+        assert temp_db.fetch("SELECT * FROM users") == []
+
+    def test_nested_transaction_joins_outer(self, temp_db):
+        """Test that inner blocks do not commit on their own"""
+        with pytest.raises(RuntimeError):
+            with temp_db.transaction():
+                with temp_db.transaction():
+                    self.insert_user(temp_db, "a@test.com")
+                assert temp_db.conn.in_transaction
+                raise RuntimeError("abort outer")
+
+        assert temp_db.fetch("SELECT * FROM users") == []
+
+    def test_execute_many(self, temp_db):
+        """Test inserting many rows in one call"""
+        rows = [(f"user{i}@test.com", f"user{i}", "hashedpassword", "customer") for i in range(500)]
+
+        count = temp_db.execute_many(
+            "INSERT INTO users (email, username, password, role) VALUES (?, ?, ?, ?)", rows
+        )
+
+        assert count == 500
+        assert temp_db.fetch("SELECT COUNT(*) AS n FROM users")[0]["n"] == 500
+
+    def test_execute_many_is_atomic(self, temp_db):
+        """Test that a failing row rolls back the whole batch"""
+        rows = [("dup@test.com", "dup", "hashedpassword", "customer")] * 2
+
+        with pytest.raises(sqlite3.IntegrityError):
+            temp_db.execute_many(
+                "INSERT INTO users (email, username, password, role) VALUES (?, ?, ?, ?)", rows
+            )
+
+        assert temp_db.fetch("SELECT * FROM users") == []
+
+    def test_wal_transaction_reads_own_writes(self, tmp_path):
+        """Test that fetch inside a transaction uses the write connection in WAL mode"""
+        database_obj = Database(path=str(tmp_path / "wal.db"), wal=True)
+        try:
+            with database_obj.transaction():
+                self.insert_user(database_obj, "a@test.com")
+                assert len(database_obj.fetch("SELECT * FROM users")) == 1
+        finally:
+            database_obj.close()
+
+
+class TestDatabaseStreaming:
+    """Test cases for iter_fetch()"""
+
+    def insert_users(self, database_obj, count):
+        database_obj.execute_many(
+            "INSERT INTO users (email, username, password, role) VALUES (?, ?, ?, ?)",
+            [(f"user{i:04d}@test.com", f"user{i}", "hashedpassword", "customer") for i in range(count)]
+        )
+
+    def test_iter_fetch_returns_all_rows(self, temp_db):
+        """Test that streaming yields the same rows as fetch"""
+        self.insert_users(temp_db, 25)
+
+        streamed = list(temp_db.iter_fetch("SELECT email FROM users ORDER BY email", chunk_size=4))
+        fetched = temp_db.fetch("SELECT email FROM users ORDER BY email")
+
+        assert [row["email"] for row in streamed] == [row["email"] for row in fetched]
+
+    def test_iter_fetch_is_lazy(self, temp_db):
+        """Test that rows are pulled in chunks with fetchmany, not all at once"""
+        self.insert_users(temp_db, 10)
+
+        stream = temp_db.iter_fetch("SELECT email FROM users", chunk_size=3)
+        first = next(stream)
+
+        assert first["email"].startswith("user")
+        stream.close()
+
+    def test_iter_fetch_empty(self, temp_db):
+        """Test streaming a query with no results"""
+        assert list(temp_db.iter_fetch("SELECT * FROM users")) == []
+
+    def test_iter_fetch_releases_pooled_reader(self, tmp_path):
+        """Test that closing a stream hands its reader back to the pool"""
+        database_obj = Database(path=str(tmp_path / "wal.db"), wal=True, read_pool_size=1)
+        try:
+            self.insert_users(database_obj, 10)
+
+            stream = database_obj.iter_fetch("SELECT email FROM users", chunk_size=2)
+            next(stream)
+            assert database_obj._readers.qsize() == 0
+
+            stream.close()
+            assert database_obj._readers.qsize() == 1
+            assert len(database_obj.fetch("SELECT * FROM users")) == 10
+        finally:
+            database_obj.close()
+
+
+class TestLazyDatabase:
+    """Test cases for the lazily opened shared database"""
+
+    def test_opens_on_first_use(self, tmp_path, monkeypatch):
+        """Test that the file is only created when the database is first used"""
+        db_path = tmp_path / "lazy.db"
+        monkeypatch.setattr(importlib.import_module("database.db"), "DB_PATH", str(db_path))
+        lazy = LazyDatabase()
+        assert not lazy.is_open
+        assert not db_path.exists()
+
+        try:
+            assert lazy.fetch("SELECT * FROM users") == []
+            assert lazy.is_open
+            assert db_path.exists()
+            assert lazy.get() is lazy.get()
+        finally:
+            lazy.close()
+
+    def test_login_imports_stay_light(self, tmp_path):
+        """Test that importing the login window's models opens nothing and loads no heavy packages"""
+        db_path = tmp_path / "startup.db"
+        script = (
+            "import sys, database.db, models.user, models.admin\n"
+            "heavy = ('geopy', 'numpy', 'requests', 'folium')\n"
+            "print(','.join(name for name in heavy if name in sys.modules))\n"
+        )
+        env = dict(os.environ, RIDE_CHECKER_DB=str(db_path))
+        result = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == ""
+        assert not db_path.exists()
+
+
+class TestDatabaseThreadReaders:
+    """Test cases for per-thread read connections (background loaders)"""
+
+    def run_in_thread(self, fn):
+        result = {}
+        thread = threading.Thread(target=lambda: result.update(value=fn()))
+        thread.start()
+        thread.join(timeout=5)
+        assert not thread.is_alive(), "worker thread blocked"
+        return result["value"]
+
+    def test_worker_reads_do_not_wait_for_writer(self, tmp_path):
+        """Test that another thread reads on its own connection while the write lock is held"""
+        database_obj = Database(path=str(tmp_path / "threads.db"))
+        try:
+            database_obj.execute(
+                "INSERT INTO users (email, username, password, role) VALUES ('a@test.com', 'a', 'x', 'customer')"
+            )
+            with database_obj._write_lock:
+                rows = self.run_in_thread(lambda: database_obj.fetch("SELECT email FROM users"))
+                streamed = self.run_in_thread(lambda: list(database_obj.iter_fetch("SELECT email FROM users")))
+
+            assert [row["email"] for row in rows] == ["a@test.com"]
+            assert [row["email"] for row in streamed] == ["a@test.com"]
+        finally:
+            database_obj.close()
+
+    def test_worker_readers_are_read_only_and_closed(self, tmp_path):
+        """Test that per-thread connections refuse writes and are closed with the database"""
+        database_obj = Database(path=str(tmp_path / "threads.db"))
+        started, finish = threading.Event(), threading.Event()
+        readers = []
+
+        def worker():
+            readers.append(database_obj._thread_reader())
+            started.set()
+            finish.wait(5)
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        try:
+            started.wait(5)
+            with pytest.raises(sqlite3.OperationalError):
+                readers[0].execute("DELETE FROM users")
+
+            database_obj.close()
+            with pytest.raises(sqlite3.ProgrammingError):
+                readers[0].execute("SELECT 1")
+        finally:
+            finish.set()
+            thread.join(timeout=5)
+
+    def test_worker_readers_end_with_their_threads(self, tmp_path):
+        """Test that short-lived threads do not leave connections behind"""
+        database_obj = Database(path=str(tmp_path / "threads.db"))
+        try:
+            readers = [self.run_in_thread(database_obj._thread_reader) for _ in range(50)]
+
+            assert database_obj._thread_readers == []
+            with pytest.raises(sqlite3.ProgrammingError):
+                readers[-1].execute("SELECT 1")
+        finally:
+            database_obj.close()
+
+    def test_owner_thread_uses_shared_connection(self, tmp_path):
+        """Test that the creating thread keeps using the write connection"""
+        database_obj = Database(path=str(tmp_path / "threads.db"))
+        try:
+            database_obj.fetch("SELECT * FROM users")
+            assert database_obj._thread_readers == []
+        finally:
+            database_obj.close()
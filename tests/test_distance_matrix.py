@@ -0,0 +1,113 @@
+"""
+Tests for the many-to-many distance matrix
+"""
+import numpy as np
+import pytest
+from database.route_cache import RouteCache
+from models import road_network, routing
+from models.distance_matrix import distance_matrix
+from models.ride import Ride
+from tests.test_road_network import ORIGIN, STEP, grid_network
+
+DRIVERS = [(27.7172, 85.3240), (27.6710, 85.4298), (27.6588, 85.3247)]
+PICKUPS = [(27.7000, 85.3000), (27.7350, 85.3300), (27.6800, 85.3100), (27.7172, 85.3240)]
+
+
+@pytest.fixture
+def network(tmp_path, monkeypatch):
+    network = grid_network()
+    monkeypatch.setattr(road_network, "_road_network", network)
+    monkeypatch.setattr(road_network, "_road_network_loaded", True)
+    cache = RouteCache(path=str(tmp_path / "routes.db"))
+    monkeypatch.setattr(routing, "_route_cache", cache)
+    yield network
+    cache.close()
+
+
+class TestDistanceMatrix:
+    """Test cases for distance_matrix"""
+
+    def test_ellipsoidal_matches_pairwise(self):
+        """Test every cell against the one-pair geodesic"""
+        matrix = distance_matrix(DRIVERS, PICKUPS)
+
+        assert matrix.shape == (3, 4)
+        for i, driver in enumerate(DRIVERS):
+            for j, pickup in enumerate(PICKUPS):
+                assert matrix[i, j] == pytest.approx(Ride.calculate_distance(driver, pickup), abs=1e-6)
+        assert matrix[0, 3] == 0.0
+
+    def test_haversine(self):
+        """Test the spherical method stays close to the ellipsoid"""
+        matrix = distance_matrix(DRIVERS, PICKUPS, method="haversine")
+
+        np.testing.assert_allclose(matrix, distance_matrix(DRIVERS, PICKUPS), rtol=5e-3, atol=1e-9)
+
+    def test_empty_and_unknown_method(self):
+        """Test empty inputs and bad method names"""
+        assert distance_matrix([], PICKUPS).shape == (0, 4)
+        with pytest.raises(ValueError):
+            distance_matrix(DRIVERS, PICKUPS, method="teleport")
+
+    def test_process_pool_matches_serial(self):
+        """Test that splitting rows across workers gives the same matrix"""
+        rng = np.random.default_rng(11)
+        origins = np.column_stack([rng.uniform(27.6, 27.8, 40), rng.uniform(85.2, 85.5, 40)])
+        destinations = np.column_stack([rng.uniform(27.6, 27.8, 30), rng.uniform(85.2, 85.5, 30)])
+
+        serial = distance_matrix(origins, destinations, processes=1)
+        pooled = distance_matrix(origins, destinations, processes=3)
+
+        np.testing.assert_allclose(pooled, serial)
+
+    def test_driving_uses_road_graph(self, network):
+        """Test that in-area pairs match the point-to-point road distance"""
+        origins = [ORIGIN, (ORIGIN[0] + 2 * STEP, ORIGIN[1] + STEP)]
+        destinations = [(ORIGIN[0] + 4 * STEP, ORIGIN[1] + 4 * STEP), (ORIGIN[0] + STEP, ORIGIN[1] + 3 * STEP)]
+
+        matrix = distance_matrix(origins, destinations, method="driving")
+
+        for i, origin in enumerate(origins):
+            for j, destination in enumerate(destinations):
+                assert matrix[i, j] == pytest.approx(network.driving_distance(origin, destination))
+
+    def test_driving_gaps_use_cache_then_geodesic(self, network):
+        """Test that off-graph pairs fall back without calling OSRM"""
+        pokhara, airport = (28.2096, 83.9856), (27.6966, 85.3591)
+        routing.get_route_cache().put(ORIGIN, pokhara, 201.5)
+
+        matrix = distance_matrix([ORIGIN], [pokhara, airport], method="driving")
+
+        assert matrix[0, 0] == 201.5
+        assert matrix[0, 1] == pytest.approx(Ride.calculate_distance(ORIGIN, airport))
+
+    def test_driving_gaps_read_cache_in_bulk(self, tmp_path, monkeypatch):
+        """Test that gaps without a road graph cost a few queries and no stats or writes"""
+        monkeypatch.setattr(road_network, "_road_network", None)
+        monkeypatch.setattr(road_network, "_road_network_loaded", True)
+        cache = RouteCache(path=str(tmp_path / "routes.db"), memory_entries=0)
+        monkeypatch.setattr(routing, "_route_cache", cache)
+        origins = [(27.6 + r * 0.01, 85.3) for r in range(40)]
+        destinations = [(27.7, 85.2 + c * 0.01) for c in range(40)]
+        cache.put(origins[3], destinations[5], 12.5)
+        statements = []
+        cache.conn.set_trace_callback(statements.append)
+
+        matrix = distance_matrix(origins, destinations, method="driving")
+
+        assert matrix[3, 5] == 12.5
+        assert matrix[0, 0] == pytest.approx(Ride.calculate_distance(origins[0], destinations[0]))
+        assert len(statements) == 2  # 1600 keys in chunks of 900
+        assert all(statement.startswith("SELECT") for statement in statements)
+        assert (cache.hits, cache.misses) == (0, 0)
+        cache.close()
+
+    def test_driving_process_pool(self, network):
+        """Test that workers receive the road graph"""
+        origins = [(ORIGIN[0] + r * STEP, ORIGIN[1]) for r in range(5)]
+        destinations = [(ORIGIN[0], ORIGIN[1] + c * STEP) for c in range(5)]
+
+        serial = distance_matrix(origins, destinations, method="driving", processes=1)
+        pooled = distance_matrix(origins, destinations, method="driving", processes=2)
+
+        np.testing.assert_allclose(pooled, serial)
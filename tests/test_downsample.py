@@ -0,0 +1,34 @@
+"""
+Tests for chart point downsampling
+"""
+from ui.downsample import min_max_indices
+
+
+class TestDownsample:
+    """Test cases for min/max downsampling"""
+
+    def test_short_series_is_kept(self):
+        """Test that two points per column or fewer are drawn as they are"""
+        assert min_max_indices([3, 1, 2, 5], columns=2) == [0, 1, 2, 3]
+        assert min_max_indices([], columns=10) == []
+
+    def test_at_most_two_points_per_column(self):
+        """Test that long series shrink to the column budget plus the end points"""
+        values = [(i * 37) % 101 for i in range(10000)]
+
+        indices = min_max_indices(values, columns=100)
+
+        assert len(indices) <= 2 * 100 + 2
+        assert indices == sorted(set(indices))
+        assert indices[0] == 0 and indices[-1] == len(values) - 1
+
+    def test_extremes_survive(self):
+        """Test that a one-bucket spike and dip are still drawn"""
+        values = [10.0] * 5000
+        values[1234] = 99.0
+        values[4321] = -5.0
+
+        indices = min_max_indices(values, columns=50)
+
+        assert 1234 in indices
+        assert 4321 in indices
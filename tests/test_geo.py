@@ -0,0 +1,107 @@
+"""
+Tests for the vectorized distance helpers
+"""
+import numpy as np
+import pytest
+from geopy.distance import geodesic, great_circle
+from models import geo
+from models.ride import Ride
+
+
+def random_pairs(count, seed=42, spread=None):
+    rng = np.random.default_rng(seed)
+    if spread is None:
+        pickups = np.column_stack([rng.uniform(-89, 89, count), rng.uniform(-180, 180, count)])
+        destinations = np.column_stack([rng.uniform(-89, 89, count), rng.uniform(-180, 180, count)])
+    else:
+        center = np.array([27.7172, 85.3240])
+        pickups = center + rng.uniform(-spread, spread, (count, 2))
+        destinations = center + rng.uniform(-spread, spread, (count, 2))
+    return pickups, destinations
+
+
+class TestGeo:
+    """Test cases for haversine_km and vincenty_km"""
+
+    def test_haversine_matches_great_circle(self):
+        """Test the spherical mode against geopy's great_circle"""
+        pickups, destinations = random_pairs(200)
+
+        distances = geo.haversine_km(pickups, destinations)
+        expected = [great_circle(tuple(p), tuple(d)).km for p, d in zip(pickups, destinations)]
+
+        np.testing.assert_allclose(distances, expected, rtol=1e-9)
+
+    def test_vincenty_within_a_meter_of_geodesic_worldwide(self):
+        """Test the ellipsoidal mode against geopy's geodesic on global pairs"""
+        pickups, destinations = random_pairs(500)
+
+        distances, converged = geo.vincenty_km(pickups, destinations)
+        expected = np.array([geodesic(tuple(p), tuple(d)).km for p, d in zip(pickups, destinations)])
+
+        assert np.abs(distances[converged] - expected[converged]).max() < 0.001
+
+    def test_vincenty_within_a_meter_of_geodesic_in_city(self):
+        """Test the ellipsoidal mode on short trips around Kathmandu"""
+        pickups, destinations = random_pairs(500, spread=0.2)
+
+        distances, converged = geo.vincenty_km(pickups, destinations)
+        expected = np.array([geodesic(tuple(p), tuple(d)).km for p, d in zip(pickups, destinations)])
+
+        assert converged.all()
+        assert np.abs(distances - expected).max() < 0.001
+
+    def test_coincident_points(self):
+        """Test that identical pickup and destination give zero"""
+        point = [[27.7172, 85.3240]]
+
+        distances, converged = geo.vincenty_km(point, point)
+
+        assert converged.all()
+        assert distances[0] == 0.0
+        assert geo.haversine_km(point, point)[0] == 0.0
+
+    def test_antipodal_points_are_flagged(self):
+        """Test that non-converging pairs are reported instead of returning garbage"""
+        distances, converged = geo.vincenty_km([[0.0, 0.0]], [[0.5, 179.7]])
+
+        assert not converged[0]
+        assert np.isnan(distances[0])
+
+    def test_rejects_bad_shape(self):
+        """Test that coordinates must be (lat, lng) pairs"""
+        with pytest.raises(ValueError):
+            geo.haversine_km([[1.0, 2.0, 3.0]], [[1.0, 2.0, 3.0]])
+
+
+class TestRideDistances:
+    """Test cases for Ride.calculate_distances"""
+
+    def test_ellipsoidal_matches_calculate_distance(self):
+        """Test that batch results match the scalar helper within 1 m"""
+        pickups, destinations = random_pairs(100, spread=0.3)
+
+        distances = Ride.calculate_distances(pickups, destinations)
+
+        for pickup, destination, distance in zip(pickups, destinations, distances):
+            assert abs(distance - Ride.calculate_distance(tuple(pickup), tuple(destination))) < 0.001
+
+    def test_antipodal_fallback(self):
+        """Test that non-converged pairs fall back to geodesic"""
+        distances = Ride.calculate_distances([[0.0, 0.0], [27.7, 85.3]], [[0.5, 179.7], [27.6, 85.3]])
+
+        assert abs(distances[0] - geodesic((0.0, 0.0), (0.5, 179.7)).km) < 0.001
+        assert np.isfinite(distances).all()
+
+    def test_single_point_broadcasts(self):
+        """Test one pickup against many destinations"""
+        _, destinations = random_pairs(10, spread=0.1)
+
+        distances = Ride.calculate_distances((27.7172, 85.3240), destinations, method="haversine")
+
+        assert distances.shape == (10,)
+
+    def test_unknown_method(self):
+        """Test that an unknown method is rejected"""
+        with pytest.raises(ValueError):
+            Ride.calculate_distances([[0, 0]], [[1, 1]], method="manhattan")
@@ -0,0 +1,46 @@
+"""
+Tests for the prebuilt, cached customer map page
+"""
+import os
+from ui.map_page import KATHMANDU, TEMPLATE_PATH, map_page_path, render_map_page
+
+
+class TestMapPage:
+    """Test cases for ui.map_page"""
+
+    def test_render_uses_stable_ids(self):
+        """Test that the page always exposes `map` on div#map with the click bridge"""
+        html = render_map_page()
+
+        assert '<div id="map"></div>' in html
+        assert f"var map = L.map('map').setView([{KATHMANDU[0]}, {KATHMANDU[1]}], 12);" in html
+        assert "mapBridge.mapClicked(lat, lng)" in html
+        assert "window.addPickupMarker" in html
+        assert "${" not in html
+
+    def test_page_is_written_once(self, tmp_path):
+        """Test that reopening the window reuses the cached file"""
+        first = map_page_path(cache_dir=str(tmp_path))
+        mtime = os.stat(first).st_mtime_ns
+
+        second = map_page_path(cache_dir=str(tmp_path))
+
+        assert first == second
+        assert os.stat(second).st_mtime_ns == mtime
+        assert os.listdir(tmp_path) == [os.path.basename(first)]
+        with open(first, encoding="utf-8") as f:
+            assert f.read() == render_map_page()
+
+    def test_new_content_gets_new_file(self, tmp_path):
+        """Test that the cache key follows the rendered content"""
+        template = tmp_path / "template.html"
+        with open(TEMPLATE_PATH, encoding="utf-8") as f:
+            template.write_text(f.read())
+        cache_dir = str(tmp_path / "cache")
+
+        original = map_page_path(template_path=str(template), cache_dir=cache_dir)
+        zoomed = map_page_path(zoom=15, template_path=str(template), cache_dir=cache_dir)
+        template.write_text(template.read_text().replace("Ride Hailing Map", "Ride Map"))
+        edited = map_page_path(template_path=str(template), cache_dir=cache_dir)
+
+        assert len({original, zoomed, edited}) == 3
@@ -0,0 +1,341 @@
+"""
+Tests for versioned schema migrations
+"""
+import pytest
+import sqlite3
+from database.migrations import migrate, rebuild_ride_rollups, schema_version, LATEST_VERSION
+
+
+LEGACY_USERS = """
+    CREATE TABLE users (
+        email TEXT PRIMARY KEY,
+        username TEXT NOT NULL,
+        password TEXT NOT NULL,
+        role TEXT NOT NULL CHECK(role IN ('customer', 'driver', 'admin'))
+    )
+"""
+
+LEGACY_RIDES = """
+    CREATE TABLE rides (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        customer_email TEXT,
+        driver_email TEXT,
+        pickup_location TEXT,
+        destination TEXT,
+        pickup_datetime TEXT,
+        duration_hours REAL,
+        distance_km REAL,
+        base_cost REAL,
+        tip_amount REAL,
+        total_cost REAL,
+        status TEXT CHECK(status IN ('pending', 'accepted', 'completed')),
+        FOREIGN KEY(customer_email) REFERENCES users(email),
+        FOREIGN KEY(driver_email) REFERENCES users(email)
+    )
+"""
+
+
+@pytest.fixture
+def legacy_conn(tmp_path):
+    """A database in the shape used before schema versioning existed"""
+    conn = sqlite3.connect(str(tmp_path / "legacy.db"))
+    conn.execute(LEGACY_USERS)
+    conn.execute(LEGACY_RIDES)
+    conn.execute(
+        "INSERT INTO users (email, username, password, role) VALUES (?, ?, ?, ?)",
+        ("customer@test.com", "customer1", "hashed", "customer")
+    )
+    for i in range(7):
+        conn.execute("""
+            INSERT INTO rides (customer_email, pickup_location, destination, pickup_datetime,
+                               duration_hours, distance_km, base_cost, tip_amount, total_cost, status)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, ("customer@test.com", f"Pickup {i}", f"Destination {i}", "2024-01-01 10:00",
+              1.0, 5.0, 275.0, 0.0, 475.0, "completed" if i % 2 else "pending"))
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+class TestMigrations:
+    """Test cases for the migration engine"""
+
+    def test_fresh_database(self, tmp_path):
+        """Test migrating an empty database to the latest version"""
+        conn = sqlite3.connect(str(tmp_path / "fresh.db"))
+
+        assert migrate(conn) == LATEST_VERSION
+        assert schema_version(conn) == LATEST_VERSION
+
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+        assert {"users", "rides"} <= tables
+        conn.close()
+
+    def test_current_database_reads_one_pragma(self, tmp_path):
+        """Test that an up-to-date database only costs a user_version read"""
+        conn = sqlite3.connect(str(tmp_path / "current.db"))
+        migrate(conn)
+
+        statements = []
+        conn.set_trace_callback(statements.append)
+        migrate(conn)
+
+        assert statements == ["PRAGMA user_version"]
+        conn.close()
+
+    def test_legacy_database_upgrade(self, legacy_conn):
+        """Test upgrading an unversioned database in several batches"""
+        migrate(legacy_conn, batch_size=3)
+
+        assert schema_version(legacy_conn) == LATEST_VERSION
+
+        user_columns = {row[1] for row in legacy_conn.execute("PRAGMA table_info(users)")}
+        assert {"name", "address", "phone_number"} <= user_columns
+
+        rows = legacy_conn.execute("SELECT id, pickup_location, status FROM rides ORDER BY id").fetchall()
+        assert [row[0] for row in rows] == list(range(1, 8))
+        assert rows[0][1] == "Pickup 0"
+        assert rows[1][2] == "completed"
+
+        # 'cancelled' is now accepted by the CHECK constraint
+        legacy_conn.execute("UPDATE rides SET status = 'cancelled' WHERE id = 1")
+
+        tables = {row[0] for row in legacy_conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+        assert "rides_new" not in tables
+
+    def test_legacy_upgrade_keeps_autoincrement(self, legacy_conn):
+        """Test that new rides continue after the highest copied id"""
+        migrate(legacy_conn, batch_size=2)
+
+        cur = legacy_conn.execute(
+            "INSERT INTO rides (customer_email, status) VALUES (?, ?)",
+            ("customer@test.com", "pending")
+        )
+        assert cur.lastrowid == 8
+
+    def test_interrupted_rebuild_resumes(self, legacy_conn):
+        """Test that a half-copied rides_new table is completed, not duplicated"""
+        legacy_conn.execute(LEGACY_RIDES.replace("CREATE TABLE rides", "CREATE TABLE rides_new")
+                            .replace("'completed')", "'completed', 'cancelled')"))
+        legacy_conn.execute("INSERT INTO rides_new SELECT * FROM rides WHERE id <= 4")
+        legacy_conn.commit()
+
+        migrate(legacy_conn, batch_size=2)
+
+        count = legacy_conn.execute("SELECT COUNT(*) FROM rides").fetchone()[0]
+        assert count == 7
+
+    def test_writes_between_batches_are_kept(self, legacy_conn, tmp_path):
+        """Test that edits to already-copied rows made between batches survive the swap"""
+        other = sqlite3.connect(str(tmp_path / "legacy.db"))
+        wrote = []
+
+        def write_between_batches(sql):
+            # Runs as each batch's BEGIN starts, while the migration holds no lock
+            if sql != "BEGIN IMMEDIATE" or wrote:
+                return
+            if other.execute("SELECT 1 FROM sqlite_master WHERE name = 'rides_new'").fetchall():
+                if other.execute("SELECT COUNT(*) FROM rides_new").fetchall()[0][0] >= 4:
+                    wrote.append(True)
+                    other.execute("UPDATE rides SET total_cost = 999.0 WHERE id = 1")
+                    other.execute("DELETE FROM rides WHERE id = 2")
+                    other.commit()
+
+        legacy_conn.set_trace_callback(write_between_batches)
+        migrate(legacy_conn, batch_size=2)
+        legacy_conn.set_trace_callback(None)
+        other.close()
+
+        assert wrote
+        ids = [row[0] for row in legacy_conn.execute("SELECT id FROM rides ORDER BY id")]
+        assert ids == [1, 3, 4, 5, 6, 7]
+        assert legacy_conn.execute("SELECT total_cost FROM rides WHERE id = 1").fetchone()[0] == 999.0
+
+    def test_migrate_is_idempotent(self, legacy_conn):
+        """Test that repeated migrations leave the data untouched"""
+        migrate(legacy_conn)
+        before = legacy_conn.execute("SELECT * FROM rides ORDER BY id").fetchall()
+
+        legacy_conn.execute("PRAGMA user_version = 0")
+        migrate(legacy_conn)
+
+        after = legacy_conn.execute("SELECT * FROM rides ORDER BY id").fetchall()
+        assert before == after
+        assert schema_version(legacy_conn) == LATEST_VERSION
+
+
+class TestTypedRideColumns:
+    """Test cases for the epoch and coordinate columns kept by triggers"""
+
+    def insert_ride(self, conn, pickup, destination, pickup_datetime, duration):
+        return conn.execute("""
+            INSERT INTO rides (customer_email, pickup_location, destination, pickup_datetime,
+                               duration_hours, status)
+            VALUES ('customer@test.com', ?, ?, ?, ?, 'pending')
+        """, (pickup, destination, pickup_datetime, duration)).lastrowid
+
+    def typed(self, conn, ride_id):
+        return conn.execute("""
+            SELECT pickup_start, pickup_end, pickup_lat, pickup_lng, dest_lat, dest_lng
+            FROM rides WHERE id = ?
+        """, (ride_id,)).fetchone()
+
+    @pytest.fixture
+    def conn(self, tmp_path):
+        conn = sqlite3.connect(str(tmp_path / "typed.db"))
+        migrate(conn)
+        yield conn
+        conn.close()
+
+    def test_insert_fills_typed_columns(self, conn):
+        """Test that coordinates and epochs are derived on insert"""
+        ride_id = self.insert_ride(conn, "(27.7172, 85.324)", "(27.6828, 85.318)", "2024-01-01 10:30", 1.5)
+
+        start, end, pickup_lat, pickup_lng, dest_lat, dest_lng = self.typed(conn, ride_id)
+        assert start == 1704105000  # 2024-01-01 10:30 read as wall-clock seconds
+        assert end == start + 5400
+        assert (pickup_lat, pickup_lng) == (27.7172, 85.324)
+        assert (dest_lat, dest_lng) == (27.6828, 85.318)
+
+    def test_update_refreshes_typed_columns(self, conn):
+        """Test that edits to the text columns are mirrored"""
+        ride_id = self.insert_ride(conn, "(27.7, 85.3)", "(27.6, 85.2)", "2024-01-01 10:00", 1.0)
+
+        conn.execute(
+            "UPDATE rides SET pickup_datetime = ?, duration_hours = ?, destination = ? WHERE id = ?",
+            ("2024-01-02 09:00", 2.0, "(-33.9, 151.2)", ride_id)
+        )
+
+        start, end, _, _, dest_lat, dest_lng = self.typed(conn, ride_id)
+        assert start == 1704186000
+        assert end == start + 7200
+        assert (dest_lat, dest_lng) == (-33.9, 151.2)
+
+    def test_non_coordinate_locations_are_null(self, conn):
+        """Test that place names and bad dates leave the typed columns empty"""
+        ride_id = self.insert_ride(conn, "Kathmandu", "Patan, Lalitpur", "not a date", 1.0)
+
+        assert self.typed(conn, ride_id) == (None, None, None, None, None, None)
+
+    def test_legacy_rows_are_backfilled(self, legacy_conn):
+        """Test that the migration backfills rows written before the columns existed"""
+        legacy_conn.execute("UPDATE rides SET pickup_location = '(27.7, 85.3)' WHERE id = 7")
+        legacy_conn.commit()
+
+        migrate(legacy_conn, batch_size=3)
+
+        rows = legacy_conn.execute("SELECT id, pickup_start, pickup_lat FROM rides ORDER BY id").fetchall()
+        assert all(row[1] == 1704103200 for row in rows)
+        assert rows[6][2] == 27.7
+        assert rows[0][2] is None
+
+
+class TestRideChangeTracking:
+    """Test cases for the change_seq column and ride tombstones"""
+
+    @pytest.fixture
+    def conn(self, tmp_path):
+        conn = sqlite3.connect(str(tmp_path / "changes.db"))
+        migrate(conn)
+        yield conn
+        conn.close()
+
+    def insert_ride(self, conn):
+        return conn.execute("""
+            INSERT INTO rides (customer_email, pickup_location, destination, pickup_datetime,
+                               duration_hours, status)
+            VALUES ('customer@test.com', '(27.7, 85.3)', '(27.6, 85.2)', '2024-01-01 10:00', 1.0, 'pending')
+        """).lastrowid
+
+    def change_seq(self, conn, ride_id):
+        return conn.execute("SELECT change_seq FROM rides WHERE id = ?", (ride_id,)).fetchone()[0]
+
+    def test_writes_take_increasing_sequence_numbers(self, conn):
+        """Test that inserts and updates stamp rides with the next sequence number"""
+        first = self.insert_ride(conn)
+        second = self.insert_ride(conn)
+        assert self.change_seq(conn, first) == 1
+        assert self.change_seq(conn, second) == 2
+
+        conn.execute("UPDATE rides SET status = 'accepted' WHERE id = ?", (first,))
+
+        assert self.change_seq(conn, first) == 3
+        assert conn.execute("SELECT seq FROM change_counter").fetchone()[0] == 3
+
+    def test_deletes_leave_tombstones(self, conn):
+        """Test that a deleted ride is recorded with its sequence number"""
+        ride_id = self.insert_ride(conn)
+        conn.execute("DELETE FROM rides WHERE id = ?", (ride_id,))
+
+        assert conn.execute("SELECT ride_id, change_seq FROM ride_tombstones").fetchall() == [(ride_id, 2)]
+
+    def test_legacy_rows_predate_every_marker(self, legacy_conn):
+        """Test that upgrading leaves old rides unstamped and the counter at zero"""
+        migrate(legacy_conn)
+
+        assert legacy_conn.execute("SELECT COUNT(*) FROM rides WHERE change_seq IS NOT NULL").fetchone()[0] == 0
+        assert legacy_conn.execute("SELECT seq FROM change_counter").fetchone()[0] == 0
+
+
+class TestRideRollups:
+    """Test cases for the hourly and daily rollups kept by triggers"""
+
+    @pytest.fixture
+    def conn(self, tmp_path):
+        conn = sqlite3.connect(str(tmp_path / "rollups.db"))
+        migrate(conn)
+        yield conn
+        conn.close()
+
+    def insert_ride(self, conn, pickup_datetime, status="pending", total_cost=100.0, duration=1.0):
+        return conn.execute("""
+            INSERT INTO rides (customer_email, pickup_location, destination, pickup_datetime,
+                               duration_hours, total_cost, status)
+            VALUES ('customer@test.com', 'A', 'B', ?, ?, ?, ?)
+        """, (pickup_datetime, duration, total_cost, status)).lastrowid
+
+    def rollup(self, conn, table):
+        return conn.execute(f"SELECT * FROM {table} ORDER BY bucket_start").fetchall()
+
+    def test_inserts_are_bucketed(self, conn):
+        """Test that rides land in their hour and day, with status counts"""
+        self.insert_ride(conn, "2024-01-01 10:15", "completed", 200.0, 2.0)
+        self.insert_ride(conn, "2024-01-01 10:45", "cancelled", 50.0, 1.0)
+        self.insert_ride(conn, "2024-01-01 13:00")
+
+        # bucket, rides, revenue, duration_sum, duration_count, pending, accepted, completed, cancelled
+        assert self.rollup(conn, "ride_stats_hourly") == [
+            (1704103200, 2, 200.0, 3.0, 2, 0, 0, 1, 1),
+            (1704114000, 1, 100.0, 1.0, 1, 1, 0, 0, 0),
+        ]
+        assert self.rollup(conn, "ride_stats_daily") == [(1704067200, 3, 300.0, 4.0, 3, 1, 0, 1, 1)]
+
+    def test_updates_and_deletes_move_rides(self, conn):
+        """Test that edits leave the rollups equal to a full rebuild"""
+        first = self.insert_ride(conn, "2024-01-01 10:15")
+        second = self.insert_ride(conn, "2024-01-01 10:30")
+        conn.execute("UPDATE rides SET pickup_datetime = '2024-01-02 09:00' WHERE id = ?", (first,))
+        conn.execute("UPDATE rides SET status = 'cancelled', duration_hours = 3.0 WHERE id = ?", (second,))
+        conn.execute("DELETE FROM rides WHERE id = ?", (first,))
+
+        hourly = self.rollup(conn, "ride_stats_hourly")
+        daily = self.rollup(conn, "ride_stats_daily")
+        assert hourly == [(1704103200, 1, 0.0, 3.0, 1, 0, 0, 0, 1)]
+
+        rebuild_ride_rollups(conn)
+        assert self.rollup(conn, "ride_stats_hourly") == hourly
+        assert self.rollup(conn, "ride_stats_daily") == daily
+
+    def test_undated_rides_are_left_out(self, conn):
+        """Test that rides without a parseable pickup time have no bucket"""
+        self.insert_ride(conn, "not a date")
+
+        assert self.rollup(conn, "ride_stats_hourly") == []
+        assert self.rollup(conn, "ride_stats_daily") == []
+
+    def test_legacy_rows_are_backfilled(self, legacy_conn):
+        """Test that the migration rolls up rides written before the triggers existed"""
+        migrate(legacy_conn)
+
+        # Seven 10:00 rides, three completed and four pending at 475.0 each
+        assert self.rollup(legacy_conn, "ride_stats_hourly") == [(1704103200, 7, 3325.0, 7.0, 7, 4, 0, 3, 0)]
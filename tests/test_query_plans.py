@@ -0,0 +1,118 @@
+"""
+EXPLAIN QUERY PLAN checks for the model query paths.
+
+Each test runs a model call with SQL tracing on, then asks SQLite for the
+plan of every statement that touched rides. A plain "SCAN rides" (a table
+scan with no index) fails the test.
+"""
+import re
+import pytest
+from models.ride import Ride
+from models.admin import Admin
+
+
+TABLE_SCAN = re.compile(r"\bSCAN rides\b(?! USING)")
+
+
+@pytest.fixture
+def traced(temp_db, sample_users, sample_rides):
+    """Collect statements the models send to the test database"""
+    statements = []
+    temp_db.conn.set_trace_callback(statements.append)
+    yield statements
+    temp_db.conn.set_trace_callback(None)
+
+
+def query_plans(temp_db, statements):
+    plans = {}
+    for sql in statements:
+        normalized = " ".join(sql.split())
+        if "rides" not in normalized or not normalized.upper().startswith(("SELECT", "WITH", "UPDATE", "DELETE")):
+            continue
+        rows = temp_db.conn.execute("EXPLAIN QUERY PLAN " + normalized).fetchall()
+        plans[normalized] = [row[3] for row in rows]
+    return plans
+
+
+def assert_indexed(temp_db, statements):
+    plans = query_plans(temp_db, statements)
+    assert plans, "no rides queries were traced"
+    for sql, plan in plans.items():
+        scans = [step for step in plan if TABLE_SCAN.search(step)]
+        assert not scans, f"table scan in {sql!r}: {plan}"
+
+
+class TestQueryPlans:
+    """Every keyed model query must be served by an index"""
+
+    def test_get_pending_rides(self, temp_db, traced):
+        Ride.get_pending_rides()
+        assert_indexed(temp_db, traced)
+
+    def test_get_driver_rides(self, temp_db, traced):
+        Ride.get_driver_rides("driver@test.com")
+        assert_indexed(temp_db, traced)
+
+    def test_get_customer_rides(self, temp_db, traced):
+        Ride.get_customer_rides("customer@test.com")
+        assert_indexed(temp_db, traced)
+
+    def test_paged_ride_lists(self, temp_db, traced, sample_rides):
+        """Table pages are index range scans too"""
+        Ride.get_pending_rides(limit=50, after=("2000-01-01 00:00", 0))
+        Ride.get_customer_rides("customer@test.com", limit=50, after_id=sample_rides[0])
+        Ride.get_driver_rides("driver@test.com", limit=50, after_id=sample_rides[0])
+        Admin.get_rides(limit=50, after_id=sample_rides[0])
+        assert_indexed(temp_db, traced)
+
+    def test_get_changes(self, temp_db, traced, sample_rides):
+        Ride.accept_ride(sample_rides[0], "driver@test.com")
+        Ride.get_changes(0)
+        assert_indexed(temp_db, traced)
+
+    def test_check_overlap(self, temp_db, traced, sample_rides):
+        Ride.check_overlap("driver@test.com", "2030-01-01 10:00", 1.0, exclude_ride_id=sample_rides[0])
+        assert_indexed(temp_db, traced)
+
+    def test_accept_ride(self, temp_db, traced, sample_rides):
+        Ride.accept_ride(sample_rides[0], "driver@test.com")
+        assert_indexed(temp_db, traced)
+
+    def test_assign_driver(self, temp_db, traced, sample_rides):
+        Ride.assign_driver(sample_rides[0], "driver@test.com")
+        assert_indexed(temp_db, traced)
+
+    def test_cancel_ride(self, temp_db, traced, sample_rides):
+        Ride.cancel_ride(sample_rides[0], "customer@test.com")
+        assert_indexed(temp_db, traced)
+
+    def test_update_ride(self, temp_db, traced, sample_rides):
+        Ride.update_ride(sample_rides[0], "customer@test.com", pickup_location="New Pickup")
+        assert_indexed(temp_db, traced)
+
+    def test_busiest_hour(self, temp_db, traced):
+        Admin.busiest_hour()
+        assert_indexed(temp_db, traced)
+
+    def test_analytics_snapshot(self, temp_db, traced):
+        """The snapshot reads the rollup and only looks up undated rides"""
+        Admin.analytics_snapshot()
+        assert_indexed(temp_db, traced)
+        plan = [step for steps in query_plans(temp_db, traced).values() for step in steps]
+        assert "SCAN ride_stats_hourly" in plan
+        assert any("USING COVERING INDEX idx_rides_analytics (pickup_start=?)" in step for step in plan)
+
+    def test_timeseries(self, temp_db, traced):
+        """Every bucket size reads a key range of its rollup table"""
+        for bucket in ("hour", "day", "week"):
+            Admin.timeseries("rides", "2024-01-01", "2025-01-01", bucket)
+        plans = query_plans(temp_db, traced)
+        assert len(plans) == 3
+        for sql, plan in plans.items():
+            assert any("USING INTEGER PRIMARY KEY" in step for step in plan), f"{sql!r}: {plan}"
+
+    def test_detects_table_scan(self, temp_db, traced):
+        """Sanity check: an unindexed filter is reported"""
+        temp_db.fetch("SELECT * FROM rides WHERE tip_amount > 0")
+        with pytest.raises(AssertionError):
+            assert_indexed(temp_db, traced)
@@ -192,6 +192,55 @@ class TestRide:
         assert rides[0]["driver_email"] == driver_email
         assert rides[0]["customer_email"] == "customer@test.com"
     
+    def test_get_pending_rides_paged(self, temp_db, sample_users):
+        """Test reading pending rides a page at a time, soonest pickup first"""
+        start = datetime.now() + timedelta(days=1)
+        for i in (3, 1, 4, 1, 5):
+            Ride.create_ride("customer@test.com", "A", "B", (start + timedelta(hours=i)).strftime("%Y-%m-%d %H:%M"),
+                             1.0, 5.0, 275.0, 0.0, 475.0)
+        everything = Ride.get_pending_rides()
+
+        pages, after = [], None
+        while True:
+            page = Ride.get_pending_rides(limit=2, after=after)
+            if not page:
+                break
+            pages.append(page)
+            after = (page[-1]["pickup_datetime"], page[-1]["id"])
+
+        assert [len(page) for page in pages] == [2, 2, 1]
+        assert [ride["id"] for page in pages for ride in page] == [ride["id"] for ride in everything]
+        assert [ride["pickup_datetime"] for ride in everything] == sorted(ride["pickup_datetime"] for ride in everything)
+
+    def test_get_customer_and_driver_rides_paged(self, temp_db, sample_users, sample_rides):
+        """Test keyset paging of a customer's and a driver's rides"""
+        first = Ride.get_customer_rides("customer@test.com", limit=2)
+        rest = Ride.get_customer_rides("customer@test.com", limit=2, after_id=first[-1]["id"])
+
+        assert [ride["id"] for ride in first + rest] == sample_rides
+
+        for ride_id in sample_rides:
+            Ride.accept_ride(ride_id, "driver@test.com")
+        driver_page = Ride.get_driver_rides("driver@test.com", limit=5, after_id=sample_rides[0])
+        assert [ride["id"] for ride in driver_page] == sample_rides[1:]
+        assert driver_page[0]["customer_phone"] == "9841234567"
+
+    def test_get_changes(self, temp_db, sample_users, sample_rides):
+        """Test reading only the rides written since a marker"""
+        marker = Ride.change_marker()
+        assert Ride.get_changes(marker) == (marker, [], [])
+
+        Ride.accept_ride(sample_rides[0], "driver@test.com")
+        temp_db.execute("DELETE FROM rides WHERE id = ?", (sample_rides[2],))
+
+        new_marker, changed, removed = Ride.get_changes(marker)
+        assert new_marker > marker
+        assert [ride["id"] for ride in changed] == [sample_rides[0]]
+        assert changed[0]["status"] == "accepted"
+        assert changed[0]["customer_phone"] == "9841234567"
+        assert removed == [sample_rides[2]]
+        assert Ride.get_changes(new_marker) == (new_marker, [], [])
+
     def test_get_all_rides(self, temp_db, sample_users, sample_rides):
         """Test retrieving all rides"""
         rides = Ride.get_all_rides()
@@ -345,3 +394,194 @@ class TestRide:
         
         assert success is False
         assert "overlap" in message.lower()
+
+    def test_create_rides_bulk(self, temp_db, sample_users):
+        """Test creating many rides under one commit"""
+        pickup_datetime = (datetime.now() + timedelta(hours=2)).strftime("%Y-%m-%d %H:%M")
+        rides = [
+            ("customer@test.com", f"Pickup {i}", f"Destination {i}", pickup_datetime,
+             1.0, 5.0, 275.0, 0.0, 475.0)
+            for i in range(200)
+        ]
+
+        count = Ride.create_rides(rides)
+
+        assert count == 200
+        pending = Ride.get_pending_rides()
+        assert len(pending) == 200
+        assert pending[0]["status"] == "pending"
+
+    def test_assign_drivers_bulk(self, temp_db, sample_users, sample_rides):
+        """Test bulk assignment reports each result and sees earlier assignments"""
+        driver_email = "driver@test.com"
+
+        # Make the second ride overlap the first
+        ride1 = dict(temp_db.fetch("SELECT pickup_datetime FROM rides WHERE id = ?", (sample_rides[0],))[0])
+        temp_db.execute("UPDATE rides SET pickup_datetime = ? WHERE id = ?",
+                        (ride1["pickup_datetime"], sample_rides[1]))
+
+        results = Ride.assign_drivers([
+            (sample_rides[0], driver_email),
+            (sample_rides[1], driver_email),
+            (sample_rides[2], driver_email),
+        ])
+
+        assert [success for success, _ in results] == [True, False, True]
+        assert "overlap" in results[1][1].lower()
+        assigned = temp_db.fetch("SELECT id FROM rides WHERE driver_email = ? ORDER BY id", (driver_email,))
+        assert [row["id"] for row in assigned] == [sample_rides[0], sample_rides[2]]
+
+    def test_check_overlap_touching_rides(self, temp_db, sample_users):
+        """Test that a ride starting exactly when another ends does not overlap"""
+        Ride.create_ride("customer@test.com", "A", "B", "2030-01-01 10:00",
+                         2.0, 5.0, 275.0, 0.0, 475.0)
+        ride_id = temp_db.fetch("SELECT MAX(id) AS id FROM rides")[0]["id"]
+        Ride.accept_ride(ride_id, "driver@test.com")
+
+        assert Ride.check_overlap("driver@test.com", "2030-01-01 12:00", 1.0) is False
+        assert Ride.check_overlap("driver@test.com", "2030-01-01 09:00", 1.0) is False
+        assert Ride.check_overlap("driver@test.com", "2030-01-01 11:59", 1.0) is True
+        assert Ride.check_overlap("driver@test.com", "2030-01-01 08:00", 2.5) is True
+
+    def test_check_overlap_invalid_datetime(self, temp_db, sample_users):
+        """Test that an unparseable pickup time allows assignment"""
+        assert Ride.check_overlap("driver@test.com", "tomorrow morning", 1.0) is False
+
+    def test_check_overlap_matches_reference(self, temp_db, sample_users):
+        """Test the SQL range query against the original Python loop"""
+        import random
+
+        rng = random.Random(1234)
+        base = datetime(2030, 1, 1, 6, 0)
+        durations = [0.5, 1.0, 1.5, 2.0, 3.0, 0.25]
+        rides = []
+        for _ in range(60):
+            pickup = (base + timedelta(minutes=15 * rng.randrange(0, 400))).strftime("%Y-%m-%d %H:%M")
+            rides.append(("customer@test.com", "A", "B", pickup, rng.choice(durations),
+                          5.0, 275.0, 0.0, 475.0))
+        Ride.create_rides(rides)
+        statuses = ["pending", "accepted", "completed", "cancelled"]
+        for ride_id in range(1, 61):
+            temp_db.execute("UPDATE rides SET driver_email = ?, status = ? WHERE id = ?",
+                            (rng.choice(["driver@test.com", "admin@test.com"]), rng.choice(statuses), ride_id))
+
+        for _ in range(300):
+            pickup = (base + timedelta(minutes=5 * rng.randrange(0, 1300))).strftime("%Y-%m-%d %H:%M")
+            duration = rng.choice(durations)
+            exclude = rng.choice([None, rng.randrange(1, 61)])
+            expected = Ride.check_overlap_reference("driver@test.com", pickup, duration, exclude)
+            assert Ride.check_overlap("driver@test.com", pickup, duration, exclude) is expected
+
+    def test_check_overlap_long_rides_match_reference(self, temp_db, sample_users):
+        """Test that rides longer than the booking form allows still block the driver"""
+        import random
+
+        Ride.create_ride("customer@test.com", "A", "B", "2030-01-01 06:00",
+                         96.0, 5.0, 275.0, 0.0, 475.0)
+        temp_db.execute("UPDATE rides SET driver_email = 'driver@test.com', status = 'accepted'")
+        assert Ride.check_overlap("driver@test.com", "2030-01-02 12:00", 1.0) is True
+
+        rng = random.Random(4321)
+        base = datetime(2030, 1, 1, 6, 0)
+        durations = [0.5, 2.0, 30.0, 96.0]
+        Ride.create_rides([
+            ("customer@test.com", "A", "B",
+             (base + timedelta(hours=rng.randrange(0, 400))).strftime("%Y-%m-%d %H:%M"),
+             rng.choice(durations), 5.0, 275.0, 0.0, 475.0)
+            for _ in range(20)
+        ])
+        temp_db.execute("UPDATE rides SET driver_email = 'driver@test.com', status = 'accepted' WHERE id > 1")
+
+        for _ in range(200):
+            pickup = (base + timedelta(minutes=30 * rng.randrange(-100, 1000))).strftime("%Y-%m-%d %H:%M")
+            duration = rng.choice(durations)
+            expected = Ride.check_overlap_reference("driver@test.com", pickup, duration)
+            assert Ride.check_overlap("driver@test.com", pickup, duration) is expected
+
+    def test_check_overlap_cost_is_flat(self, temp_db, sample_users):
+        """Test that the work done does not grow with the driver's future schedule"""
+        base = datetime(2030, 1, 1, 6, 0)
+
+        def steps_with_schedule(depth):
+            temp_db.execute("DELETE FROM rides")
+            Ride.create_rides([
+                ("customer@test.com", "A", "B", (base + timedelta(hours=2 * i)).strftime("%Y-%m-%d %H:%M"),
+                 1.0, 5.0, 275.0, 0.0, 475.0)
+                for i in range(depth)
+            ])
+            temp_db.execute("UPDATE rides SET driver_email = 'driver@test.com', status = 'accepted'")
+
+            # Count SQLite VM steps for a free slot before the whole schedule
+            steps = [0]
+            temp_db.conn.set_progress_handler(lambda: steps.__setitem__(0, steps[0] + 1) or 0, 1)
+            try:
+                assert Ride.check_overlap("driver@test.com", "2029-12-31 10:00", 1.0) is False
+            finally:
+                temp_db.conn.set_progress_handler(None, 1)
+            return steps[0]
+
+        assert steps_with_schedule(2000) <= steps_with_schedule(20) + 10
+
+    def test_accept_ride_race_has_one_winner(self, temp_db, sample_users, sample_rides):
+        """Test that concurrent accepts of one ride report exactly one success"""
+        import threading
+
+        ride_id = sample_rides[0]
+        drivers = ["driver@test.com", "admin@test.com", "customer@test.com"] * 3
+        results = []
+        barrier = threading.Barrier(len(drivers))
+
+        def accept(driver_email):
+            barrier.wait()
+            results.append(Ride.accept_ride(ride_id, driver_email))
+
+        threads = [threading.Thread(target=accept, args=(email,)) for email in drivers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        winners = [message for success, message in results if success]
+        losers = [message for success, message in results if not success]
+        assert len(winners) == 1
+        assert all("no longer available" in message.lower() for message in losers)
+
+    def test_assign_driver_requires_pending(self, temp_db, sample_users, sample_rides):
+        """Test that assigning an already accepted ride does not overwrite its driver"""
+        ride_id = sample_rides[0]
+        Ride.accept_ride(ride_id, "driver@test.com")
+
+        success, message = Ride.assign_driver(ride_id, "admin@test.com")
+
+        assert success is False
+        assert "pending" in message.lower()
+        ride = dict(temp_db.fetch("SELECT driver_email FROM rides WHERE id = ?", (ride_id,))[0])
+        assert ride["driver_email"] == "driver@test.com"
+
+    def test_accept_ride_lost_race_is_reported(self, temp_db, sample_users, sample_rides, monkeypatch):
+        """Test that a guarded UPDATE touching no rows is reported as a lost race"""
+        ride_id = sample_rides[0]
+        original = Ride.check_overlap
+
+        def overlap_then_lose(*args, **kwargs):
+            # Another driver takes the ride between the checks and the update
+            temp_db.execute("UPDATE rides SET status = 'accepted' WHERE id = ?", (ride_id,))
+            return original(*args, **kwargs)
+
+        monkeypatch.setattr(Ride, "check_overlap", staticmethod(overlap_then_lose))
+
+        success, message = Ride.accept_ride(ride_id, "driver@test.com")
+
+        assert success is False
+        assert "no longer available" in message.lower()
+
+    @pytest.mark.slow
+    def test_accept_contention_benchmark(self):
+        """Test that multi-process accepts never double-book a ride"""
+        from benchmarks.bench_accept_contention import run
+
+        result = run(rides=40, workers=3)
+
+        assert result["accepted"] == 40
+        assert result["accepted_in_db"] == 40
+        assert result["lost_races"] == 80
@@ -0,0 +1,177 @@
+"""
+Tests for the offline road-network routing engine
+"""
+import heapq
+import math
+import random
+import pytest
+from models import road_network, routing
+from models.road_network import RoadNetwork, haversine
+from models.ride import Ride
+
+# A 5 x 5 street grid around Kathmandu with ~0.55 km blocks
+ORIGIN = (27.70, 85.30)
+STEP = 0.005
+
+
+def grid_network(size=5, **kwargs):
+    nodes = [(ORIGIN[0] + r * STEP, ORIGIN[1] + c * STEP) for r in range(size) for c in range(size)]
+    edges = []
+    for r in range(size):
+        for c in range(size):
+            u = r * size + c
+            if c + 1 < size:
+                edges.append((u, u + 1, haversine(*nodes[u], *nodes[u + 1])))
+            if r + 1 < size:
+                edges.append((u, u + size, haversine(*nodes[u], *nodes[u + size])))
+    return RoadNetwork(nodes, edges, **kwargs)
+
+
+def dijkstra(network, source, target):
+    best = {source: 0.0}
+    heap = [(0.0, source)]
+    while heap:
+        dist, node = heapq.heappop(heap)
+        if node == target:
+            return dist
+        if dist > best[node]:
+            continue
+        for neighbour, length in network.adjacency[node]:
+            if dist + length < best.get(neighbour, math.inf):
+                best[neighbour] = dist + length
+                heapq.heappush(heap, (dist + length, neighbour))
+    return None
+
+
+OSM_EXTRACT = """<?xml version="1.0" encoding="UTF-8"?>
+<osm version="0.6">
+  <node id="1" lat="27.700" lon="85.300"/>
+  <node id="2" lat="27.700" lon="85.305"/>
+  <node id="3" lat="27.705" lon="85.305"/>
+  <node id="4" lat="27.705" lon="85.300"/>
+  <way id="10">
+    <nd ref="1"/><nd ref="2"/><nd ref="3"/>
+    <tag k="highway" v="residential"/>
+  </way>
+  <way id="11">
+    <nd ref="3"/><nd ref="4"/>
+    <tag k="highway" v="primary"/>
+    <tag k="oneway" v="yes"/>
+  </way>
+  <way id="12">
+    <nd ref="4"/><nd ref="1"/>
+    <tag k="highway" v="footway"/>
+  </way>
+</osm>
+"""
+
+
+class TestRoadNetwork:
+    """Test cases for RoadNetwork"""
+
+    def test_grid_shortest_path(self):
+        """Test that a corner-to-corner trip follows the streets"""
+        network = grid_network()
+        # North first, then east along the (slightly shorter) northern street
+        north = haversine(*ORIGIN, ORIGIN[0] + 4 * STEP, ORIGIN[1])
+        east = haversine(ORIGIN[0] + 4 * STEP, ORIGIN[1], ORIGIN[0] + 4 * STEP, ORIGIN[1] + 4 * STEP)
+
+        distance = network.shortest_path_km(0, 24)
+
+        assert distance == pytest.approx(north + east)
+        assert distance > haversine(*ORIGIN, ORIGIN[0] + 4 * STEP, ORIGIN[1] + 4 * STEP)
+
+    def test_astar_matches_dijkstra(self):
+        """Test A* against plain Dijkstra on a graph with random detours"""
+        rng = random.Random(3)
+        base = grid_network(size=6)
+        edges = [(u, v, length * rng.uniform(1.0, 3.0)) for u, v, length, _ in base.edges]
+        network = RoadNetwork(list(zip(base.lats, base.lngs)), edges)
+
+        for _ in range(30):
+            source, target = rng.randrange(36), rng.randrange(36)
+            assert network.shortest_path_km(source, target) == pytest.approx(dijkstra(network, source, target))
+
+    def test_oneway_and_unreachable(self):
+        """Test that one-way edges are only followed forwards"""
+        nodes = [(27.70, 85.30), (27.70, 85.31), (27.71, 85.31)]
+        network = RoadNetwork(nodes, [(0, 1, 1.0, True), (1, 2, 1.2)])
+
+        assert network.shortest_path_km(0, 2) == pytest.approx(2.2)
+        assert network.shortest_path_km(2, 0) is None
+
+    def test_nearest_node_snaps_within_range(self):
+        """Test snapping to the closest node and rejecting far-away points"""
+        network = grid_network()
+
+        node, km = network.nearest_node(ORIGIN[0] + 0.0004, ORIGIN[1] + STEP + 0.0003)
+        assert node == 1
+        assert km < 0.06
+
+        assert network.nearest_node(28.2096, 83.9856) == (None, None)  # Pokhara
+
+    def test_nearest_node_across_cells(self):
+        """Test that the true nearest node wins even when it sits in a neighbouring cell"""
+        nodes = [(27.7099, 85.3099), (27.7150, 85.3150)]
+        network = RoadNetwork(nodes, [(0, 1, 1.0)])
+
+        node, _ = network.nearest_node(27.7101, 85.3101)
+        assert node == 0
+
+    def test_driving_distance_adds_snap_legs(self):
+        """Test the point-to-point distance used for quotes"""
+        network = grid_network()
+        pickup = (ORIGIN[0] + 0.0002, ORIGIN[1])
+        dest = (ORIGIN[0] + 4 * STEP, ORIGIN[1] + 4 * STEP + 0.0002)
+
+        expected = (haversine(*pickup, *ORIGIN) + network.shortest_path_km(0, 24)
+                    + haversine(*dest, ORIGIN[0] + 4 * STEP, ORIGIN[1] + 4 * STEP))
+        assert network.driving_distance(pickup, dest) == pytest.approx(expected)
+        assert network.driving_distance(pickup, (28.2096, 83.9856)) is None
+
+    def test_save_and_load(self, tmp_path):
+        """Test that a saved graph loads back with the same routes"""
+        path = str(tmp_path / "graph.json")
+        network = grid_network()
+        network.save(path)
+
+        loaded = RoadNetwork.from_file(path)
+        assert len(loaded) == len(network)
+        assert loaded.shortest_path_km(3, 21) == pytest.approx(network.shortest_path_km(3, 21))
+
+    def test_from_osm(self, tmp_path):
+        """Test converting an OSM extract, skipping non-drivable ways"""
+        path = tmp_path / "extract.osm"
+        path.write_text(OSM_EXTRACT)
+
+        network = RoadNetwork.from_osm(str(path))
+
+        assert len(network) == 4
+        # 1 -> 4 must go round via 2, 3 because the footway is not drivable
+        assert network.shortest_path_km(0, 3) == pytest.approx(
+            sum(length for _, _, length, _ in network.edges)
+        )
+        # 4 -> 3 is against the one-way street
+        assert network.shortest_path_km(3, 2) is None
+
+
+class TestOfflineRouting:
+    """Test cases for routing through the road graph"""
+
+    @pytest.fixture
+    def network(self, monkeypatch):
+        network = grid_network()
+        monkeypatch.setattr(road_network, "_road_network", network)
+        monkeypatch.setattr(road_network, "_road_network_loaded", True)
+        return network
+
+    def test_graph_is_used_before_osrm(self, network, monkeypatch):
+        """Test that in-area quotes never reach OSRM"""
+        def fail(*args, **kwargs):
+            raise AssertionError("OSRM should not be called")
+
+        monkeypatch.setattr(routing, "fetch_osrm_distance", fail)
+        pickup, dest = ORIGIN, (ORIGIN[0] + STEP, ORIGIN[1] + 2 * STEP)
+
+        assert routing.driving_distance(pickup, dest) == pytest.approx(network.driving_distance(pickup, dest))
+        assert Ride.calculate_driving_distance(pickup, dest) == pytest.approx(network.driving_distance(pickup, dest))
@@ -0,0 +1,51 @@
+"""
+Tests for the rollup maintenance command
+"""
+from database import rollups
+from models.admin import Admin
+from models.ride import Ride
+
+
+class TestRollups:
+    """Test cases for checking and rebuilding the ride rollups"""
+
+    def test_current_rollups_are_not_stale(self, temp_db, sample_users, sample_rides):
+        """Test that trigger-maintained rollups match the rides table"""
+        Ride.cancel_ride(sample_rides[0], "customer@test.com")
+
+        assert rollups.stale_buckets(temp_db) == {}
+
+    def test_rebuild_repairs_stale_rollups(self, temp_db, sample_users, sample_rides):
+        """Test that rebuild recomputes rows the triggers did not see"""
+        expected = Admin.analytics_snapshot()
+        temp_db.execute("DELETE FROM ride_stats_hourly")
+        temp_db.execute("UPDATE ride_stats_daily SET rides = rides + 10")
+
+        stale = rollups.stale_buckets(temp_db)
+        assert set(stale) == {"ride_stats_hourly", "ride_stats_daily"}
+        assert Admin.analytics_snapshot().total_rides == 0
+
+        rollups.rebuild(temp_db)
+
+        assert rollups.stale_buckets(temp_db) == {}
+        assert Admin.analytics_snapshot() == expected
+
+    def test_main_reports_and_rebuilds(self, temp_db, sample_users, sample_rides, capsys):
+        """Test the check and rebuild commands against the shared database"""
+        temp_db.execute("DELETE FROM ride_stats_daily")
+
+        assert rollups.main(["check"]) == 1
+        assert "ride_stats_daily" in capsys.readouterr().out
+
+        assert rollups.main(["rebuild"]) == 0
+        assert rollups.main(["check"]) == 0
+
+    def test_snapshot_counts_undated_rides(self, temp_db, sample_users, sample_rides):
+        """Test that rides outside the rollups still count in the snapshot"""
+        Ride.create_ride("customer@test.com", "A", "B", "soon", 2.0, 5.0, 275.0, 0.0, 475.0)
+
+        snapshot = Admin.analytics_snapshot()
+
+        assert snapshot.total_rides == Admin.total_rides() == 4
+        assert abs(snapshot.total_revenue - Admin.total_revenue()) < 0.01
+        assert abs(snapshot.average_duration - Admin.average_duration()) < 0.001
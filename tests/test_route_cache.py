@@ -0,0 +1,201 @@
+"""
+Tests for the persistent route cache and cached driving distances
+"""
+import pytest
+from database import route_cache as route_cache_module
+from database.route_cache import RouteCache
+from models import routing
+
+PICKUP = (27.7172, 85.3240)
+DEST = (27.6710, 85.4298)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = RouteCache(path=str(tmp_path / "routes.db"))
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def routing_cache(tmp_path, monkeypatch):
+    """Point models.routing at a throwaway cache"""
+    cache = RouteCache(path=str(tmp_path / "routing.db"))
+    monkeypatch.setattr(routing, "_route_cache", cache)
+    monkeypatch.setattr(routing, "get_road_network", lambda: None)
+    yield cache
+    cache.close()
+
+
+class TestRouteCache:
+    """Test cases for RouteCache"""
+
+    def test_miss_then_hit(self, cache):
+        """Test that a stored distance is returned on the next lookup"""
+        assert cache.get(PICKUP, DEST) is None
+        cache.put(PICKUP, DEST, 14.2)
+
+        assert cache.get(PICKUP, DEST) == 14.2
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+        assert stats["hit_rate"] == 0.5
+
+    def test_keys_are_rounded(self, cache):
+        """Test that clicks a few meters apart share an entry"""
+        cache.put(PICKUP, DEST, 14.2)
+
+        nearby = (PICKUP[0] + 0.00001, PICKUP[1] - 0.00001)
+        assert cache.get(nearby, DEST) == 14.2
+        assert cache.get(DEST, PICKUP) is None
+
+    def test_precision_is_configurable(self, tmp_path):
+        """Test that a coarser precision merges more distant points"""
+        cache = RouteCache(path=str(tmp_path / "coarse.db"), precision=2)
+        cache.put(PICKUP, DEST, 14.2)
+
+        assert cache.get((27.7201, 85.3210), DEST) == 14.2
+        cache.close()
+
+    def test_persists_across_instances(self, tmp_path):
+        """Test that entries survive reopening the cache file"""
+        path = str(tmp_path / "persist.db")
+        first = RouteCache(path=path)
+        first.put(PICKUP, DEST, 14.2)
+        first.close()
+
+        second = RouteCache(path=path)
+        assert second.get(PICKUP, DEST) == 14.2
+        second.close()
+
+    def test_entries_expire(self, tmp_path, monkeypatch):
+        """Test that entries older than the TTL are treated as misses"""
+        now = [1000.0]
+        monkeypatch.setattr(route_cache_module.time, "time", lambda: now[0])
+        cache = RouteCache(path=str(tmp_path / "ttl.db"), ttl_seconds=60)
+        cache.put(PICKUP, DEST, 14.2)
+
+        now[0] += 59
+        assert cache.get(PICKUP, DEST) == 14.2
+        now[0] += 2
+        assert cache.get(PICKUP, DEST) is None
+        assert cache.stats()["entries"] == 0
+        cache.close()
+
+    def test_least_recently_used_is_evicted(self, tmp_path, monkeypatch):
+        """Test that the cache stays within max_entries, dropping the coldest entry"""
+        now = [1000.0]
+        monkeypatch.setattr(route_cache_module.time, "time", lambda: now[0])
+        cache = RouteCache(path=str(tmp_path / "lru.db"), max_entries=2, memory_entries=0)
+
+        cache.put((27.1, 85.1), DEST, 1.0)
+        now[0] += 1
+        cache.put((27.2, 85.2), DEST, 2.0)
+        now[0] += 1
+        cache.get((27.1, 85.1), DEST)  # refreshes the first entry
+        now[0] += 1
+        cache.put((27.3, 85.3), DEST, 3.0)
+
+        assert cache.stats()["entries"] == 2
+        assert cache.get((27.1, 85.1), DEST) == 1.0
+        assert cache.get((27.2, 85.2), DEST) is None
+        assert cache.get((27.3, 85.3), DEST) == 3.0
+        cache.close()
+
+    def test_memory_hits_count_as_use(self, tmp_path, monkeypatch):
+        """Test that a key hit often from memory survives an eviction"""
+        now = [1000.0]
+        monkeypatch.setattr(route_cache_module.time, "time", lambda: now[0])
+        cache = RouteCache(path=str(tmp_path / "lru.db"), max_entries=3)
+
+        for lat in (27.1, 27.2, 27.3):
+            cache.put((lat, 85.0), DEST, lat)
+            now[0] += 1
+        for _ in range(100):
+            cache.get((27.1, 85.0), DEST)
+            now[0] += 1
+        cache.put((27.4, 85.0), DEST, 27.4)
+
+        assert cache.get((27.1, 85.0), DEST) == 27.1
+        assert cache.get((27.2, 85.0), DEST) is None
+        cache.close()
+
+    def test_get_many(self, tmp_path, monkeypatch):
+        """Test that a bulk lookup matches get() without touching the counters"""
+        now = [1000.0]
+        monkeypatch.setattr(route_cache_module.time, "time", lambda: now[0])
+        cache = RouteCache(path=str(tmp_path / "bulk.db"), ttl_seconds=60)
+        cache.put((27.1, 85.0), DEST, 1.0)
+        now[0] += 61
+        cache.put((27.2, 85.0), DEST, 2.0)
+
+        pairs = [((27.1, 85.0), DEST), ((27.2, 85.0), DEST), (PICKUP, DEST), ((27.2, 85.0), DEST)]
+        assert cache.get_many([cache.make_key(*pair) for pair in pairs]) == [None, 2.0, None, 2.0]
+        assert cache.get_many([]) == []
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["entries"]) == (0, 0, 2)
+        cache.close()
+
+
+class TestSharedRouteCache:
+    """Test cases for models.routing.get_route_cache"""
+
+    def test_first_use_from_many_threads_opens_one_cache(self, tmp_path, monkeypatch):
+        """Test that routing workers racing to first use share a single cache"""
+        import threading
+        import time
+
+        opened = []
+
+        def slow_cache():
+            time.sleep(0.05)
+            opened.append(RouteCache(path=str(tmp_path / "shared.db")))
+            return opened[-1]
+
+        monkeypatch.setattr(routing, "_route_cache", None)
+        monkeypatch.setattr(routing, "RouteCache", slow_cache)
+        caches = []
+        threads = [threading.Thread(target=lambda: caches.append(routing.get_route_cache())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(opened) == 1
+        assert all(cache is opened[0] for cache in caches)
+        opened[0].close()
+
+
+class TestDrivingDistance:
+    """Test cases for models.routing.driving_distance"""
+
+    def test_routed_distance_is_cached(self, routing_cache, monkeypatch):
+        """Test that only the first quote for a route reaches OSRM"""
+        calls = []
+
+        def fake_fetch(pickup, dest, timeout=15):
+            calls.append((pickup, dest))
+            return 16.8
+
+        monkeypatch.setattr(routing, "fetch_osrm_distance", fake_fetch)
+
+        assert routing.driving_distance(PICKUP, DEST) == 16.8
+        assert routing.driving_distance(PICKUP, DEST) == 16.8
+        assert len(calls) == 1
+        assert routing.offline_distance(PICKUP, DEST) == 16.8
+
+    def test_fallback_is_not_cached(self, routing_cache, monkeypatch):
+        """Test that a straight-line fallback is used but not remembered"""
+        monkeypatch.setattr(routing, "fetch_osrm_distance", lambda *args, **kwargs: None)
+
+        distance = routing.driving_distance(PICKUP, DEST)
+
+        assert distance == pytest.approx(routing.Ride.calculate_distance(PICKUP, DEST))
+        assert routing_cache.stats()["entries"] == 0
+
+    def test_driving_route_flags_the_fallback(self, routing_cache, monkeypatch):
+        """Test that only the straight-line fallback is marked approximate"""
+        monkeypatch.setattr(routing, "fetch_osrm_distance", lambda *args, **kwargs: None)
+        assert routing.driving_route(PICKUP, DEST).approximate
+
+        routing_cache.put(PICKUP, DEST, 16.8)
+        assert routing.driving_route(PICKUP, DEST) == routing.RouteDistance(16.8, False)
@@ -0,0 +1,230 @@
+"""
+Tests for the routing client against a local stand-in OSRM server
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from database.route_cache import RouteCache
+from models import routing
+from models.routing import CircuitBreaker, RoutingClient
+
+PICKUP = (27.7172, 85.3240)
+DEST = (27.6710, 85.4298)
+
+
+class StubOSRM(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(self.path)
+        server.client_ports.add(self.client_address[1])
+        if server.delay:
+            time.sleep(server.delay)
+
+        if server.body is not None:
+            body = server.body
+        elif server.status != 200:
+            body = b"unavailable"
+        elif server.no_route:
+            body = json.dumps({"code": "NoRoute", "routes": []}).encode()
+        else:
+            body = json.dumps({"code": "Ok", "routes": [{"distance": 12345.0}]}).encode()
+        self.send_response(server.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def osrm():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubOSRM)
+    server.daemon_threads = True
+    server.requests = []
+    server.client_ports = set()
+    server.status = 200
+    server.no_route = False
+    server.body = None  # raw response body, overriding the above
+    server.delay = 0
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(osrm):
+    client = RoutingClient(base_url=osrm.url, timeout=(1, 1))
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def routing_setup(tmp_path, monkeypatch, client):
+    """Route models.routing through the stub server and a throwaway cache"""
+    cache = RouteCache(path=str(tmp_path / "routes.db"))
+    monkeypatch.setattr(routing, "_route_cache", cache)
+    monkeypatch.setattr(routing, "get_road_network", lambda: None)
+    monkeypatch.setattr(routing, "_routing_client", client)
+    yield client
+    cache.close()
+
+
+class TestRoutingClient:
+    """Test cases for RoutingClient"""
+
+    def test_fetch_distance(self, osrm, client):
+        """Test the request format and meters-to-km conversion"""
+        assert client.fetch_distance(PICKUP, DEST) == 12.345
+        assert osrm.requests[0].startswith("/route/v1/driving/85.324,27.7172;85.4298,27.671?")
+
+    def test_connections_are_reused(self, osrm, client):
+        """Test that repeated quotes share one keep-alive connection"""
+        for _ in range(5):
+            client.fetch_distance(PICKUP, DEST)
+
+        assert len(osrm.requests) == 5
+        assert len(osrm.client_ports) == 1
+
+    def test_no_route_is_not_a_failure(self, osrm, client):
+        """Test that a healthy backend without a route keeps the circuit closed"""
+        osrm.no_route = True
+        for _ in range(5):
+            assert client.fetch_distance(PICKUP, DEST) is None
+
+        assert client.breaker.state == "closed"
+        assert len(osrm.requests) == 5
+
+    def test_slow_backend_times_out(self, osrm, client):
+        """Test that a stalled backend gives up after the read timeout"""
+        osrm.delay = 1.5
+        started = time.monotonic()
+
+        assert client.fetch_distance(PICKUP, DEST, timeout=(1, 0.2)) is None
+        assert time.monotonic() - started < 1.0
+
+    def test_circuit_opens_on_failures(self, osrm):
+        """Test that a failing backend is skipped once the circuit opens"""
+        osrm.status = 500
+        client = RoutingClient(base_url=osrm.url, breaker=CircuitBreaker(failure_threshold=3, reset_timeout=0.2))
+
+        for _ in range(5):
+            assert client.fetch_distance(PICKUP, DEST) is None
+        assert len(osrm.requests) == 3
+        assert client.breaker.state == "open"
+
+        # After the reset timeout one trial call goes through and closes the circuit
+        time.sleep(0.25)
+        osrm.status = 200
+        assert client.fetch_distance(PICKUP, DEST) == 12.345
+        assert client.breaker.state == "closed"
+        client.close()
+
+    def test_failed_trial_reopens_circuit(self):
+        """Test the half-open state"""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        assert not breaker.allow()
+
+        time.sleep(0.06)
+        assert breaker.state == "half-open"
+        assert breaker.allow()
+        assert not breaker.allow()  # only one trial at a time
+        breaker.record_failure()
+        assert breaker.state == "open"
+
+    def test_dead_backend(self):
+        """Test that a refused connection counts as a failure"""
+        client = RoutingClient(base_url="http://127.0.0.1:9", breaker=CircuitBreaker(failure_threshold=1))
+
+        assert client.fetch_distance(PICKUP, DEST) is None
+        assert client.breaker.state == "open"
+        client.close()
+
+
+class TestBackgroundQuotes:
+    """Test cases for RoutingClient.submit"""
+
+    def test_submit_routes_and_caches(self, routing_setup):
+        """Test that a background quote calls back and fills the cache"""
+        results = []
+        request = routing_setup.submit(PICKUP, DEST, callback=results.append)
+
+        assert request.result(timeout=5) == (12.345, False)
+        assert results == [routing.RouteDistance(12.345, False)]
+        assert routing.offline_distance(PICKUP, DEST) == 12.345
+
+    def test_submit_uses_its_own_client(self, osrm, tmp_path, monkeypatch):
+        """Test that a client's quotes go through that client, not the shared one"""
+        def no_shared_client():
+            raise AssertionError("used the shared routing client")
+
+        cache = RouteCache(path=str(tmp_path / "routes.db"))
+        monkeypatch.setattr(routing, "_route_cache", cache)
+        monkeypatch.setattr(routing, "get_routing_client", no_shared_client)
+        client = RoutingClient(base_url=osrm.url, timeout=(1, 1))
+        try:
+            assert client.submit(PICKUP, DEST).result(timeout=5).km == 12.345
+            assert len(osrm.requests) == 1
+        finally:
+            client.close()
+            cache.close()
+
+    def test_cancelled_quote_does_not_call_back(self, osrm, routing_setup):
+        """Test cooperative cancellation of an in-flight quote"""
+        osrm.delay = 0.3
+        results = []
+        request = routing_setup.submit(PICKUP, DEST, callback=results.append)
+        time.sleep(0.1)
+
+        request.cancel()
+        time.sleep(0.4)
+
+        assert request.cancelled
+        assert results == []
+
+    def test_open_circuit_falls_back_immediately(self, osrm, routing_setup):
+        """Test that quotes use the straight line while the backend is down"""
+        osrm.status = 503
+        for _ in range(3):
+            routing.route(PICKUP, DEST)
+        requests_before = len(osrm.requests)
+
+        distance = routing.route(PICKUP, DEST)
+
+        assert distance.approximate
+        assert distance.km == pytest.approx(routing.Ride.calculate_distance(PICKUP, DEST))
+        assert len(osrm.requests) == requests_before
+
+    def test_malformed_body_falls_back(self, osrm, routing_setup):
+        """Test that an unexpected 200 body fails over to the straight line and still calls back"""
+        straight_line = routing.Ride.calculate_distance(PICKUP, DEST)
+        for body in ({"code": "Ok", "routes": [{"duration": 60.0}]}, ["Ok"], {"code": "Ok", "routes": "none"}):
+            osrm.body = json.dumps(body).encode()
+            results = []
+
+            distance = routing_setup.submit(PICKUP, DEST, callback=results.append).result(timeout=5)
+
+            assert distance.approximate
+            assert distance.km == pytest.approx(straight_line)
+            assert results == [distance]
+        assert routing_setup.breaker.state == "open"
+
+    def test_fallback_quote_is_flagged(self, osrm, routing_setup):
+        """Test that a background quote says when it is the straight-line fallback"""
+        osrm.status = 503
+        results = []
+
+        distance = routing_setup.submit(PICKUP, DEST, callback=results.append).result(timeout=5)
+
+        assert distance.approximate
+        assert distance.km == pytest.approx(routing.Ride.calculate_distance(PICKUP, DEST))
+        assert results == [distance]
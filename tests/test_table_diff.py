@@ -0,0 +1,83 @@
+"""
+Tests for the incremental table diffs
+"""
+from ui.table_diff import diff_operations
+
+
+def ride(ride_id, pickup, status="pending"):
+    return {"id": ride_id, "pickup_datetime": pickup, "status": status}
+
+
+def pending_key(row):
+    return row["pickup_datetime"], row["id"]
+
+
+def apply(rows, ops):
+    rows = list(rows)
+    for op, index, row in ops:
+        if op == "remove":
+            del rows[index]
+        elif op == "insert":
+            rows.insert(index, row)
+        else:
+            rows[index] = row
+    return rows
+
+
+class TestDiffOperations:
+    """Test cases for diff_operations"""
+
+    ROWS = [ride(1, "2030-01-01 09:00"), ride(2, "2030-01-01 10:00"), ride(3, "2030-01-01 11:00")]
+
+    def test_insert_keeps_sort_order(self):
+        """Test that a new row lands in its sorted position"""
+        ops = diff_operations(self.ROWS, [ride(4, "2030-01-01 09:30")], sort_key=pending_key)
+
+        assert ops == [("insert", 1, ride(4, "2030-01-01 09:30"))]
+        assert [row["id"] for row in apply(self.ROWS, ops)] == [1, 4, 2, 3]
+
+    def test_update_in_place(self):
+        """Test that a change that keeps the sort key is an update"""
+        changed = dict(self.ROWS[1], total_cost=500.0)
+
+        assert diff_operations(self.ROWS, [changed], sort_key=pending_key) == [("update", 1, changed)]
+
+    def test_moved_row(self):
+        """Test that a changed sort key moves the row"""
+        moved = ride(1, "2030-01-01 12:00")
+        ops = diff_operations(self.ROWS, [moved], sort_key=pending_key)
+
+        assert [op for op, _, _ in ops] == ["remove", "insert"]
+        assert [row["id"] for row in apply(self.ROWS, ops)] == [2, 3, 1]
+
+    def test_rows_failing_keep_are_removed(self):
+        """Test that an accepted ride leaves the pending table"""
+        accepted = ride(2, "2030-01-01 10:00", status="accepted")
+        ops = diff_operations(self.ROWS, [accepted, ride(9, "2030-01-02 10:00", status="accepted")],
+                              sort_key=pending_key, keep=lambda row: row["status"] == "pending")
+
+        assert ops == [("remove", 1, None)]
+
+    def test_deleted_ids(self):
+        """Test tombstones, ignoring ids that are not loaded"""
+        ops = diff_operations(self.ROWS, [], removed_ids=[3, 42], sort_key=pending_key)
+
+        assert ops == [("remove", 2, None)]
+
+    def test_rows_past_loaded_pages_wait(self):
+        """Test that with more pages to come, later rows are not inserted early"""
+        late = ride(5, "2030-02-01 10:00")
+        early = ride(6, "2030-01-01 08:00")
+
+        ops = diff_operations(self.ROWS, [late, early], sort_key=pending_key, complete=False)
+        assert ops == [("insert", 0, early)]
+
+        ops = diff_operations(self.ROWS, [late], sort_key=pending_key, complete=True)
+        assert ops == [("insert", 3, late)]
+
+    def test_replaying_changes_is_harmless(self):
+        """Test that changes already applied produce only updates"""
+        new = ride(4, "2030-01-01 09:30")
+        rows = apply(self.ROWS, diff_operations(self.ROWS, [new], sort_key=pending_key))
+
+        assert diff_operations(rows, [new], sort_key=pending_key) == [("update", 1, new)]
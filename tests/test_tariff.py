@@ -0,0 +1,82 @@
+"""
+Tests for the fare tariff
+"""
+import json
+import numpy as np
+import pytest
+from models import tariff as tariff_module
+from models.tariff import Tariff, get_tariff, set_tariff
+from models.ride import Ride
+
+
+@pytest.fixture
+def restore_tariff():
+    yield
+    set_tariff(None)
+
+
+class TestTariff:
+    """Test cases for Tariff and the cached active tariff"""
+
+    def test_default_rates(self):
+        """Test the built-in Nepal local vehicle rates"""
+        tariff = Tariff()
+
+        assert tariff.base_fare == 25.0
+        assert tariff.rate_per_meter == 0.05
+        assert tariff.waiting_cost_per_hour == 200.0
+
+    def test_breakdown(self):
+        """Test the itemized fare the customer window displays"""
+        fare = Tariff().breakdown(10.0, 2.0, 50.0)
+
+        assert fare["distance_cost"] == 500.0
+        assert fare["waiting_cost"] == 400.0
+        assert fare["base_cost"] == 525.0
+        assert fare["total_cost"] == 975.0
+
+    def test_calculate_costs_matches_scalar(self):
+        """Test the batch pricing against calculate_cost row by row"""
+        rng = np.random.default_rng(7)
+        distances = rng.uniform(0, 40, 1000)
+        durations = rng.integers(0, 24, 1000).astype(float)
+        tips = rng.choice([0.0, 20.0, 50.0], 1000)
+
+        base_costs, total_costs = Ride.calculate_costs(distances, durations, tips)
+
+        for i in range(0, 1000, 97):
+            base_cost, total_cost = Ride.calculate_cost(distances[i], durations[i], tips[i])
+            assert base_costs[i] == pytest.approx(base_cost)
+            assert total_costs[i] == pytest.approx(total_cost)
+
+    def test_calculate_costs_broadcasts_scalars(self):
+        """Test that a scalar tip and duration apply to every ride"""
+        base_costs, total_costs = Tariff().calculate_costs([1.0, 2.0, 3.0], 1.0)
+
+        np.testing.assert_allclose(base_costs, [75.0, 125.0, 175.0])
+        np.testing.assert_allclose(total_costs, [275.0, 325.0, 375.0])
+
+    def test_active_tariff_is_cached(self, restore_tariff):
+        """Test that get_tariff loads once"""
+        assert get_tariff() is get_tariff()
+
+    def test_set_tariff_changes_ride_prices(self, restore_tariff):
+        """Test that Ride.calculate_cost follows the active tariff"""
+        set_tariff(Tariff(base_fare=100.0, rate_per_meter=0.1, waiting_cost_per_hour=0.0))
+
+        base_cost, total_cost = Ride.calculate_cost(1.0, 5.0, 10.0)
+
+        assert base_cost == 200.0
+        assert total_cost == 210.0
+
+    def test_tariff_loaded_from_file(self, tmp_path, monkeypatch, restore_tariff):
+        """Test loading rates from a JSON tariff file"""
+        path = tmp_path / "tariff.json"
+        path.write_text(json.dumps({"base_fare": 30, "rate_per_meter": 0.06, "waiting_cost_per_hour": 150}))
+        monkeypatch.setattr(tariff_module, "TARIFF_PATH", str(path))
+        set_tariff(None)
+
+        tariff = get_tariff()
+
+        assert tariff.base_fare == 30.0
+        assert tariff.waiting_cost_per_hour == 150.0
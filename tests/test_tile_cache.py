@@ -0,0 +1,173 @@
+"""
+Tests for the offline tile cache and the Leaflet asset bundle
+"""
+import os
+import pytest
+import requests
+from ui import map_page
+from ui.tile_cache import KATHMANDU_BBOX, TileCache, main, tile_xy, tiles_for_bbox
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 92  # 100 bytes
+
+
+class FakeResponse:
+    def __init__(self, status_code, content=b""):
+        self.status_code = status_code
+        self.content = content
+
+
+class FakeSession:
+    """Stands in for requests.Session; answers from a dict of url -> bytes"""
+
+    def __init__(self, pages=None, fail=False):
+        self.pages = pages or {}
+        self.fail = fail
+        self.urls = []
+
+    def get(self, url, timeout=None):
+        self.urls.append(url)
+        if self.fail:
+            raise requests.ConnectionError("offline")
+        if url in self.pages:
+            return FakeResponse(200, self.pages[url])
+        if url.endswith(".png"):
+            return FakeResponse(200, PNG)
+        return FakeResponse(404)
+
+
+class TestTileMath:
+    """Test cases for slippy-map tile numbering"""
+
+    def test_tile_xy(self):
+        """Test tiles for known points"""
+        assert tile_xy(0.0, 0.0, 1) == (1, 1)
+        assert tile_xy(85.0, -180.0, 2) == (0, 0)
+        assert tile_xy(27.7172, 85.3240, 12) == (3018, 1719)
+
+    def test_tiles_for_bbox(self):
+        """Test that the Kathmandu box is covered by a small block of tiles"""
+        tiles = list(tiles_for_bbox(KATHMANDU_BBOX, 14))
+
+        assert len(tiles) == len(set(tiles)) == 90
+        assert all(z == 14 for z, _, _ in tiles)
+        assert (14,) + tile_xy(27.7172, 85.3240, 14) in tiles
+
+
+class TestTileCache:
+    """Test cases for TileCache"""
+
+    def test_put_and_get(self, tmp_path):
+        """Test that stored tiles are read back from disk"""
+        cache = TileCache(cache_dir=str(tmp_path))
+        assert cache.get(12, 3018, 1719) is None
+
+        cache.put(12, 3018, 1719, PNG)
+
+        assert cache.get(12, 3018, 1719) == PNG
+        assert os.path.exists(tmp_path / "12" / "3018" / "1719.png")
+        assert cache.total_bytes == 100
+
+    def test_least_recently_used_is_evicted(self, tmp_path):
+        """Test the size bound, keeping recently read tiles"""
+        cache = TileCache(cache_dir=str(tmp_path), max_bytes=250)
+        cache.put(12, 1, 1, PNG)
+        cache.put(12, 1, 2, PNG)
+        cache.get(12, 1, 1)
+
+        cache.put(12, 1, 3, PNG)
+
+        assert (12, 1, 1) in cache
+        assert (12, 1, 2) not in cache
+        assert (12, 1, 3) in cache
+        assert cache.total_bytes == 200
+        assert not os.path.exists(cache.path_for(12, 1, 2))
+
+    def test_index_survives_restart(self, tmp_path):
+        """Test that a new cache picks up tiles already on disk, oldest first"""
+        cache = TileCache(cache_dir=str(tmp_path))
+        cache.put(12, 1, 1, PNG)
+        cache.put(12, 1, 2, PNG)
+        os.utime(cache.path_for(12, 1, 1), (1000, 1000))
+        (tmp_path / "12" / "1" / "notes.txt").write_text("ignored")
+
+        reopened = TileCache(cache_dir=str(tmp_path), max_bytes=150)
+        assert len(reopened) == 2
+        reopened.put(12, 1, 3, PNG)
+
+        assert (12, 1, 1) not in reopened
+        assert (12, 1, 2) not in reopened
+        assert (12, 1, 3) in reopened
+
+    def test_fetch_stores_tile(self, tmp_path):
+        """Test that a downloaded tile lands in the cache"""
+        session = FakeSession()
+        cache = TileCache(cache_dir=str(tmp_path), session=session)
+
+        assert cache.fetch(12, 3018, 1719) == PNG
+        assert session.urls == ["https://tile.openstreetmap.org/12/3018/1719.png"]
+        assert cache.get(12, 3018, 1719) == PNG
+
+    def test_fetch_failure(self, tmp_path):
+        """Test that an unreachable tile server caches nothing"""
+        cache = TileCache(cache_dir=str(tmp_path), session=FakeSession(fail=True))
+
+        assert cache.fetch(12, 3018, 1719) is None
+        assert len(cache) == 0
+
+    def test_prefetch_skips_cached_tiles(self, tmp_path):
+        """Test warming an area, then warming it again"""
+        session = FakeSession()
+        cache = TileCache(cache_dir=str(tmp_path), session=session)
+
+        expected = len(list(tiles_for_bbox(KATHMANDU_BBOX, 12))) + len(list(tiles_for_bbox(KATHMANDU_BBOX, 13)))
+
+        assert cache.prefetch(KATHMANDU_BBOX, zooms=[12, 13]) == (expected, 0)
+        assert cache.prefetch(KATHMANDU_BBOX, zooms=[12, 13]) == (0, 0)
+        assert len(session.urls) == expected
+
+    def test_prefetch_limit(self, tmp_path):
+        """Test that oversized prefetches are refused before downloading"""
+        session = FakeSession()
+        cache = TileCache(cache_dir=str(tmp_path), session=session)
+
+        with pytest.raises(ValueError):
+            cache.prefetch(KATHMANDU_BBOX, zooms=[16], max_tiles=100)
+        assert session.urls == []
+
+
+class TestMapAssets:
+    """Test cases for the offline page and the Leaflet bundle"""
+
+    def test_offline_page_uses_ridemap_urls(self):
+        """Test that an offline page has no network URLs for assets or tiles"""
+        html = map_page.render_map_page(offline=True)
+
+        assert "ridemap://tiles/{z}/{x}/{y}.png" in html
+        assert "ridemap://assets/leaflet/leaflet.js" in html
+        assert "unpkg.com" not in html
+        assert "raw.githubusercontent.com" not in html
+
+    def test_fetch_assets(self, tmp_path):
+        """Test downloading the bundle and reporting what failed"""
+        css_path, css_url = map_page.ASSET_SOURCES["leaflet_css"]
+        js_path, js_url = map_page.ASSET_SOURCES["leaflet_js"]
+        session = FakeSession({css_url: b".leaflet {}", js_url: b"var L = {};"})
+
+        missing = map_page.fetch_assets(vendor_dir=str(tmp_path), session=session)
+
+        assert missing == []
+        assert (tmp_path / "leaflet" / "leaflet.js").read_bytes() == b"var L = {};"
+        assert map_page.upstream_url(js_path) == js_url
+
+        # Already bundled files are not downloaded again
+        session.urls.clear()
+        assert map_page.fetch_assets(vendor_dir=str(tmp_path), session=session) == []
+        assert session.urls == []
+
+    def test_prefetch_command(self, tmp_path, monkeypatch):
+        """Test the command-line entry point"""
+        cache = TileCache(cache_dir=str(tmp_path), session=FakeSession())
+        monkeypatch.setattr("ui.tile_cache._tile_cache", cache)
+
+        assert main(["prefetch", "--zooms", "12"]) == 0
+        assert len(cache) == 12
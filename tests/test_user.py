@@ -107,6 +107,13 @@ class TestUser:
         assert "driver@test.com" in emails
         assert "admin@test.com" in emails
     
+    def test_get_all_users_paged(self, sample_users):
+        """Test paging through users by email"""
+        first = User.get_all_users(limit=2)
+        rest = User.get_all_users(limit=2, after_email=first[-1]["email"])
+
+        assert [user["email"] for user in first + rest] == sorted(user[0] for user in sample_users)
+
     def test_delete_user(self, temp_db, sample_users):
         """Test user deletion"""
         email = "customer@test.com"
@@ -291,13 +291,9 @@ def view_all_bookings():
     print_separator()
     print("ALL BOOKINGS")
     
-    rides = Admin.get_rides()
-    
-    if not rides:
-        print("No bookings found.")
-        return
-    
-    for ride in rides:
+    found = False
+    for ride in Admin.iter_rides():
+        found = True
         print(f"\nBooking ID: {ride['id']}")
         print(f"Customer: {ride['customer_email']}")
         print(f"Driver: {ride.get('driver_email') or 'Not assigned'}")
@@ -305,6 +301,9 @@ def view_all_bookings():
         print(f"Destination: {ride['destination']}")
         print(f"Date/Time: {ride['pickup_datetime']}")
         print(f"Status: {ride['status']}")
+    
+    if not found:
+        print("No bookings found.")
 
 
 def assign_driver():
@@ -370,15 +369,12 @@ def view_analytics():
     print_separator()
     print("ANALYTICS")
     
-    total_rides = Admin.total_rides()
-    total_revenue = Admin.total_revenue()
-    avg_duration = Admin.average_duration()
-    busiest_hour = Admin.busiest_hour() or "N/A"
+    analytics = Admin.analytics_snapshot()
     
-    print(f"Total Rides: {total_rides}")
-    print(f"Total Revenue: Rs {total_revenue:.2f}")
-    print(f"Average Ride Duration: {avg_duration:.2f} hours")
-    print(f"Busiest Pickup Hour: {busiest_hour}")
+    print(f"Total Rides: {analytics.total_rides}")
+    print(f"Total Revenue: Rs {analytics.total_revenue:.2f}")
+    print(f"Average Ride Duration: {analytics.average_duration:.2f} hours")
+    print(f"Busiest Pickup Hour: {analytics.busiest_hour or 'N/A'}")
 
 
 def login():
@@ -1,12 +1,27 @@
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
-    QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox,
-    QDesktopWidget, QInputDialog
+    QMessageBox, QDesktopWidget, QInputDialog, QComboBox
 )
 from PyQt5.QtGui import QIcon
 from PyQt5.QtCore import Qt
+from datetime import date, timedelta
 
 from models.admin import Admin
+from models.ride import Ride
+from ui.async_loader import AsyncLoader
+from ui.change_watcher import get_change_watcher
+from ui.table_models import ButtonDelegate, LazyTableModel, table_view
+from ui.timeseries_chart import TimeSeriesChart
+
+TREND_METRICS = [
+    ("Rides", "rides"),
+    ("Revenue (Rs)", "revenue"),
+    ("Cancellations", "cancellations"),
+    ("Average Fare (Rs)", "average_fare"),
+]
+TREND_BUCKETS = [("Daily", "day"), ("Weekly", "week"), ("Hourly", "hour")]
+# Days back from the end of today
+TREND_RANGES = [("Last 7 days", 7), ("Last 30 days", 30), ("Last 90 days", 90), ("Last 365 days", 365)]
 
 
 class AdminWindow(QWidget):
@@ -17,10 +32,19 @@ class AdminWindow(QWidget):
         self.setMinimumSize(500, 700)
         self.center_and_resize_window()
 
+        # Queries run on a thread pool; results come back as signals
+        self.loader = AsyncLoader(self)
+
+        # Rides changed after this marker are merged into the table by refresh_rides()
+        self.change_marker = Ride.change_marker()
+
         self.setup_ui()
         self.load_users()
         self.load_rides()
         self.load_analytics()
+        self.load_trend()
+
+        get_change_watcher().changed.connect(self.on_data_changed)
 
     # -------------------------------------------------------
     # CENTER AND RESIZE WINDOW
@@ -59,15 +83,46 @@ class AdminWindow(QWidget):
         self.analytics_label.setStyleSheet("font-size: 16px; margin-bottom: 15px;")
         main_layout.addWidget(self.analytics_label)
 
+        # ---------------- Trends ----------------
+        trend_controls = QHBoxLayout()
+        trend_title = QLabel("Trends")
+        trend_title.setStyleSheet("font-size: 18px; font-weight: bold;")
+        trend_controls.addWidget(trend_title)
+        trend_controls.addStretch()
+        self.trend_metric = QComboBox()
+        self.trend_bucket = QComboBox()
+        self.trend_range = QComboBox()
+        for combo, choices in ((self.trend_metric, TREND_METRICS), (self.trend_bucket, TREND_BUCKETS),
+                               (self.trend_range, TREND_RANGES)):
+            for label, value in choices:
+                combo.addItem(label, value)
+            trend_controls.addWidget(combo)
+        self.trend_range.setCurrentIndex(1)
+        main_layout.addLayout(trend_controls)
+
+        self.trend_chart = TimeSeriesChart()
+        main_layout.addWidget(self.trend_chart)
+        for combo in (self.trend_metric, self.trend_bucket, self.trend_range):
+            combo.currentIndexChanged.connect(self.load_trend)
+
         # ---------------- Users Table ----------------
         user_title = QLabel("Users Management")
         user_title.setStyleSheet("font-size: 18px; font-weight: bold; margin-top: 10px;")
         main_layout.addWidget(user_title)
 
-        self.user_table = QTableWidget()
-        self.user_table.setColumnCount(7)
-        self.user_table.setHorizontalHeaderLabels(["Email", "Username", "Role", "Name", "Address", "Phone", "Action"])
-        self.user_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.user_model = LazyTableModel([
+            ("Email", lambda user: user["email"]),
+            ("Username", lambda user: user["username"]),
+            ("Role", lambda user: user["role"]),
+            ("Name", lambda user: user.get("name") or "-"),
+            ("Address", lambda user: user.get("address") or "-"),
+            ("Phone", lambda user: user.get("phone_number") or "-"),
+            ("Action", lambda user: "", lambda user: "Delete"),
+        ], fetch_page=Admin.get_users, page_key=lambda user: user["email"], loader=self.loader, parent=self)
+
+        delete_buttons = ButtonDelegate("assets/icons/delete.svg")
+        delete_buttons.clicked.connect(lambda row: self.delete_user(self.user_model.row(row)["email"]))
+        self.user_table = table_view(self.user_model, {6: delete_buttons})
         main_layout.addWidget(self.user_table)
 
         # ---------------- Rides Table ----------------
@@ -75,12 +130,21 @@ class AdminWindow(QWidget):
         rides_title.setStyleSheet("font-size: 18px; font-weight: bold; margin-top: 20px;")
         main_layout.addWidget(rides_title)
 
-        self.rides_table = QTableWidget()
-        self.rides_table.setColumnCount(7)
-        self.rides_table.setHorizontalHeaderLabels(
-            ["ID", "Customer", "Driver", "Pickup", "Destination", "Status", "Assign Driver"]
-        )
-        self.rides_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.rides_model = LazyTableModel([
+            ("ID", lambda ride: str(ride["id"])),
+            ("Customer", lambda ride: str(ride["customer_email"])),
+            ("Driver", lambda ride: str(ride["driver_email"] or "-")),
+            ("Pickup", lambda ride: str(ride["pickup_location"])),
+            ("Destination", lambda ride: str(ride["destination"])),
+            ("Status", lambda ride: ride["status"]),
+            # Assign Driver button for pending rides
+            ("Assign Driver", lambda ride: "-",
+             lambda ride: "Assign Driver" if ride["status"] == "pending" else None),
+        ], fetch_page=Admin.get_rides, loader=self.loader, parent=self)
+
+        assign_buttons = ButtonDelegate("assets/icons/accept.svg")
+        assign_buttons.clicked.connect(lambda row: self.assign_driver(self.rides_model.row(row)["id"]))
+        self.rides_table = table_view(self.rides_model, {6: assign_buttons})
         main_layout.addWidget(self.rides_table)
 
         self.setLayout(main_layout)
@@ -89,21 +153,8 @@ class AdminWindow(QWidget):
     # LOAD USERS
     # -------------------------------------------------------
     def load_users(self):
-        users = Admin.get_users()
-        self.user_table.setRowCount(len(users))
-
-        for row, user in enumerate(users):
-            self.user_table.setItem(row, 0, QTableWidgetItem(user["email"]))
-            self.user_table.setItem(row, 1, QTableWidgetItem(user["username"]))
-            self.user_table.setItem(row, 2, QTableWidgetItem(user["role"]))
-            self.user_table.setItem(row, 3, QTableWidgetItem(user.get("name") or "-"))
-            self.user_table.setItem(row, 4, QTableWidgetItem(user.get("address") or "-"))
-            self.user_table.setItem(row, 5, QTableWidgetItem(user.get("phone_number") or "-"))
-
-            btn = QPushButton("Delete")
-            btn.setIcon(QIcon("assets/icons/delete.svg"))
-            btn.clicked.connect(lambda _, email=user["email"]: self.delete_user(email))
-            self.user_table.setCellWidget(row, 6, btn)
+        # Pages after the first are read as the table is scrolled
+        self.user_model.reload()
 
     def delete_user(self, email):
         confirm = QMessageBox.question(
@@ -116,30 +167,30 @@ class AdminWindow(QWidget):
             self.load_users()
             self.load_rides()
             self.load_analytics()
+            self.load_trend()
 
     # -------------------------------------------------------
     # LOAD RIDES
     # -------------------------------------------------------
     def load_rides(self):
-        rides = Admin.get_rides()
-        self.rides_table.setRowCount(len(rides))
-
-        for row, ride in enumerate(rides):
-            self.rides_table.setItem(row, 0, QTableWidgetItem(str(ride["id"])))
-            self.rides_table.setItem(row, 1, QTableWidgetItem(str(ride["customer_email"])))
-            self.rides_table.setItem(row, 2, QTableWidgetItem(str(ride["driver_email"] or "-")))
-            self.rides_table.setItem(row, 3, QTableWidgetItem(str(ride["pickup_location"])))
-            self.rides_table.setItem(row, 4, QTableWidgetItem(str(ride["destination"])))
-            self.rides_table.setItem(row, 5, QTableWidgetItem(ride["status"]))
-            
-            # Add Assign Driver button for pending rides
-            if ride["status"] == "pending":
-                assign_btn = QPushButton("Assign Driver")
-                assign_btn.setIcon(QIcon("assets/icons/accept.svg"))
-                assign_btn.clicked.connect(lambda _, ride_id=ride["id"]: self.assign_driver(ride_id))
-                self.rides_table.setCellWidget(row, 6, assign_btn)
-            else:
-                self.rides_table.setItem(row, 6, QTableWidgetItem("-"))
+        self.rides_model.reload()
+
+    # -------------------------------------------------------
+    # AUTO REFRESH - only rides changed since the last look
+    # -------------------------------------------------------
+    def on_data_changed(self):
+        if self.isVisible():
+            self.refresh_rides()
+            self.load_analytics()
+            self.load_trend()
+
+    def refresh_rides(self):
+        self.loader.load("changes", Ride.get_changes, self.change_marker, on_done=self.apply_changes)
+
+    def apply_changes(self, changes):
+        self.change_marker, changed, removed = changes
+        if changed or removed:
+            self.rides_model.apply_changes(changed, removed)
 
     # -------------------------------------------------------
     # ASSIGN DRIVER
@@ -158,11 +209,10 @@ class AdminWindow(QWidget):
         )
         
         if ok and driver_email:
-            from models.ride import Ride
             success, message = Ride.assign_driver(ride_id, driver_email)
             if success:
                 QMessageBox.information(self, "Success", message)
-                self.load_rides()
+                self.refresh_rides()
             else:
                 QMessageBox.warning(self, "Error", message)
 
@@ -170,19 +220,32 @@ class AdminWindow(QWidget):
     # LOAD ANALYTICS
     # -------------------------------------------------------
     def load_analytics(self):
-        total_rides = Admin.total_rides()
-        total_revenue = Admin.total_revenue()
-        avg_duration = Admin.average_duration()
-        busiest = Admin.busiest_hour() or "N/A"
+        if not self.analytics_label.text():
+            self.analytics_label.setText("Loading analytics...")
+        self.loader.load("analytics", Admin.analytics_snapshot, on_done=self.show_analytics,
+                         on_error=lambda message: self.analytics_label.setText(f"Could not load analytics: {message}"))
 
+    def show_analytics(self, analytics):
         analytics_text = f"""
-        Total Rides: {total_rides}
-        Total Revenue: Rs {total_revenue:.2f}
-        Average Ride Duration: {avg_duration:.2f} hours
-        Busiest Pickup Hour: {busiest}
+        Total Rides: {analytics.total_rides}
+        Total Revenue: Rs {analytics.total_revenue:.2f}
+        Average Ride Duration: {analytics.average_duration:.2f} hours
+        Busiest Pickup Hour: {analytics.busiest_hour or "N/A"}
         """
         self.analytics_label.setText(analytics_text)
 
+    # -------------------------------------------------------
+    # LOAD TRENDS - one metric over the chosen range
+    # -------------------------------------------------------
+    def load_trend(self):
+        end = date.today() + timedelta(days=1)
+        start = end - timedelta(days=self.trend_range.currentData())
+        if not self.trend_chart.points:
+            self.trend_chart.show_message("Loading...")
+        self.loader.load("trend", Admin.timeseries, self.trend_metric.currentData(), start, end,
+                         self.trend_bucket.currentData(), on_done=self.trend_chart.set_points,
+                         on_error=lambda message: self.trend_chart.show_message(f"Could not load trend: {message}"))
+
     # -------------------------------------------------------
     # LOGOUT
     # -------------------------------------------------------
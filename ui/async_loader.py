@@ -0,0 +1,83 @@
+"""
+Background data loading for the dashboards.
+
+AsyncLoader runs model calls on a QThreadPool and delivers each result on
+the GUI thread through a queued signal, so a slow or busy database never
+blocks repaints. Worker threads read on their own SQLite connections (see
+Database._thread_reader).
+
+Loads are named: starting a load supersedes any unfinished load with the
+same name, whose result is then dropped.
+"""
+import traceback
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class _Task(QRunnable):
+    def __init__(self, loader, seq, fn, args):
+        super().__init__()
+        self.loader = loader
+        self.seq = seq
+        self.fn = fn
+        self.args = args
+
+    def run(self):
+        try:
+            result = self.fn(*self.args)
+        except Exception as e:
+            traceback.print_exc()
+            self._emit("failed", str(e))
+            return
+        self._emit("finished", result)
+
+    def _emit(self, signal, value):
+        try:
+            getattr(self.loader, signal).emit(self.seq, value)
+        except RuntimeError:
+            # The window (and its loader) closed while this was running
+            pass
+
+
+class AsyncLoader(QObject):
+    # (load sequence number, result / error message), emitted from worker threads
+    finished = pyqtSignal(int, object)
+    failed = pyqtSignal(int, str)
+
+    def __init__(self, parent=None, pool=None):
+        super().__init__(parent)
+        self.pool = pool or QThreadPool.globalInstance()
+        self._seq = 0
+        # name -> seq of its latest load; seq -> (name, on_done, on_error)
+        self._latest = {}
+        self._callbacks = {}
+        self.finished.connect(self._on_finished)
+        self.failed.connect(self._on_failed)
+
+    def load(self, name, fn, *args, on_done, on_error=None):
+        """Run fn(*args) in the pool; on_done(result) runs on the GUI thread."""
+        self._seq += 1
+        self._latest[name] = self._seq
+        self._callbacks[self._seq] = (name, on_done, on_error)
+        self.pool.start(_Task(self, self._seq, fn, args))
+        return self._seq
+
+    def is_loading(self, name):
+        return name in self._latest
+
+    def _take(self, seq):
+        name, on_done, on_error = self._callbacks.pop(seq, (None, None, None))
+        if name is None or self._latest.get(name) != seq:
+            return None, None
+        del self._latest[name]
+        return on_done, on_error
+
+    def _on_finished(self, seq, result):
+        on_done, _ = self._take(seq)
+        if on_done is not None:
+            on_done(result)
+
+    def _on_failed(self, seq, message):
+        on_done, on_error = self._take(seq)
+        if on_error is not None:
+            on_error(message)
@@ -0,0 +1,40 @@
+"""
+Auto-refresh for the dashboards.
+
+ChangeWatcher polls PRAGMA data_version (database/change_watcher.py) on a
+timer and emits `changed` only when something was committed, so windows
+re-query after real changes instead of on every tick. Every window
+shares one watcher through get_change_watcher().
+"""
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from database.change_watcher import DataVersionWatcher
+
+POLL_INTERVAL_MS = 1000
+
+
+class ChangeWatcher(QObject):
+    changed = pyqtSignal()
+
+    def __init__(self, interval_ms=POLL_INTERVAL_MS, watcher=None, parent=None):
+        super().__init__(parent)
+        self.watcher = watcher or DataVersionWatcher()
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.poll)
+        self.timer.start()
+
+    def poll(self):
+        if self.watcher.poll():
+            self.changed.emit()
+
+
+_change_watcher = None
+
+
+def get_change_watcher():
+    """The shared watcher, started on first use."""
+    global _change_watcher
+    if _change_watcher is None:
+        _change_watcher = ChangeWatcher()
+    return _change_watcher
@@ -1,21 +1,38 @@
 import os
-import re
-import folium
-import requests
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
-    QLineEdit, QDateTimeEdit, QSpinBox, QMessageBox, QTableWidget,
-    QTableWidgetItem, QHeaderView, QDialog, QFormLayout, QDialogButtonBox,
+    QLineEdit, QDateTimeEdit, QSpinBox, QMessageBox,
+    QDialog, QFormLayout, QDialogButtonBox,
     QDesktopWidget, QSplitter
 )
 from PyQt5.QtGui import QIcon, QPixmap
-from PyQt5.QtWebEngineWidgets import QWebEngineView
-from PyQt5.QtCore import Qt, QUrl, QDateTime, pyqtSlot, QTimer, QThread, pyqtSignal
-from models.ride import Ride
+from PyQt5.QtWebEngineWidgets import QWebEngineView, QWebEngineScript
+from PyQt5.QtWebChannel import QWebChannel
+from PyQt5.QtCore import Qt, QUrl, QDateTime, QObject, QFile, QIODevice, pyqtSlot, pyqtSignal
+from models.ride import MAX_RIDE_HOURS, Ride
+from models import routing
+from models.tariff import get_tariff
+from ui import map_scheme
+from ui.async_loader import AsyncLoader
+from ui.change_watcher import get_change_watcher
+from ui.map_page import SCHEME, map_page_path
+from ui.table_models import ButtonDelegate, LazyTableModel, table_view
 from PyQt5.QtWidgets import QSizePolicy
 
 
+class MapBridge(QObject):
+    """Registered on the page's QWebChannel as `bridge`; the map calls mapClicked on every click"""
+    clicked = pyqtSignal(float, float)
+
+    @pyqtSlot(float, float)
+    def mapClicked(self, lat, lng):
+        self.clicked.emit(lat, lng)
+
+
 class CustomerWindow(QWidget):
+    # (quote sequence number, distance in km, approximate) from a routing worker thread
+    distance_ready = pyqtSignal(int, float, bool)
+
     def __init__(self, user):
         super().__init__()
         self.user = user
@@ -23,12 +40,26 @@ class CustomerWindow(QWidget):
         self.pickup_coords = None
         self.dest_coords = None
 
+        self.distance_request = None
+        self._distance_seq = 0
+        self._distance_callback = None
+        self.distance_ready.connect(self.on_distance_ready)
+
+        # Queries run on a thread pool; results come back as signals
+        self.loader = AsyncLoader(self)
+
+        # Rides changed after this marker are merged into the history by refresh_history()
+        self.change_marker = Ride.change_marker()
+
         self.setWindowTitle("Customer Dashboard")
         self.setMinimumSize(500, 700)
         self.center_and_resize_window()
         
         self.setup_ui()
 
+        # Accepted and completed rides update without a click
+        get_change_watcher().changed.connect(self.on_data_changed)
+
     # -------------------------------------------------------
     # CENTER AND RESIZE WINDOW
     # -------------------------------------------------------
@@ -69,6 +100,7 @@ class CustomerWindow(QWidget):
         # LEFT SIDE → MAP
         # ---------------------------------------------------
         self.map_view = QWebEngineView()
+        self.setup_map_bridge()
         self.load_map()
         left_panel.addWidget(self.map_view)
         self.map_view.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
@@ -114,7 +146,7 @@ class CustomerWindow(QWidget):
         # ---------------- Waiting/Staying Time (Hours) ----------------
         duration_label = QLabel("Waiting/Staying Time (hours):")
         self.duration_input = QSpinBox()
-        self.duration_input.setRange(0, 24)
+        self.duration_input.setRange(0, MAX_RIDE_HOURS)
         self.duration_input.setValue(0)
         self.duration_input.setToolTip("Additional waiting or staying time at destination")
         right_panel.addWidget(duration_label)
@@ -149,10 +181,26 @@ class CustomerWindow(QWidget):
         hist_title.setStyleSheet("font-size: 18px; font-weight: bold; margin-top: 25px;")
         right_panel.addWidget(hist_title)
 
-        self.table = QTableWidget()
-        self.table.setColumnCount(8)
-        self.table.setHorizontalHeaderLabels(["ID", "Pickup", "Destination", "Date", "Cost", "Status", "Cancel", "Update"])
-        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.history_model = LazyTableModel([
+            ("ID", lambda ride: str(ride["id"])),
+            ("Pickup", lambda ride: ride["pickup_location"]),
+            ("Destination", lambda ride: ride["destination"]),
+            ("Date", lambda ride: ride["pickup_datetime"]),
+            ("Cost", lambda ride: f"Rs {ride['total_cost']:.2f}"),
+            ("Status", lambda ride: ride["status"]),
+            # Cancel for pending/accepted rides, Update for pending rides only
+            ("Cancel", lambda ride: "-",
+             lambda ride: "Cancel" if (ride.get("status") or "").lower() in ["pending", "accepted"] else None),
+            ("Update", lambda ride: "-",
+             lambda ride: "Update" if (ride.get("status") or "").lower() == "pending" else None),
+        ], fetch_page=lambda limit, after: Ride.get_customer_rides(self.user.email, limit, after),
+            loader=self.loader, parent=self)
+
+        cancel_buttons = ButtonDelegate("assets/icons/delete.svg", "background-color: #d32f2f; padding: 4px 8px;")
+        cancel_buttons.clicked.connect(lambda row: self.cancel_booking(self.history_model.row(row)["id"]))
+        update_buttons = ButtonDelegate("assets/icons/edit.svg", "background-color: #ff9800; padding: 4px 8px;")
+        update_buttons.clicked.connect(lambda row: self.update_booking(self.history_model.row(row)["id"]))
+        self.table = table_view(self.history_model, {6: cancel_buttons, 7: update_buttons})
         right_panel.addWidget(self.table)
 
         self.load_history()
@@ -172,294 +220,57 @@ class CustomerWindow(QWidget):
         self.setLayout(main_layout)
 
     # -------------------------------------------------------
-    # LOAD MAP
+    # MAP BRIDGE - clicks are pushed from JavaScript, not polled
     # -------------------------------------------------------
-    def load_map(self):
-        # Kathmandu, Nepal coordinates
-        tile_center = (27.7172, 85.3240)
+    def setup_map_bridge(self):
+        page = self.map_view.page()
 
-        m = folium.Map(location=tile_center, zoom_start=12)
+        # qwebchannel.js ships inside QtWebEngine; inject it before the page scripts run
+        api = QFile(":/qtwebchannel/qwebchannel.js")
+        if api.open(QIODevice.ReadOnly):
+            script = QWebEngineScript()
+            script.setName("qwebchannel")
+            script.setSourceCode(bytes(api.readAll()).decode("utf-8"))
+            script.setInjectionPoint(QWebEngineScript.DocumentCreation)
+            script.setWorldId(QWebEngineScript.MainWorld)
+            page.scripts().insert(script)
+            api.close()
 
-        # Save map HTML first
-        map_path = "maps/customer_map.html"
-        m.save(map_path)
-
-        # Read the HTML and inject custom JavaScript for click handling
-        with open(map_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-
-        # Find the map variable name dynamically
-        map_var_match = re.search(r'var (map_\w+) = L\.map\(', html_content)
-        if map_var_match:
-            map_var = map_var_match.group(1)
-        else:
-            # Fallback to a common pattern
-            map_var = 'map_fb402da949a9550e8f7562d58eb2b24f'
-
-        # Create click handler JavaScript
-        click_js = f"""
-        // Custom click handler to send coordinates to console
-        {map_var}.on('click', function(e) {{
-            var lat = e.latlng.lat;
-            var lng = e.latlng.lng;
-            console.log('MAP_CLICK: Latitude: ' + lat + ', Longitude: ' + lng);
-            
-            // Show popup
-            L.popup()
-                .setLatLng(e.latlng)
-                .setContent("Latitude: " + lat.toFixed(5) + "<br>Longitude: " + lng.toFixed(5))
-                .openOn({map_var});
-        }});
-        """
-        
-        # Insert the JavaScript before the closing </script> tag
-        # Find the last occurrence of </script> before </html>
-        last_script_pos = html_content.rfind('</script>')
-        if last_script_pos != -1:
-            # Insert our JavaScript before the closing script tag
-            html_content = html_content[:last_script_pos] + click_js + '\n' + html_content[last_script_pos:]
-
-        # Write the modified HTML back
-        with open(map_path, 'w', encoding='utf-8') as f:
-            f.write(html_content)
-
-        # Load the map and set up JavaScript console message handler
-        self.map_view.load(QUrl.fromLocalFile(os.path.abspath(map_path)))
-        
-        # Connect to page load finished to inject JavaScript
-        self.map_view.page().loadFinished.connect(self.on_map_loaded)
-        
-        # Coordinates will be captured via JavaScript injection in on_map_loaded
-        # We'll use a polling approach with runJavaScript to get coordinates
+        self.map_bridge = MapBridge(self)
+        self.map_bridge.clicked.connect(self.handle_map_click)
+        self.web_channel = QWebChannel(page)
+        self.web_channel.registerObject("bridge", self.map_bridge)
+        page.setWebChannel(self.web_channel)
 
     # -------------------------------------------------------
-    # ON MAP LOADED - Inject JavaScript after page loads
+    # LOAD MAP
     # -------------------------------------------------------
-    def on_map_loaded(self, success):
-        """Inject JavaScript click handler after map loads"""
-        if not success:
-            return
-            
-        # Find the map variable name from the HTML
-        map_path = "maps/customer_map.html"
-        with open(map_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        
-        map_var_match = re.search(r'var (map_\w+) = L\.map\(', html_content)
-        if map_var_match:
-            map_var = map_var_match.group(1)
+    def load_map(self):
+        # Prebuilt page from maps/map_template.html; click handling,
+        # markers and the MapBridge connection are part of the template
+        if map_scheme.install_scheme_handler() is not None:
+            # Leaflet, icons and tiles come from the offline bundle and tile cache
+            map_path = map_page_path(offline=True)
+            self.map_view.load(QUrl(f"{SCHEME}://app/{os.path.basename(map_path)}"))
         else:
-            # Try to find any map variable
-            map_var_match = re.search(r'(map_\w+)', html_content)
-            if map_var_match:
-                map_var = map_var_match.group(1)
-            else:
-                map_var = None
-        
-        if map_var:
-            # Inject click handler using runJavaScript - access map directly
-            click_js = f"""
-            (function() {{
-                try {{
-                    var map = {map_var};
-                    if (map && map instanceof L.Map) {{
-                        // Remove any existing click handlers
-                        map.off('click');
-                        // Add new click handler
-                        // Initialize window storage for coordinates and markers
-                        if (!window.lastMapClick) {{
-                            window.lastMapClick = null;
-                        }}
-                        window.pickupMarker = null;
-                        window.destMarker = null;
-                        window.routeLine = null;
-                        
-                        // Function to add/update pickup marker (green pin icon)
-                        window.addPickupMarker = function(lat, lng) {{
-                            if (window.pickupMarker) {{
-                                window.pickupMarker.remove();
-                            }}
-                            // Create green pin icon
-                            var greenIcon = L.icon({{
-                                iconUrl: 'https://raw.githubusercontent.com/pointhi/leaflet-color-markers/master/img/marker-icon-2x-green.png',
-                                shadowUrl: 'https://cdnjs.cloudflare.com/ajax/libs/leaflet/0.7.7/images/marker-shadow.png',
-                                iconSize: [25, 41],
-                                iconAnchor: [12, 41],
-                                popupAnchor: [1, -34],
-                                shadowSize: [41, 41]
-                            }});
-                            window.pickupMarker = L.marker([lat, lng], {{icon: greenIcon}}).addTo(map);
-                            window.pickupMarker.bindPopup('<b style="color: #4CAF50;">📍 Pickup Location</b><br>Lat: ' + lat.toFixed(5) + '<br>Lng: ' + lng.toFixed(5));
-                        }};
-                        
-                        // Function to add/update destination marker (red pin icon)
-                        window.addDestMarker = function(lat, lng) {{
-                            if (window.destMarker) {{
-                                window.destMarker.remove();
-                            }}
-                            // Create red pin icon
-                            var redIcon = L.icon({{
-                                iconUrl: 'https://raw.githubusercontent.com/pointhi/leaflet-color-markers/master/img/marker-icon-2x-red.png',
-                                shadowUrl: 'https://cdnjs.cloudflare.com/ajax/libs/leaflet/0.7.7/images/marker-shadow.png',
-                                iconSize: [25, 41],
-                                iconAnchor: [12, 41],
-                                popupAnchor: [1, -34],
-                                shadowSize: [41, 41]
-                            }});
-                            window.destMarker = L.marker([lat, lng], {{icon: redIcon}}).addTo(map);
-                            window.destMarker.bindPopup('<b style="color: #F44336;">🎯 Destination</b><br>Lat: ' + lat.toFixed(5) + '<br>Lng: ' + lng.toFixed(5));
-                            
-                            // Draw route line if pickup marker exists
-                            if (window.pickupMarker) {{
-                                if (window.routeLine) {{
-                                    window.routeLine.remove();
-                                }}
-                                var pickupLatLng = window.pickupMarker.getLatLng();
-                                // Draw straight line (will be updated with actual route if available)
-                                window.routeLine = L.polyline([
-                                    [pickupLatLng.lat, pickupLatLng.lng],
-                                    [lat, lng]
-                                ], {{
-                                    color: '#2196F3',
-                                    weight: 4,
-                                    opacity: 0.7,
-                                    dashArray: '10, 5'
-                                }}).addTo(map);
-                                // Fit map to show both markers
-                                var group = new L.featureGroup([window.pickupMarker, window.destMarker]);
-                                map.fitBounds(group.getBounds().pad(0.1));
-                            }}
-                        }};
-                        
-                        // Function to update route line when both markers exist
-                        window.updateRouteLine = function() {{
-                            if (window.pickupMarker && window.destMarker) {{
-                                if (window.routeLine) {{
-                                    window.routeLine.remove();
-                                }}
-                                var pickupLatLng = window.pickupMarker.getLatLng();
-                                var destLatLng = window.destMarker.getLatLng();
-                                window.routeLine = L.polyline([
-                                    [pickupLatLng.lat, pickupLatLng.lng],
-                                    [destLatLng.lat, destLatLng.lng]
-                                ], {{
-                                    color: '#2196F3',
-                                    weight: 4,
-                                    opacity: 0.7,
-                                    dashArray: '10, 5'
-                                }}).addTo(map);
-                                // Fit map to show both markers
-                                var group = new L.featureGroup([window.pickupMarker, window.destMarker]);
-                                map.fitBounds(group.getBounds().pad(0.1));
-                            }}
-                        }};
-                        
-                        map.on('click', function(e) {{
-                            var lat = e.latlng.lat;
-                            var lng = e.latlng.lng;
-                            // Store coordinates in window object for Python to retrieve
-                            window.lastMapClick = {{
-                                lat: lat,
-                                lng: lng,
-                                message: 'MAP_CLICK: Latitude: ' + lat + ', Longitude: ' + lng
-                            }};
-                            console.log(window.lastMapClick.message);
-                            
-                            // Show popup
-                            L.popup()
-                                .setLatLng(e.latlng)
-                                .setContent("Latitude: " + lat.toFixed(5) + "<br>Longitude: " + lng.toFixed(5))
-                                .openOn(map);
-                        }});
-                    }}
-                }} catch(e) {{
-                    console.error('Error setting up map click handler: ' + e);
-                }}
-            }})();
-            """
-            # Run after a short delay to ensure map is fully initialized
-            QTimer.singleShot(500, lambda: self.map_view.page().runJavaScript(click_js))
-            
-            # Set up polling to check for coordinates (less frequent to avoid hanging)
-            self.poll_timer = QTimer()
-            self.poll_timer.timeout.connect(self.poll_coordinates)
-            self.poll_timer.start(500)  # Check every 500ms (reduced frequency)
-
-    # -------------------------------------------------------
-    # POLL COORDINATES - Check for new coordinates from JavaScript
-    # -------------------------------------------------------
-    def poll_coordinates(self):
-        """Poll JavaScript for new coordinates"""
-        js_code = """
-        (function() {
-            if (window.lastMapClick) {
-                var coord = window.lastMapClick;
-                window.lastMapClick = null;  // Clear after reading
-                return coord.message;
-            }
-            return null;
-        })();
-        """
-        self.map_view.page().runJavaScript(js_code, self.handle_coord_result)
-    
-    # -------------------------------------------------------
-    # HANDLE COORDINATE RESULT
-    # -------------------------------------------------------
-    def handle_coord_result(self, result):
-        """Handle coordinate result from JavaScript"""
-        if result:
-            # Convert to string if needed
-            result_str = str(result) if result else ""
-            if result_str and "MAP_CLICK" in result_str:
-                self.handle_js(0, result_str, 0, "")
-    
+            map_path = map_page_path()
+            self.map_view.load(QUrl.fromLocalFile(map_path))
+
     # -------------------------------------------------------
     # HANDLE MAP CLICK
     # -------------------------------------------------------
-    def handle_js(self, level, message, line, sourceID):
-        """
-        Captures text like: "MAP_CLICK: Latitude: 37.77, Longitude: -122.41"
-        """
-        if "MAP_CLICK" in message:
-            try:
-                # Extract latitude and longitude from message
-                # Format: "MAP_CLICK: Latitude: 37.7749, Longitude: -122.4194"
-                # The message format has a comma between lat and lng
-                parts = message.split("Latitude:")[1].split("Longitude:")
-                lat_str = parts[0].strip()
-                lng_str = parts[1].strip()
-                
-                # Remove any trailing commas, spaces, or other non-numeric characters from lat_str
-                # lat_str might be like "37.7749, " so we need to remove the comma
-                lat_str = lat_str.rstrip(',').strip()
-                lng_str = lng_str.strip()
-                
-                # Extract just the numeric part (in case there are any other characters)
-                import re
-                lat_match = re.search(r'(-?\d+\.?\d*)', lat_str)
-                lng_match = re.search(r'(-?\d+\.?\d*)', lng_str)
-                
-                if lat_match and lng_match:
-                    lat = float(lat_match.group(1))
-                    lng = float(lng_match.group(1))
-                else:
-                    # Fallback to direct conversion if regex fails
-                    lat = float(lat_str)
-                    lng = float(lng_str)
-
-                if self.pickup_coords is None:
-                    self.pickup_coords = (lat, lng)
-                    self.pickup_display.setText(f"Pickup: {lat:.5f}, {lng:.5f}")
-                    # Add green marker for pickup
-                    self.add_pickup_marker(lat, lng)
-                else:
-                    self.dest_coords = (lat, lng)
-                    self.dest_display.setText(f"Destination: {lat:.5f}, {lng:.5f}")
-                    # Add red marker for destination
-                    self.add_dest_marker(lat, lng)
-            except (ValueError, IndexError) as e:
-                # Silently handle parsing errors
-                pass
+    def handle_map_click(self, lat, lng):
+        """First click sets the pickup, later clicks set the destination"""
+        if self.pickup_coords is None:
+            self.pickup_coords = (lat, lng)
+            self.pickup_display.setText(f"Pickup: {lat:.5f}, {lng:.5f}")
+            # Add green marker for pickup
+            self.add_pickup_marker(lat, lng)
+        else:
+            self.dest_coords = (lat, lng)
+            self.dest_display.setText(f"Destination: {lat:.5f}, {lng:.5f}")
+            # Add red marker for destination
+            self.add_dest_marker(lat, lng)
 
     # -------------------------------------------------------
     # ADD MARKERS TO MAP
@@ -476,20 +287,7 @@ class CustomerWindow(QWidget):
     
     def remove_markers(self):
         """Remove all markers from map"""
-        js_code = """
-        if (window.pickupMarker) {
-            window.pickupMarker.remove();
-            window.pickupMarker = null;
-        }
-        if (window.destMarker) {
-            window.destMarker.remove();
-            window.destMarker = null;
-        }
-        if (window.routeLine) {
-            window.routeLine.remove();
-            window.routeLine = null;
-        }
-        """
+        js_code = "if (window.removeMarkers) { window.removeMarkers(); }"
         self.map_view.page().runJavaScript(js_code)
 
     # -------------------------------------------------------
@@ -510,78 +308,41 @@ class CustomerWindow(QWidget):
     # -------------------------------------------------------
     def calculate_driving_distance(self, pickup_coords, dest_coords, callback=None):
         """
-        Calculate driving distance using OSRM routing service
-        Returns distance in kilometers (non-blocking)
+        Calculate driving distance via models.routing (road graph, route cache, then OSRM)
+        Returns distance in kilometers (non-blocking); callback(distance_km, approximate)
+        is told whether OSRM failed and the straight-line distance was used
         """
-        # Use a thread to avoid blocking the UI
-        class DistanceCalculatorThread(QThread):
-            distance_calculated = pyqtSignal(float)
-            
-            def __init__(self, pickup_coords, dest_coords):
-                super().__init__()
-                self.pickup_coords = pickup_coords
-                self.dest_coords = dest_coords
-            
-            def run(self):
-                try:
-                    # OSRM routing service (free, no API key required)
-                    # Format: lng,lat (longitude first!)
-                    pickup_lng, pickup_lat = self.pickup_coords[1], self.pickup_coords[0]
-                    dest_lng, dest_lat = self.dest_coords[1], self.dest_coords[0]
-                    
-                    # Use OSRM routing API for actual road distance
-                    url = f"http://router.project-osrm.org/route/v1/driving/{pickup_lng},{pickup_lat};{dest_lng},{dest_lat}?overview=false&alternatives=false"
-                    
-                    response = requests.get(url, timeout=15)
-                    if response.status_code == 200:
-                        data = response.json()
-                        if data.get('code') == 'Ok' and len(data.get('routes', [])) > 0:
-                            # Distance is in meters, convert to kilometers
-                            distance_meters = data['routes'][0]['distance']
-                            distance_km = distance_meters / 1000.0
-                            self.distance_calculated.emit(distance_km)
-                            return
-                except Exception:
-                    # Silently fallback to straight-line distance if routing fails
-                    pass
-                
-                # Fallback to straight-line distance if routing fails
-                fallback_distance = Ride.calculate_distance(self.pickup_coords, self.dest_coords)
-                self.distance_calculated.emit(fallback_distance)
-        
         # If callback provided, use async approach
         if callback:
-            # Stop any existing thread to avoid multiple calculations
-            try:
-                if hasattr(self, 'distance_thread'):
-                    thread = self.distance_thread
-                    if thread and thread.isRunning():
-                        thread.terminate()
-                        thread.wait(1000)  # Wait up to 1 second
-            except (RuntimeError, AttributeError):
-                # Thread object was deleted, ignore
-                pass
-            
-            self.distance_thread = DistanceCalculatorThread(pickup_coords, dest_coords)
-            self.distance_thread.distance_calculated.connect(callback)
-            self.distance_thread.finished.connect(lambda: setattr(self, 'distance_thread', None))
-            self.distance_thread.start()
+            # Only the latest quote matters; drop any earlier one still in flight
+            self._distance_seq += 1
+            if self.distance_request is not None:
+                self.distance_request.cancel()
+                self.distance_request = None
+
+            # Offline answers (road graph or cache) need no worker
+            offline = routing.offline_distance(pickup_coords, dest_coords)
+            if offline is not None:
+                callback(offline, False)
+                return None
+
+            # The worker emits distance_ready; Qt delivers it on the UI thread
+            seq = self._distance_seq
+            self._distance_callback = callback
+            self.distance_request = routing.get_routing_client().submit(
+                pickup_coords, dest_coords,
+                callback=lambda distance: self.distance_ready.emit(seq, distance.km, distance.approximate)
+            )
             return None
         else:
             # Synchronous fallback (with timeout) - not recommended, use callback instead
-            try:
-                pickup_lng, pickup_lat = pickup_coords[1], pickup_coords[0]
-                dest_lng, dest_lat = dest_coords[1], dest_coords[0]
-                url = f"http://router.project-osrm.org/route/v1/driving/{pickup_lng},{pickup_lat};{dest_lng},{dest_lat}?overview=false&alternatives=false"
-                response = requests.get(url, timeout=5)
-                if response.status_code == 200:
-                    data = response.json()
-                    if data.get('code') == 'Ok' and len(data.get('routes', [])) > 0:
-                        distance_meters = data['routes'][0]['distance']
-                        return distance_meters / 1000.0
-            except:
-                pass
-            return Ride.calculate_distance(pickup_coords, dest_coords)
+            return routing.driving_distance(pickup_coords, dest_coords)
+
+    def on_distance_ready(self, seq, distance, approximate):
+        if seq != self._distance_seq:
+            return  # a newer quote was requested meanwhile
+        self.distance_request = None
+        self._distance_callback(distance, approximate)
 
     # -------------------------------------------------------
     # COST CALCULATION
@@ -598,27 +359,29 @@ class CustomerWindow(QWidget):
         self.cost_label.setText("Calculating distance...")
         
         # Use non-blocking driving distance calculation
-        def on_distance_calculated(distance):
-            base_cost, total_cost = Ride.calculate_cost(distance, duration, tip)
-            # Show breakdown with road distance
-            # Calculate breakdown for display
-            distance_meters = distance * 1000
-            distance_cost = distance_meters * 0.05  # Rs 50 per meter
-            waiting_cost = duration * 200  # Rs 200 per hour
-            base_fare = 25  # Rs 25 base
+        def on_distance_calculated(distance, approximate):
+            # Same tariff that Ride.calculate_cost prices with
+            fare = get_tariff().breakdown(distance, duration, tip)
             
-            # Show detailed breakdown (formatted to fit screen)
+            # Show detailed breakdown (formatted to fit screen); a straight-line
+            # distance is shorter than the road, so say the quote is an estimate
+            if approximate:
+                total_line = f"Total: ~Rs {fare['total_cost']:.2f} (approximate)\n"
+                distance_line = f"Distance: ~{distance:.2f} km (straight line, no road route)\n"
+            else:
+                total_line = f"Total: Rs {fare['total_cost']:.2f}\n"
+                distance_line = f"Distance: {distance:.2f} km\n"
             cost_text = (
-                f"Total: Rs {total_cost:.2f}\n"
-                f"Distance: {distance:.2f} km\n"
-                f"Base: Rs {base_fare:.2f}\n"
-                f"Distance Cost: Rs {distance_cost:.2f}\n"
-                f"Waiting: Rs {waiting_cost:.2f}"
+                total_line +
+                distance_line +
+                f"Base: Rs {fare['base_fare']:.2f}\n"
+                f"Distance Cost: Rs {fare['distance_cost']:.2f}\n"
+                f"Waiting: Rs {fare['waiting_cost']:.2f}"
             )
             self.cost_label.setText(cost_text)
             self._distance = distance
-            self._base_cost = base_cost
-            self._total_cost = total_cost
+            self._base_cost = fare["base_cost"]
+            self._total_cost = fare["total_cost"]
             self._tip = tip
         
         # Calculate distance asynchronously
@@ -653,7 +416,7 @@ class CustomerWindow(QWidget):
                 QMessageBox.information(self, "Success", "Ride updated successfully.")
                 self.editing_ride_id = None
                 self.req_btn.setText("Submit Ride Request")
-                self.load_history()
+                self.refresh_history()
             else:
                 QMessageBox.warning(self, "Error", message)
             return
@@ -672,44 +435,31 @@ class CustomerWindow(QWidget):
         )
 
         QMessageBox.information(self, "Success", "Ride request submitted!")
-        self.load_history()
+        self.refresh_history()
 
     # -------------------------------------------------------
     # LOAD RIDE HISTORY
     # -------------------------------------------------------
     def load_history(self):
-        rides = Ride.get_customer_rides(self.user.email)
-        self.table.setRowCount(len(rides))
-
-        for row, ride in enumerate(rides):
-            self.table.setItem(row, 0, QTableWidgetItem(str(ride["id"])))
-            self.table.setItem(row, 1, QTableWidgetItem(ride["pickup_location"]))
-            self.table.setItem(row, 2, QTableWidgetItem(ride["destination"]))
-            self.table.setItem(row, 3, QTableWidgetItem(ride["pickup_datetime"]))
-            self.table.setItem(row, 4, QTableWidgetItem(f"Rs {ride['total_cost']:.2f}"))
-            self.table.setItem(row, 5, QTableWidgetItem(ride["status"]))
-            
-            status_lower = (ride.get("status") or "").lower()
-
-            # Add Cancel button for pending/accepted rides
-            if status_lower in ["pending", "accepted"]:
-                cancel_btn = QPushButton("Cancel")
-                cancel_btn.setIcon(QIcon("assets/icons/delete.svg"))
-                cancel_btn.setStyleSheet("background-color: #d32f2f; padding: 4px 8px;")
-                cancel_btn.clicked.connect(lambda _, ride_id=ride["id"]: self.cancel_booking(ride_id))
-                self.table.setCellWidget(row, 6, cancel_btn)
-            else:
-                self.table.setItem(row, 6, QTableWidgetItem("-"))
-            
-            # Add Update button for pending rides only
-            if status_lower == "pending":
-                update_btn = QPushButton("Update")
-                update_btn.setIcon(QIcon("assets/icons/edit.svg"))
-                update_btn.setStyleSheet("background-color: #ff9800; padding: 4px 8px;")
-                update_btn.clicked.connect(lambda _, ride_id=ride["id"]: self.update_booking(ride_id))
-                self.table.setCellWidget(row, 7, update_btn)
-            else:
-                self.table.setItem(row, 7, QTableWidgetItem("-"))
+        # Pages after the first are read as the table is scrolled
+        self.history_model.reload()
+
+    # -------------------------------------------------------
+    # REFRESH - apply only the rides changed since the last look
+    # -------------------------------------------------------
+    def on_data_changed(self):
+        if self.isVisible():
+            self.refresh_history()
+
+    def refresh_history(self):
+        self.loader.load("changes", Ride.get_changes, self.change_marker, on_done=self.apply_changes)
+
+    def apply_changes(self, changes):
+        self.change_marker, changed, removed = changes
+        if changed or removed:
+            self.history_model.apply_changes(
+                changed, removed, keep=lambda ride: ride["customer_email"] == self.user.email
+            )
 
     # -------------------------------------------------------
     # CANCEL BOOKING
@@ -724,7 +474,7 @@ class CustomerWindow(QWidget):
             success = Ride.cancel_ride(ride_id, self.user.email)
             if success:
                 QMessageBox.information(self, "Success", f"Booking #{ride_id} cancelled.")
-                self.load_history()
+                self.refresh_history()
             else:
                 QMessageBox.warning(self, "Error", "Could not cancel booking. It may have already been completed.")
 
@@ -733,27 +483,20 @@ class CustomerWindow(QWidget):
     # -------------------------------------------------------
     def update_booking(self, ride_id):
         """Update a pending booking using the main form and map."""
-        import ast
-
-        # Get current ride details
-        rides = Ride.get_customer_rides(self.user.email)
-        ride = next((r for r in rides if r["id"] == ride_id), None)
+        # The ride's row is already loaded in the history table
+        ride = self.history_model.find_row(lambda r: r["id"] == ride_id)
         if not ride or (ride.get("status") or "").lower() != "pending":
             QMessageBox.warning(self, "Error", "Can only update pending bookings.")
             return
 
-        # Parse stored coordinates (stringified tuples)
-        def parse_coords(value):
-            try:
-                coords = ast.literal_eval(value)
-                if isinstance(coords, (list, tuple)) and len(coords) == 2:
-                    return float(coords[0]), float(coords[1])
-            except Exception:
+        # Numeric coordinate columns are filled by the database from the stored text
+        def stored_coords(lat, lng):
+            if lat is None or lng is None:
                 return None
-            return None
+            return float(lat), float(lng)
 
-        pickup = parse_coords(ride.get("pickup_location"))
-        dest = parse_coords(ride.get("destination"))
+        pickup = stored_coords(ride.get("pickup_lat"), ride.get("pickup_lng"))
+        dest = stored_coords(ride.get("dest_lat"), ride.get("dest_lng"))
 
         # Set editing mode
         self.editing_ride_id = ride_id
@@ -829,6 +572,8 @@ class CustomerWindow(QWidget):
             QMessageBox.Yes | QMessageBox.No, QMessageBox.No
         )
         if reply == QMessageBox.Yes:
+            if self.distance_request is not None:
+                self.distance_request.cancel()
             self.login_window = LoginWindow()
             self.login_window.show()
             self.close()
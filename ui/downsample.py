@@ -0,0 +1,29 @@
+"""
+Point reduction for the admin charts, kept free of Qt so it can be tested.
+
+A year of hourly buckets is thousands of points for a chart a few hundred
+pixels wide. min_max_indices() keeps, for each pixel column, the lowest and
+highest point in it (plus the first and last point overall), so spikes and
+dips survive while the line drawn has at most two points per column.
+"""
+
+
+def min_max_indices(values, columns):
+    """
+    Sorted indices of `values` to draw across `columns` pixel columns.
+    Everything is kept when there are no more than two values per column.
+    """
+    count = len(values)
+    if columns <= 0 or count <= 2 * columns:
+        return list(range(count))
+
+    keep = {0, count - 1}
+    for column in range(columns):
+        first = column * count // columns
+        last = (column + 1) * count // columns
+        if first == last:
+            continue
+        span = range(first, last)
+        keep.add(min(span, key=values.__getitem__))
+        keep.add(max(span, key=values.__getitem__))
+    return sorted(keep)
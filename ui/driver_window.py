@@ -2,12 +2,15 @@ import os
 import webbrowser
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
-    QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox, QDesktopWidget
+    QMessageBox, QDesktopWidget
 )
 from PyQt5.QtGui import QIcon
 from PyQt5.QtCore import Qt
 
 from models.ride import Ride
+from ui.async_loader import AsyncLoader
+from ui.change_watcher import get_change_watcher
+from ui.table_models import ButtonDelegate, LazyTableModel, table_view
 
 
 class DriverWindow(QWidget):
@@ -19,10 +22,19 @@ class DriverWindow(QWidget):
         self.setMinimumSize(500, 700)
         self.center_and_resize_window()
 
+        # Queries run on a thread pool; results come back as signals
+        self.loader = AsyncLoader(self)
+
+        # Rides changed after this marker are merged into the tables by refresh_rides()
+        self.change_marker = Ride.change_marker()
+
         self.setup_ui()
         self.load_pending_rides()
         self.load_history()
 
+        # New and taken rides show up without the driver doing anything
+        get_change_watcher().changed.connect(self.on_data_changed)
+
     # -------------------------------------------------------
     # CENTER AND RESIZE WINDOW
     # -------------------------------------------------------
@@ -59,12 +71,18 @@ class DriverWindow(QWidget):
         pending_title.setStyleSheet("font-size: 16px; font-weight: bold;")
         main_layout.addWidget(pending_title)
 
-        self.pending_table = QTableWidget()
-        self.pending_table.setColumnCount(8)
-        self.pending_table.setHorizontalHeaderLabels(
-            ["ID", "Customer", "Customer Phone", "Pickup", "Destination", "Cost", "Accept", "Directions"]
-        )
-        self.pending_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.pending_model = LazyTableModel(self.ride_columns() + [
+            ("Accept", lambda ride: "", lambda ride: "Accept"),
+            ("Directions", lambda ride: "", lambda ride: "Directions"),
+        ], fetch_page=Ride.get_pending_rides,
+            page_key=lambda ride: (ride["pickup_datetime"], ride["id"]), loader=self.loader, parent=self)
+
+        accept_buttons = ButtonDelegate("assets/icons/accept.svg")
+        accept_buttons.clicked.connect(lambda row: self.accept_ride(self.pending_model.row(row)["id"]))
+        self.pending_table = table_view(self.pending_model, {
+            6: accept_buttons,
+            7: self.directions_buttons(self.pending_model),
+        })
         main_layout.addWidget(self.pending_table)
 
         # Ride History
@@ -72,44 +90,48 @@ class DriverWindow(QWidget):
         history_title.setStyleSheet("font-size: 16px; font-weight: bold; margin-top: 20px;")
         main_layout.addWidget(history_title)
 
-        self.history_table = QTableWidget()
-        self.history_table.setColumnCount(8)
-        self.history_table.setHorizontalHeaderLabels(
-            ["ID", "Customer", "Customer Phone", "Pickup", "Destination", "Cost", "Status", "Directions"]
-        )
-        self.history_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.history_model = LazyTableModel(self.ride_columns() + [
+            # Complete button for accepted rides, otherwise the status
+            ("Status", lambda ride: ride["status"],
+             lambda ride: "Complete" if ride["status"] == "accepted" else None),
+            ("Directions", lambda ride: "", lambda ride: "Directions"),
+        ], fetch_page=lambda limit, after: Ride.get_driver_rides(self.user.email, limit, after),
+            loader=self.loader, parent=self)
+
+        complete_buttons = ButtonDelegate("assets/icons/complete.svg")
+        complete_buttons.clicked.connect(lambda row: self.complete_ride(self.history_model.row(row)["id"]))
+        self.history_table = table_view(self.history_model, {
+            6: complete_buttons,
+            7: self.directions_buttons(self.history_model),
+        })
         main_layout.addWidget(self.history_table)
 
         self.setLayout(main_layout)
 
+    def ride_columns(self):
+        """Columns shared by the pending and history tables"""
+        return [
+            ("ID", lambda ride: str(ride["id"])),
+            ("Customer", lambda ride: ride["customer_email"]),
+            ("Customer Phone", lambda ride: str(ride.get("customer_phone") or "-")),
+            ("Pickup", lambda ride: ride["pickup_location"]),
+            ("Destination", lambda ride: ride["destination"]),
+            ("Cost", lambda ride: f"Rs {ride['total_cost']:.2f}"),
+        ]
+
+    def directions_buttons(self, model):
+        buttons = ButtonDelegate("assets/icons/map.svg")
+        buttons.clicked.connect(
+            lambda row: self.open_google_maps(model.row(row)["pickup_location"], model.row(row)["destination"])
+        )
+        return buttons
+
     # -------------------------------------------------------
     # LOAD PENDING RIDES
     # -------------------------------------------------------
     def load_pending_rides(self):
-        rides = Ride.get_pending_rides()
-        self.pending_table.setRowCount(len(rides))
-
-        for row, ride in enumerate(rides):
-            self.pending_table.setItem(row, 0, QTableWidgetItem(str(ride["id"])))
-            self.pending_table.setItem(row, 1, QTableWidgetItem(ride["customer_email"]))
-            self.pending_table.setItem(row, 2, QTableWidgetItem(str(ride.get("customer_phone") or "-")))
-            self.pending_table.setItem(row, 3, QTableWidgetItem(ride["pickup_location"]))
-            self.pending_table.setItem(row, 4, QTableWidgetItem(ride["destination"]))
-            self.pending_table.setItem(row, 5, QTableWidgetItem(f"Rs {ride['total_cost']:.2f}"))
-
-            # Accept Button
-            btn_accept = QPushButton("Accept")
-            btn_accept.setIcon(QIcon("assets/icons/accept.svg"))
-            btn_accept.clicked.connect(lambda _, ride_id=ride["id"]: self.accept_ride(ride_id))
-            self.pending_table.setCellWidget(row, 6, btn_accept)
-
-            # Directions Button
-            btn_dir = QPushButton("Directions")
-            btn_dir.setIcon(QIcon("assets/icons/map.svg"))
-            btn_dir.clicked.connect(
-                lambda _, pickup=ride["pickup_location"], dest=ride["destination"]: self.open_google_maps(pickup, dest)
-            )
-            self.pending_table.setCellWidget(row, 7, btn_dir)
+        # Pages after the first are read as the table is scrolled
+        self.pending_model.reload()
 
     # -------------------------------------------------------
     # ACCEPT RIDE
@@ -118,10 +140,29 @@ class DriverWindow(QWidget):
         success, message = Ride.accept_ride(ride_id, self.user.email)
         if success:
             QMessageBox.information(self, "Success", message)
-            self.load_pending_rides()
-            self.load_history()
         else:
             QMessageBox.warning(self, "Error", message)
+        # Either way the pending list may be stale (a lost race means someone else took it)
+        self.refresh_rides()
+
+    # -------------------------------------------------------
+    # REFRESH - apply only the rides changed since the last look
+    # -------------------------------------------------------
+    def on_data_changed(self):
+        if self.isVisible():
+            self.refresh_rides()
+
+    def refresh_rides(self):
+        self.loader.load("changes", Ride.get_changes, self.change_marker, on_done=self.apply_changes)
+
+    def apply_changes(self, changes):
+        self.change_marker, changed, removed = changes
+        if not changed and not removed:
+            return
+        self.pending_model.apply_changes(changed, removed, keep=lambda ride: ride["status"] == "pending")
+        self.history_model.apply_changes(
+            changed, removed, keep=lambda ride: ride["driver_email"] == self.user.email
+        )
 
     # -------------------------------------------------------
     # OPEN GOOGLE MAPS
@@ -150,33 +191,7 @@ class DriverWindow(QWidget):
     # LOAD RIDE HISTORY
     # -------------------------------------------------------
     def load_history(self):
-        rides = Ride.get_driver_rides(self.user.email)
-        self.history_table.setRowCount(len(rides))
-
-        for row, ride in enumerate(rides):
-            self.history_table.setItem(row, 0, QTableWidgetItem(str(ride["id"])))
-            self.history_table.setItem(row, 1, QTableWidgetItem(ride["customer_email"]))
-            self.history_table.setItem(row, 2, QTableWidgetItem(str(ride.get("customer_phone") or "-")))
-            self.history_table.setItem(row, 3, QTableWidgetItem(ride["pickup_location"]))
-            self.history_table.setItem(row, 4, QTableWidgetItem(ride["destination"]))
-            self.history_table.setItem(row, 5, QTableWidgetItem(f"Rs {ride['total_cost']:.2f}"))
-            
-            # Status or Complete Button
-            if ride["status"] == "accepted":
-                btn = QPushButton("Complete")
-                btn.setIcon(QIcon("assets/icons/complete.svg"))
-                btn.clicked.connect(lambda _, ride_id=ride["id"]: self.complete_ride(ride_id))
-                self.history_table.setCellWidget(row, 6, btn)
-            else:
-                self.history_table.setItem(row, 6, QTableWidgetItem(ride["status"]))
-
-            # Directions Button for all rides
-            btn_dir = QPushButton("Directions")
-            btn_dir.setIcon(QIcon("assets/icons/map.svg"))
-            btn_dir.clicked.connect(
-                lambda _, pickup=ride["pickup_location"], dest=ride["destination"]: self.open_google_maps(pickup, dest)
-            )
-            self.history_table.setCellWidget(row, 7, btn_dir)
+        self.history_model.reload()
 
     # -------------------------------------------------------
     # COMPLETE RIDE
@@ -184,8 +199,7 @@ class DriverWindow(QWidget):
     def complete_ride(self, ride_id):
         Ride.complete_ride(ride_id)
         QMessageBox.information(self, "Success", f"Ride {ride_id} completed!")
-        self.load_pending_rides()
-        self.load_history()
+        self.refresh_rides()
 
     # -------------------------------------------------------
     # LOGOUT
@@ -7,9 +7,6 @@ from PyQt5.QtGui import QIcon, QPixmap
 from PyQt5.QtCore import Qt
 
 from models.user import User
-from ui.customer_window import CustomerWindow
-from ui.driver_window import DriverWindow
-from ui.admin_window import AdminWindow
 
 
 class LoginWindow(QWidget):
@@ -157,16 +154,21 @@ class LoginWindow(QWidget):
         self.close()
 
     def open_customer(self, user):
+        # Dashboards load their heavy dependencies (QtWebEngine, routing,
+        # geopy) only when first opened
+        from ui.customer_window import CustomerWindow
         self.customer_window = CustomerWindow(user)
         self.customer_window.show()
         self.close()
 
     def open_driver(self, user):
+        from ui.driver_window import DriverWindow
         self.driver_window = DriverWindow(user)
         self.driver_window.show()
         self.close()
 
     def open_admin(self):
+        from ui.admin_window import AdminWindow
         self.admin_window = AdminWindow()
         self.admin_window.show()
         self.close()
@@ -0,0 +1,108 @@
+"""
+Customer map page, rendered from maps/map_template.html and cached on disk.
+
+The rendered HTML is stored under maps/cache/ in a file named after the
+hash of its content, so a page is written once and reused until the
+template or its parameters change. Nothing here needs Qt or folium.
+
+Offline pages take Leaflet, marker icons and tiles from the ridemap://
+scheme (ui/map_scheme.py), which serves maps/vendor/ and the tile cache;
+online pages use the CDNs and tile servers directly.
+"""
+import hashlib
+import os
+from string import Template
+
+MAPS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "maps")
+TEMPLATE_PATH = os.path.join(MAPS_DIR, "map_template.html")
+CACHE_DIR = os.path.join(MAPS_DIR, "cache")
+VENDOR_DIR = os.path.join(MAPS_DIR, "vendor")
+
+# Kathmandu, Nepal coordinates
+KATHMANDU = (27.7172, 85.3240)
+
+SCHEME = "ridemap"
+ONLINE_TILE_URL = "https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png"
+OFFLINE_TILE_URL = SCHEME + "://tiles/{z}/{x}/{y}.png"
+
+# Template placeholder -> (path under maps/vendor, upstream URL)
+ASSET_SOURCES = {
+    "leaflet_css": ("leaflet/leaflet.css", "https://unpkg.com/leaflet@1.9.4/dist/leaflet.css"),
+    "leaflet_js": ("leaflet/leaflet.js", "https://unpkg.com/leaflet@1.9.4/dist/leaflet.js"),
+    "marker_shadow": ("leaflet/images/marker-shadow.png",
+                      "https://unpkg.com/leaflet@1.9.4/dist/images/marker-shadow.png"),
+    "marker_green": ("markers/marker-icon-2x-green.png",
+                     "https://raw.githubusercontent.com/pointhi/leaflet-color-markers/master/img/marker-icon-2x-green.png"),
+    "marker_red": ("markers/marker-icon-2x-red.png",
+                   "https://raw.githubusercontent.com/pointhi/leaflet-color-markers/master/img/marker-icon-2x-red.png"),
+}
+
+
+def upstream_url(vendor_path):
+    """Upstream URL of a bundled asset, or None if it isn't one."""
+    for path, url in ASSET_SOURCES.values():
+        if path == vendor_path:
+            return url
+    return None
+
+
+def asset_urls(offline=False):
+    if offline:
+        return {name: f"{SCHEME}://assets/{path}" for name, (path, _) in ASSET_SOURCES.items()}
+    return {name: url for name, (_, url) in ASSET_SOURCES.items()}
+
+
+def render_map_page(center=KATHMANDU, zoom=12, template_path=None, offline=False):
+    """The map page HTML for the given center and zoom."""
+    with open(template_path or TEMPLATE_PATH, "r", encoding="utf-8") as f:
+        template = Template(f.read())
+    return template.substitute(
+        center_lat=center[0], center_lng=center[1], zoom=zoom,
+        tile_url=OFFLINE_TILE_URL if offline else ONLINE_TILE_URL,
+        **asset_urls(offline)
+    )
+
+
+def map_page_path(center=KATHMANDU, zoom=12, template_path=None, cache_dir=None, offline=False):
+    """Path of the cached page, writing it first if this content is new."""
+    html = render_map_page(center, zoom, template_path, offline)
+    digest = hashlib.sha256(html.encode("utf-8")).hexdigest()[:16]
+
+    cache_dir = cache_dir or CACHE_DIR
+    path = os.path.join(cache_dir, f"customer_map_{digest}.html")
+    if not os.path.exists(path):
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write then rename so a half-written page is never loaded
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(html)
+        os.replace(temp_path, path)
+    return path
+
+
+# ---------------------------------------------------
+# Download the Leaflet bundle into maps/vendor
+# ---------------------------------------------------
+def fetch_assets(vendor_dir=None, session=None, timeout=15):
+    """Downloads missing assets; returns the vendor paths that failed."""
+    import requests
+
+    vendor_dir = vendor_dir or VENDOR_DIR
+    session = session or requests.Session()
+    missing = []
+    for path, url in ASSET_SOURCES.values():
+        target = os.path.join(vendor_dir, *path.split("/"))
+        if os.path.exists(target):
+            continue
+        try:
+            response = session.get(url, timeout=timeout)
+        except requests.RequestException:
+            missing.append(path)
+            continue
+        if response.status_code != 200:
+            missing.append(path)
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "wb") as f:
+            f.write(response.content)
+    return missing
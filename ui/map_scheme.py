@@ -0,0 +1,129 @@
+"""
+ridemap:// URL scheme for QWebEngine: the offline side of the customer map.
+
+    ridemap://app/<page>.html      rendered pages from maps/cache/
+    ridemap://assets/<path>        Leaflet bundle from maps/vendor/
+    ridemap://tiles/{z}/{x}/{y}.png  OpenStreetMap tiles via ui/tile_cache.py
+
+Tiles missing from the cache are downloaded in the background and stored,
+so each tile crosses the network at most once. Assets not bundled yet
+redirect to their CDN. register_scheme() must run before QApplication is
+created; install_scheme_handler() runs when the map first opens.
+"""
+import mimetypes
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QBuffer, QByteArray, QIODevice, QUrl, pyqtSignal
+from PyQt5.QtWebEngineCore import QWebEngineUrlRequestJob, QWebEngineUrlScheme, QWebEngineUrlSchemeHandler
+
+from ui.map_page import CACHE_DIR, SCHEME, VENDOR_DIR, upstream_url
+
+TILE_PATH = re.compile(r"^/(\d+)/(\d+)/(\d+)\.png$")
+
+_registered = False
+_handler = None
+
+
+def register_scheme():
+    """Declare ridemap:// to Qt; must be called before the QApplication exists."""
+    global _registered
+    if _registered:
+        return
+    scheme = QWebEngineUrlScheme(SCHEME.encode())
+    scheme.setSyntax(QWebEngineUrlScheme.Syntax.Host)
+    scheme.setFlags(QWebEngineUrlScheme.SecureScheme
+                    | QWebEngineUrlScheme.LocalAccessAllowed
+                    | QWebEngineUrlScheme.CorsEnabled)
+    QWebEngineUrlScheme.registerScheme(scheme)
+    _registered = True
+
+
+def install_scheme_handler():
+    """Serve ridemap:// from the default profile; None if the scheme was never registered."""
+    global _handler
+    from PyQt5.QtWebEngineWidgets import QWebEngineProfile
+
+    if not _registered:
+        return None
+    if _handler is None:
+        _handler = MapSchemeHandler()
+        QWebEngineProfile.defaultProfile().installUrlSchemeHandler(SCHEME.encode(), _handler)
+    return _handler
+
+
+def _serve_file(base_dir, relative_path):
+    """Bytes of base_dir/relative_path, refusing paths that escape base_dir."""
+    base_dir = os.path.realpath(base_dir)
+    path = os.path.realpath(os.path.join(base_dir, *relative_path.split("/")))
+    if not path.startswith(base_dir + os.sep) or not os.path.isfile(path):
+        return None
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class MapSchemeHandler(QWebEngineUrlSchemeHandler):
+    # (job, tile bytes or None) from a download worker
+    tile_ready = pyqtSignal(object, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        from ui.tile_cache import get_tile_cache
+        self.tile_cache = get_tile_cache()
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="tiles")
+        # Jobs waiting on a download, kept alive until answered
+        self._pending = set()
+        self.tile_ready.connect(self.on_tile_ready)
+
+    def requestStarted(self, job):
+        url = job.requestUrl()
+        host, path = url.host(), url.path()
+
+        if host == "tiles":
+            match = TILE_PATH.match(path)
+            if not match:
+                job.fail(QWebEngineUrlRequestJob.UrlInvalid)
+                return
+            z, x, y = (int(part) for part in match.groups())
+            data = self.tile_cache.get(z, x, y)
+            if data is not None:
+                self.reply(job, "image/png", data)
+                return
+            self._pending.add(job)
+            self.executor.submit(lambda: self.tile_ready.emit(job, self.tile_cache.fetch(z, x, y)))
+            return
+
+        if host == "app":
+            data = _serve_file(CACHE_DIR, path.lstrip("/"))
+        elif host == "assets":
+            data = _serve_file(VENDOR_DIR, path.lstrip("/"))
+            if data is None and upstream_url(path.lstrip("/")):
+                # Not bundled yet (python -m ui.tile_cache assets); use the CDN
+                job.redirect(QUrl(upstream_url(path.lstrip("/"))))
+                return
+        else:
+            data = None
+
+        if data is None:
+            job.fail(QWebEngineUrlRequestJob.UrlNotFound)
+            return
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        self.reply(job, content_type, data)
+
+    def on_tile_ready(self, job, data):
+        self._pending.discard(job)
+        try:
+            if data is None:
+                job.fail(QWebEngineUrlRequestJob.RequestFailed)
+            else:
+                self.reply(job, "image/png", data)
+        except RuntimeError:
+            # The page went away before the tile arrived
+            pass
+
+    def reply(self, job, content_type, data):
+        buffer = QBuffer(parent=job)
+        buffer.setData(QByteArray(data))
+        buffer.open(QIODevice.ReadOnly)
+        job.reply(content_type.encode(), buffer)
@@ -0,0 +1,64 @@
+"""
+Row diffs for the dashboard tables, kept free of Qt so they can be tested.
+
+diff_operations() turns a batch of changed rows (from Ride.get_changes)
+into the inserts, updates and removals a sorted table needs, so a model
+can apply them row by row instead of reloading everything.
+"""
+from bisect import bisect_left
+
+
+def _default_id(row):
+    return row["id"]
+
+
+def diff_operations(rows, changed, removed_ids=(), sort_key=_default_id, keep=lambda row: True,
+                    complete=True, row_id=_default_id):
+    """
+    Operations that bring `rows` (sorted by sort_key) up to date.
+
+    Changed rows that satisfy `keep` are inserted or updated in place;
+    the rest, and every id in removed_ids, are removed. With complete=False
+    only some pages are loaded, so rows sorting past the last one are left
+    for a later page.
+
+    Returns [(op, index, row)] with op "remove", "insert" or "update"; each
+    index is valid at the moment its operation is applied.
+    """
+    rows = list(rows)
+    keys = [sort_key(row) for row in rows]
+    ids = [row_id(row) for row in rows]
+    ops = []
+
+    def remove(item_id):
+        if item_id not in ids:
+            return
+        index = ids.index(item_id)
+        del rows[index], keys[index], ids[index]
+        ops.append(("remove", index, None))
+
+    for item_id in removed_ids:
+        remove(item_id)
+
+    for row in changed:
+        item_id, key = row_id(row), sort_key(row)
+        if not keep(row):
+            remove(item_id)
+            continue
+        if item_id in ids:
+            index = ids.index(item_id)
+            if keys[index] == key:
+                rows[index] = row
+                ops.append(("update", index, row))
+                continue
+            # Sort position changed: move it
+            remove(item_id)
+        if not complete and (not keys or key > keys[-1]):
+            continue
+        index = bisect_left(keys, key)
+        rows.insert(index, row)
+        keys.insert(index, key)
+        ids.insert(index, item_id)
+        ops.append(("insert", index, row))
+
+    return ops
@@ -0,0 +1,230 @@
+"""
+Model/view tables for the dashboards.
+
+LazyTableModel reads its rows a page at a time through canFetchMore /
+fetchMore, so a view only holds the pages the user has scrolled to, and
+ButtonDelegate paints action buttons instead of creating a QPushButton per
+row. Load time and memory follow what is on screen, not the table size.
+
+With an AsyncLoader (ui/async_loader.py) pages are read on a worker
+thread and the view shows a loading overlay until they arrive.
+
+A column is (title, text) or (title, text, action), where text(row) is the
+cell text and action(row) is a button label, or None for no button.
+"""
+from PyQt5.QtCore import QAbstractTableModel, QEvent, QModelIndex, QSize, Qt, pyqtSignal
+from PyQt5.QtGui import QIcon
+from PyQt5.QtWidgets import (
+    QAbstractItemView, QHeaderView, QLabel, QPushButton, QStyle, QStyledItemDelegate,
+    QStyleOptionButton, QTableView, QVBoxLayout
+)
+
+from ui.table_diff import diff_operations
+
+PAGE_SIZE = 200
+
+# Button label of an action cell (None: no button)
+ACTION_ROLE = Qt.UserRole + 1
+
+
+class LazyTableModel(QAbstractTableModel):
+    loading_changed = pyqtSignal(bool)
+    load_failed = pyqtSignal(str)
+
+    def __init__(self, columns, fetch_page, page_key=lambda row: row["id"], page_size=PAGE_SIZE,
+                 loader=None, parent=None):
+        """
+        fetch_page(limit, after) returns the next rows as dicts; `after` is
+        page_key() of the last row loaded, or None for the first page. It
+        runs on `loader`'s thread pool if one is given, else inline.
+        """
+        super().__init__(parent)
+        self.columns = columns
+        self.fetch_page = fetch_page
+        self.page_key = page_key
+        self.page_size = page_size
+        self.loader = loader
+        self._rows = []
+        self._exhausted = False
+        self._loading = False
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.columns[section][0]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        column = self.columns[index.column()]
+        row = self._rows[index.row()]
+        if role == Qt.DisplayRole:
+            return column[1](row)
+        if role == ACTION_ROLE and len(column) > 2:
+            return column[2](row)
+        return None
+
+    # -----------------------------
+    # Paging
+    # -----------------------------
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted and not self._loading
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted or self._loading:
+            return
+        after = self.page_key(self._rows[-1]) if self._rows else None
+        if self.loader is None:
+            self._add_page(self.fetch_page(self.page_size, after))
+            return
+        self._set_loading(True)
+        # Named per model: a reload supersedes a page still in flight
+        self.loader.load(f"page-{id(self)}", self.fetch_page, self.page_size, after,
+                         on_done=self._on_page, on_error=self._on_page_failed)
+
+    def _add_page(self, page):
+        if len(page) < self.page_size:
+            self._exhausted = True
+        if page:
+            self.beginInsertRows(QModelIndex(), len(self._rows), len(self._rows) + len(page) - 1)
+            self._rows.extend(page)
+            self.endInsertRows()
+
+    def _on_page(self, page):
+        self._set_loading(False)
+        self._add_page(page)
+
+    def _on_page_failed(self, message):
+        self._set_loading(False)
+        self.load_failed.emit(message)
+
+    def _set_loading(self, loading):
+        self._loading = loading
+        self.loading_changed.emit(loading)
+
+    def is_loading(self):
+        return self._loading
+
+    def reload(self):
+        """Drop the loaded rows and read the first page again."""
+        self.beginResetModel()
+        self._rows = []
+        self._exhausted = False
+        self._loading = False
+        self.endResetModel()
+        self.fetchMore()
+
+    def apply_changes(self, changed, removed_ids=(), keep=lambda row: True):
+        """
+        Merge changed rows into the loaded ones in place (see
+        ui/table_diff.py); rows failing `keep` leave the table.
+        """
+        for op, index, row in diff_operations(self._rows, changed, removed_ids, self.page_key, keep,
+                                              complete=self._exhausted):
+            if op == "remove":
+                self.beginRemoveRows(QModelIndex(), index, index)
+                del self._rows[index]
+                self.endRemoveRows()
+            elif op == "insert":
+                self.beginInsertRows(QModelIndex(), index, index)
+                self._rows.insert(index, row)
+                self.endInsertRows()
+            else:
+                self._rows[index] = row
+                self.dataChanged.emit(self.index(index, 0), self.index(index, len(self.columns) - 1))
+
+    def row(self, index):
+        return self._rows[index]
+
+    def find_row(self, predicate):
+        """First loaded row matching predicate, or None."""
+        return next((row for row in self._rows if predicate(row)), None)
+
+
+class ButtonDelegate(QStyledItemDelegate):
+    # Model row whose button was clicked
+    clicked = pyqtSignal(int)
+
+    def __init__(self, icon_path=None, style_sheet="", parent=None):
+        super().__init__(parent)
+        # One hidden button lends its style (app and own style sheet) to every painted cell
+        self._button = QPushButton()
+        self._button.setStyleSheet(style_sheet)
+        self._button.ensurePolished()
+        self._icon = QIcon(icon_path) if icon_path else QIcon()
+        self._pressed = None
+
+    def paint(self, painter, option, index):
+        label = index.data(ACTION_ROLE)
+        if label is None:
+            super().paint(painter, option, index)
+            return
+        button = QStyleOptionButton()
+        button.rect = option.rect.adjusted(4, 3, -4, -3)
+        button.text = label
+        button.icon = self._icon
+        button.iconSize = QSize(16, 16)
+        button.state = QStyle.State_Enabled
+        if self._pressed == (index.row(), index.column()):
+            button.state |= QStyle.State_Sunken
+        else:
+            button.state |= QStyle.State_Raised
+        if option.state & QStyle.State_MouseOver:
+            button.state |= QStyle.State_MouseOver
+        self._button.style().drawControl(QStyle.CE_PushButton, button, painter, self._button)
+
+    def editorEvent(self, event, model, option, index):
+        cell = (index.row(), index.column())
+        if event.type() == QEvent.MouseButtonRelease:
+            pressed, self._pressed = self._pressed, None
+            if pressed is None:
+                return False
+            if pressed == cell and option.rect.contains(event.pos()):
+                self.clicked.emit(index.row())
+            return True
+        if index.data(ACTION_ROLE) is None:
+            return False
+        if event.type() == QEvent.MouseButtonPress and event.button() == Qt.LeftButton:
+            self._pressed = cell
+            return True
+        return False
+
+
+def table_view(model, buttons=None):
+    """A read-only QTableView over `model`; buttons maps column -> ButtonDelegate."""
+    view = QTableView()
+    view.setModel(model)
+    view.setMouseTracking(True)
+    view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+    view.setSelectionBehavior(QAbstractItemView.SelectRows)
+    view.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+    # Fixed row heights: no per-row size hints over thousands of rows
+    view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+    for column, delegate in (buttons or {}).items():
+        delegate.setParent(view)
+        view.setItemDelegateForColumn(column, delegate)
+
+    # Loading state, drawn over the rows while a page is on its way
+    overlay = QLabel("Loading...")
+    overlay.setStyleSheet("background-color: rgba(30, 30, 30, 200); padding: 8px 14px; border-radius: 6px;")
+    overlay.setVisible(model.is_loading())
+    layout = QVBoxLayout(view.viewport())
+    layout.addWidget(overlay, alignment=Qt.AlignCenter)
+
+    def show_loading(loading):
+        overlay.setText("Loading...")
+        overlay.setVisible(loading)
+
+    def show_error(message):
+        overlay.setText(f"Could not load: {message}")
+        overlay.show()
+
+    model.loading_changed.connect(show_loading)
+    model.load_failed.connect(show_error)
+    return view
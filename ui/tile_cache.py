@@ -0,0 +1,224 @@
+"""
+On-disk cache of OpenStreetMap tiles for the customer map.
+
+Tiles are stored as maps/tiles/{z}/{x}/{y}.png (or under
+RIDE_CHECKER_TILE_CACHE) and evicted least-recently-used first once the
+cache grows past `max_bytes`. The map page reads them through the
+ridemap:// scheme (ui/map_scheme.py), so cached areas work offline.
+
+Warm the cache for Kathmandu, or download the Leaflet bundle, with:
+
+    python -m ui.tile_cache prefetch --zooms 12 13 14
+    python -m ui.tile_cache assets
+
+Keep prefetches small: the OSM tile servers forbid bulk downloading.
+"""
+import argparse
+import math
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import requests
+
+TILE_CACHE_DIR = os.environ.get("RIDE_CHECKER_TILE_CACHE") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "maps", "tiles"
+)
+TILE_URL = "https://tile.openstreetmap.org/{z}/{x}/{y}.png"
+USER_AGENT = "RideChecker/1.0 (desktop ride booking app)"
+
+# (south, west, north, east) around the Kathmandu valley
+KATHMANDU_BBOX = (27.62, 85.24, 27.78, 85.44)
+
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+
+def tile_xy(lat, lng, zoom):
+    """Slippy-map tile containing (lat, lng) at `zoom`."""
+    n = 2 ** zoom
+    x = int((lng + 180.0) / 360.0 * n)
+    lat_rad = math.radians(lat)
+    y = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tiles_for_bbox(bbox, zoom):
+    """Every (z, x, y) covering bbox = (south, west, north, east) at `zoom`."""
+    south, west, north, east = bbox
+    x_min, y_min = tile_xy(north, west, zoom)
+    x_max, y_max = tile_xy(south, east, zoom)
+    for x in range(x_min, x_max + 1):
+        for y in range(y_min, y_max + 1):
+            yield zoom, x, y
+
+
+class TileCache:
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES, session=None,
+                 tile_url=TILE_URL, timeout=(3.05, 10)):
+        self.cache_dir = cache_dir or TILE_CACHE_DIR
+        self.max_bytes = max_bytes
+        self.tile_url = tile_url
+        self.timeout = timeout
+        self.session = session
+        self._lock = threading.Lock()
+
+        # (z, x, y) -> size in bytes, least recently used first
+        self._index = OrderedDict()
+        self.total_bytes = 0
+        self._scan()
+
+    def _scan(self):
+        entries = []
+        if os.path.isdir(self.cache_dir):
+            for root, _, files in os.walk(self.cache_dir):
+                for name in files:
+                    key = self._key_for(os.path.join(root, name))
+                    if key is None:
+                        continue
+                    stat = os.stat(os.path.join(root, name))
+                    entries.append((stat.st_mtime, key, stat.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self.total_bytes += size
+
+    def _key_for(self, path):
+        parts = os.path.relpath(path, self.cache_dir).split(os.sep)
+        if len(parts) != 3 or not parts[2].endswith(".png"):
+            return None
+        try:
+            return int(parts[0]), int(parts[1]), int(parts[2][:-4])
+        except ValueError:
+            return None
+
+    def path_for(self, z, x, y):
+        return os.path.join(self.cache_dir, str(z), str(x), f"{y}.png")
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._index
+
+    def __len__(self):
+        with self._lock:
+            return len(self._index)
+
+    # -----------------------------
+    # Cached tile bytes, or None
+    # -----------------------------
+    def get(self, z, x, y):
+        key = (z, x, y)
+        with self._lock:
+            if key not in self._index:
+                return None
+            self._index.move_to_end(key)
+        path = self.path_for(z, x, y)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            # mtime records recency so LRU order survives restarts
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.total_bytes -= self._index.pop(key, 0)
+            return None
+        return data
+
+    # -----------------------------
+    # Store a tile and evict past max_bytes
+    # -----------------------------
+    def put(self, z, x, y, data):
+        key = (z, x, y)
+        path = self.path_for(z, x, y)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+        with self._lock:
+            self.total_bytes -= self._index.pop(key, 0)
+            self._index[key] = len(data)
+            self.total_bytes += len(data)
+            evicted = []
+            while self.total_bytes > self.max_bytes and len(self._index) > 1:
+                old_key, size = self._index.popitem(last=False)
+                self.total_bytes -= size
+                evicted.append(old_key)
+        for old_key in evicted:
+            try:
+                os.remove(self.path_for(*old_key))
+            except OSError:
+                pass
+
+    # -----------------------------
+    # Download a tile into the cache (None on failure)
+    # -----------------------------
+    def fetch(self, z, x, y):
+        if self.session is None:
+            self.session = requests.Session()
+            self.session.headers["User-Agent"] = USER_AGENT
+        try:
+            response = self.session.get(self.tile_url.format(z=z, x=x, y=y), timeout=self.timeout)
+        except requests.RequestException:
+            return None
+        if response.status_code != 200 or not response.content:
+            return None
+        self.put(z, x, y, response.content)
+        return response.content
+
+    # -----------------------------
+    # Warm the cache for an area
+    # -----------------------------
+    def prefetch(self, bbox=KATHMANDU_BBOX, zooms=(12, 13, 14), max_tiles=2000):
+        """Download missing tiles for bbox at each zoom; returns (fetched, failed)."""
+        wanted = [key for zoom in zooms for key in tiles_for_bbox(bbox, zoom) if key not in self]
+        if len(wanted) > max_tiles:
+            raise ValueError(f"{len(wanted)} tiles requested; raise max_tiles or narrow the area")
+
+        fetched = failed = 0
+        for key in wanted:
+            if self.fetch(*key) is None:
+                failed += 1
+            else:
+                fetched += 1
+        return fetched, failed
+
+
+_tile_cache = None
+
+
+def get_tile_cache():
+    """The shared tile cache, scanned on first use."""
+    global _tile_cache
+    if _tile_cache is None:
+        _tile_cache = TileCache()
+    return _tile_cache
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline map data for the customer window")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    prefetch = commands.add_parser("prefetch", help="download map tiles for an area")
+    prefetch.add_argument("--bbox", type=float, nargs=4, default=KATHMANDU_BBOX,
+                          metavar=("SOUTH", "WEST", "NORTH", "EAST"))
+    prefetch.add_argument("--zooms", type=int, nargs="+", default=[12, 13, 14])
+    prefetch.add_argument("--max-tiles", type=int, default=2000)
+
+    commands.add_parser("assets", help="download the Leaflet bundle into maps/vendor")
+
+    args = parser.parse_args(argv)
+    if args.command == "prefetch":
+        fetched, failed = get_tile_cache().prefetch(tuple(args.bbox), args.zooms, args.max_tiles)
+        print(f"Fetched {fetched} tiles, {failed} failed")
+        return 1 if failed else 0
+
+    from ui.map_page import fetch_assets
+    missing = fetch_assets()
+    for path in missing:
+        print(f"Could not download {path}")
+    return 1 if missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
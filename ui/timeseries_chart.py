@@ -0,0 +1,102 @@
+"""
+Line chart for Admin.timeseries in the admin window.
+
+Drawn with QPainter so it needs nothing beyond PyQt5. Points are reduced
+with ui/downsample.py to at most two per pixel column of the plot area, so
+a year of hourly buckets costs the same to paint as a few hundred.
+"""
+from PyQt5.QtCore import QPointF, QRectF, Qt
+from PyQt5.QtGui import QColor, QPainter, QPainterPath, QPen
+from PyQt5.QtWidgets import QSizePolicy, QWidget
+
+from ui.downsample import min_max_indices
+
+LINE_COLOR = QColor("#2d89ef")
+AXIS_COLOR = QColor("#555555")
+TEXT_COLOR = QColor("#f0f0f0")
+MARGIN_LEFT = 70
+MARGIN = 12
+MARGIN_BOTTOM = 28
+
+
+class TimeSeriesChart(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.points = []
+        self.message = "No data"
+        self._path = None  # (plot width, path) cached until points or size change
+        self.setMinimumHeight(180)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Preferred)
+
+    def set_points(self, points):
+        """points: TimeSeriesPoint list (start, value) in time order"""
+        self.points = list(points)
+        self.message = "No data"
+        self._path = None
+        self.update()
+
+    def show_message(self, message):
+        self.points = []
+        self.message = message
+        self._path = None
+        self.update()
+
+    def plot_rect(self):
+        return QRectF(MARGIN_LEFT, MARGIN, max(1, self.width() - MARGIN_LEFT - MARGIN),
+                      max(1, self.height() - MARGIN - MARGIN_BOTTOM))
+
+    def value_range(self):
+        values = [point.value for point in self.points]
+        low, high = min(min(values), 0), max(values)
+        return low, (high if high > low else low + 1)
+
+    def line_path(self, rect):
+        columns = int(rect.width())
+        if self._path is not None and self._path[0] == columns:
+            return self._path[1]
+
+        values = [point.value for point in self.points]
+        low, high = self.value_range()
+        last = max(1, len(values) - 1)
+        path = QPainterPath()
+        for n, index in enumerate(min_max_indices(values, columns)):
+            x = rect.left() + rect.width() * index / last
+            y = rect.bottom() - rect.height() * (values[index] - low) / (high - low)
+            if n == 0:
+                path.moveTo(QPointF(x, y))
+            else:
+                path.lineTo(QPointF(x, y))
+        self._path = (columns, path)
+        return path
+
+    def resizeEvent(self, event):
+        self._path = None
+        super().resizeEvent(event)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        rect = self.plot_rect()
+
+        painter.setPen(QPen(AXIS_COLOR, 1))
+        painter.drawLine(rect.bottomLeft(), rect.bottomRight())
+        painter.drawLine(rect.bottomLeft(), rect.topLeft())
+
+        painter.setPen(TEXT_COLOR)
+        if not self.points:
+            painter.drawText(rect, Qt.AlignCenter, self.message)
+            return
+
+        # Value labels on the left, first and last bucket along the bottom
+        low, high = self.value_range()
+        label_width = MARGIN_LEFT - 8
+        painter.drawText(QRectF(0, rect.top() - 8, label_width, 16), Qt.AlignRight | Qt.AlignVCenter, f"{high:,.0f}")
+        painter.drawText(QRectF(0, rect.bottom() - 8, label_width, 16), Qt.AlignRight | Qt.AlignVCenter, f"{low:,.0f}")
+        label_format = "%Y-%m-%d %H:%M" if len(self.points) > 1 and \
+            (self.points[1].start - self.points[0].start).total_seconds() < 86400 else "%Y-%m-%d"
+        bottom = QRectF(rect.left(), rect.bottom() + 4, rect.width(), MARGIN_BOTTOM - 4)
+        painter.drawText(bottom, Qt.AlignLeft | Qt.AlignTop, self.points[0].start.strftime(label_format))
+        painter.drawText(bottom, Qt.AlignRight | Qt.AlignTop, self.points[-1].start.strftime(label_format))
+
+        painter.setPen(QPen(LINE_COLOR, 2))
+        painter.drawPath(self.line_path(rect))